@@ -57,6 +57,22 @@ class Settings:
         }
     }
     
+    # 运费估算配置（批量输入未填写 shipping_fee 时，按重量或运费等级估算）
+    SHIPPING_CONFIG = {
+        # 各运费等级对应的重量区间（kg），运费在 shipping_fee_ranges 的范围内按重量线性插值；
+        # 只有等级没有重量时取范围中点，超出最重一档的重量按最重一档的上限运费计算
+        "weight_bounds": {
+            "light": (0, 3),
+            "heavy": (3, 30),
+            "special": (30, 100),
+        },
+        "class_aliases": {       # 运费等级的中文写法
+            "轻货": "light", "轻": "light",
+            "重货": "heavy", "重": "heavy",
+            "特殊": "special", "特殊商品": "special",
+        },
+    }
+    
     # 报告配置
     REPORT_CONFIG = {
         "export_formats": ["xlsx", "csv", "pdf"],
@@ -70,6 +86,41 @@ class Settings:
         "decimal_places": 2,
     }
     
+    # 订单导出文件导入配置（列名按拼多多商家后台订单导出，可按实际表头修改）
+    ORDER_IMPORT_CONFIG = {
+        "columns": {
+            "sku": "商家编码-SKU维度",      # 商品型号
+            "paid_at": "支付时间",          # 按时间窗口分组时使用
+            "quantity": "商品数量(件)",
+            "amount": "商家实收金额(元)",
+            "shipped_at": "发货时间",       # 为空表示未发货
+            "after_sale": "售后状态",
+        },
+        "refund_keywords": ["退款成功", "退货退款", "已退款"],  # 售后状态包含任一关键词即视为已退款
+        "chunk_size": 200000,              # 每次读取的行数
+    }
+    
+    # 图表降采样配置（大数据量时控制传给浏览器的点数）
+    CHART_CONFIG = {
+        "max_line_points": 2000,     # 折线图最多绘制的点数（超出时LTTB降采样）
+        "minmax_threshold": 200000,  # 超过该点数改用最小/最大值分桶（更快）
+        "webgl_threshold": 5000,     # 超过该点数使用 Scattergl
+        "bar_top_n": 30,             # 批量对比柱状图最多显示的商品数，其余合并为"其他"
+        "histogram_bins": 50,        # 利润分布直方图箱数
+    }
+    
+    # Web界面缓存配置（st.cache_data）
+    WEB_CACHE_CONFIG = {
+        "max_entries": 16,       # 每个缓存函数最多保留的条目数
+        "ttl_seconds": 3600,     # 缓存有效期
+    }
+    
+    # 后台作业配置（保留策略为None表示不限制）
+    JOB_CONFIG = {
+        "max_age_hours": 72,    # 已完成作业的状态和结果文件最长保留时间
+        "max_jobs": 50,         # 磁盘上最多保留的已完成作业数
+    }
+    
     # 风险控制配置
     RISK_CONFIG = {
         "max_refund_rate": 0.5,     # 最大退款率50%
@@ -84,6 +135,74 @@ class Settings:
         }
     }
     
+    # 广告预算分配配置
+    AD_BUDGET_CONFIG = {
+        "default_bid_ratio": 0.8,      # 未设置出价的商品，建议出价 = 保本广告出价 × 该比例
+        "default_order_capacity": 50,  # 未提供时每个商品每日可承接的广告成交单数
+    }
+    
+    # 广告出价建议配置（get_ad_cost_suggestion 及批量出价建议）
+    AD_SUGGESTION_CONFIG = {
+        "profit_share": 0.2,    # 建议广告费用上限 = 扣点后售价 × 该比例
+        "tiers": {              # 各档出价 = 上限 × 比例（按从保守到激进排列）
+            "conservative": 0.3,
+            "moderate": 0.6,
+            "aggressive": 0.9,
+        },
+    }
+    
+    # 批量结果排名配置
+    RANKING_CONFIG = {
+        "display_n": 50,           # 默认显示前/后 N 名
+        "full_table_rows": 1000,   # 结果不超过该行数时直接显示完整表格
+    }
+    
+    # 批量结果分组汇总配置
+    ROLLUP_CONFIG = {
+        "price_bands": [0, 10, 20, 30, 50, 100, 200],  # 价格带分界（元），最后一档为"200以上"
+    }
+    
+    # 利润风险模拟（蒙特卡洛）配置
+    MONTE_CARLO_CONFIG = {
+        "draws": 1000000,                 # 每个商品的抽样次数
+        "batch_size": 250000,             # 每批抽样次数（限制内存）
+        "rate_concentration": 50,         # 退款率 Beta 分布的集中度，越大越接近点估计
+        "confidence": 0.95,               # VaR/CVaR 置信度
+        "quantiles": [0.05, 0.25, 0.5, 0.75, 0.95],
+    }
+    
+    # 价格弹性拟合配置
+    ELASTICITY_CONFIG = {
+        "min_points": 3,              # 每个商品至少需要的历史样本数（且价格不能全部相同）
+        "price_extrapolation": 0.2,   # 最优售价最多超出历史价格范围的比例
+    }
+    
+    # 现金流预测配置（天数均从下单当天起算）
+    CASHFLOW_CONFIG = {
+        "horizon_days": 90,           # 预测天数
+        "sales_period_days": 30,      # 没有 daily_orders 列时，销量按该天数折算为日均订单数
+        "settlement_lag_days": 15,    # 平台回款周期（下单到货款结算）
+        "refund_delay_days": 10,      # 发货后退款的平均发生时间
+        "opening_cash": 0.0,          # 期初现金
+        "chunk_size": 20000,          # 每批模拟的商品数（限制内存）
+    }
+    
+    # 历史记录维护配置（保留策略为None表示不限制）
+    HISTORY_CONFIG = {
+        "retention": {
+            "max_age_days": None,          # 最长保留天数
+            "max_records": None,           # 最多保留记录数
+            "keep_latest_per_sku": None,   # 每个商品型号保留最新N条
+        },
+        "maintenance_interval_hours": 24,  # 后台维护间隔
+        # 存储格式默认与旧版一致（完整结果 + 缩进JSON），其余格式需手动开启
+        "storage": {
+            "record_mode": "full",         # full: 保存完整结果; compact: 不保存公式字符串; inputs: 只保存输入
+            "encoding": "json",            # json(缩进) / compact_json / msgpack(需安装msgpack)
+            "compression": None,           # None / "zstd"(需安装zstandard)
+        },
+    }
+    
     # 日志配置
     LOGGING_CONFIG = {
         "version": 1,
@@ -145,6 +264,7 @@ class Settings:
             "pinduoduo": cls.PINDUODUO_CONFIG,
             "report": cls.REPORT_CONFIG,
             "risk": cls.RISK_CONFIG,
+            "history": cls.HISTORY_CONFIG,
             "logging": cls.LOGGING_CONFIG,
         }
     
@@ -191,13 +311,12 @@ class Settings:
         """获取广告费用建议"""
         commission_rate = cls.PINDUODUO_CONFIG["default_commission_rates"].get(category, 0.03)
         
-        # 建议广告费用不超过单品利润的20%
-        max_suggested_ad_cost = price * (1 - commission_rate) * 0.2
+        # 建议广告费用不超过扣点后售价的一定比例（默认20%），再按保守/适中/激进分档
+        max_suggested_ad_cost = price * (1 - commission_rate) * cls.AD_SUGGESTION_CONFIG["profit_share"]
         
         return {
-            "conservative": max_suggested_ad_cost * 0.3,  # 保守建议
-            "moderate": max_suggested_ad_cost * 0.6,      # 适中建议
-            "aggressive": max_suggested_ad_cost * 0.9,    # 激进建议
+            tier: max_suggested_ad_cost * ratio
+            for tier, ratio in cls.AD_SUGGESTION_CONFIG["tiers"].items()
         }
 
 # 创建全局配置实例
@@ -8,8 +8,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import pandas as pd
+from datetime import datetime
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
 import matplotlib
 matplotlib.use('TkAgg')
 
@@ -19,8 +21,68 @@ plt.rcParams['axes.unicode_minus'] = False
 
 from src.input_module import ProfitInput
 from src.calculation_engine import calculate_profit
+from src.batch_engine import calculate_profit_frame
+from src.input_schema import parse_inputs
+from src.risk_screening import screen_inputs, ERROR_FLAG_COLUMN, WARNING_FLAG_COLUMN
 from src.history_manager import history_manager
-from src.output_module import export_to_excel
+from src.output_module import export_to_excel, export_batch_to_excel, downsample_line
+from src.ranking import RANKING_METRICS, ranking_metrics, top_k_indices
+from src.rollups import attach_dimensions
+from config.settings import Settings
+from src.task_runner import BackgroundTaskRunner
+
+
+# 批量结果表格：每页最多显示的行数、每次 after() 插入的行数
+BATCH_PAGE_SIZE = 1000
+BATCH_INSERT_CHUNK = 200
+
+# 批量结果显示范围
+BATCH_VIEWS = ("全部", "前N名", "后N名")
+
+
+class TrendChart:
+    """
+    常驻的利润趋势图
+    
+    Figure 与画布只创建一次，之后通过 set_data 原地更新折线并 draw_idle 重绘，
+    长时间使用不会累积图表对象。使用 matplotlib.figure.Figure 而非 pyplot，
+    图表不进入 pyplot 的全局注册表，不需要 plt.close 也不会泄漏。
+    """
+    
+    def __init__(self, parent):
+        self.figure = Figure(figsize=(10, 6))
+        self.ax = self.figure.add_subplot(111)
+        self.line, = self.ax.plot([], [], marker='o', linewidth=2, markersize=4)
+        self.ax.set_xlabel('售价 (元)')
+        self.ax.set_ylabel('利润 (元)')
+        self.ax.set_title('不同售价下的利润变化趋势')
+        self.ax.grid(True, alpha=0.3)
+        self.figure.tight_layout()
+        
+        self.canvas = FigureCanvasTkAgg(self.figure, parent)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas.draw_idle()
+    
+    def update(self, prices, profits):
+        """原地替换折线数据（点数过多时降采样），重新计算坐标范围后延迟重绘"""
+        x, y, total = downsample_line(prices, profits)
+        self.line.set_data(x, y)
+        # 点较多时隐藏标记点，避免重绘变慢
+        self.line.set_marker('o' if len(x) <= 200 else '')
+        
+        title = '不同售价下的利润变化趋势'
+        if len(x) < total:
+            title += f'（{total}个点降采样至{len(x)}个）'
+        self.ax.set_title(title)
+        
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.canvas.draw_idle()
+    
+    def close(self):
+        """销毁画布控件并释放图表"""
+        self.canvas.get_tk_widget().destroy()
+        self.figure.clear()
 
 
 class ProfitAnalysisGUI:
@@ -35,10 +97,25 @@ class ProfitAnalysisGUI:
         except:
             pass
         
+        # 后台任务执行器：耗时操作在工作线程运行，结果经 root.after 回到主线程
+        self.task_runner = BackgroundTaskRunner(self.root.after)
+        self.current_task = None
+        
+        # 批量结果分页状态（batch_all_rows 为全部行，batch_rows 为当前显示范围）
+        self.batch_all_rows = []
+        self.batch_metrics = None
+        self.batch_export = None
+        self.batch_rows = []
+        self.batch_page = 0
+        self._batch_insert_job = None
+        
         # 创建主界面
         self.create_widgets()
         
     def create_widgets(self):
+        # 底部状态栏（先于选项卡布局，保证始终可见）
+        self.create_status_bar()
+        
         # 创建笔记本控件（选项卡）
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -49,6 +126,75 @@ class ProfitAnalysisGUI:
         self.create_history_tab()
         self.create_trend_tab()
         
+    def create_status_bar(self):
+        """创建状态栏：任务进度和取消按钮"""
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 10))
+        
+        self.status_var = tk.StringVar(value="就绪")
+        ttk.Label(status_frame, textvariable=self.status_var).pack(side=tk.LEFT)
+        
+        self.cancel_button = ttk.Button(status_frame, text="取消", command=self.cancel_task, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT)
+        
+        self.progress = ttk.Progressbar(status_frame, length=300, mode='determinate')
+        self.progress.pack(side=tk.RIGHT, padx=(0, 10))
+    
+    def run_task(self, name, func, *args, on_done=None, on_partial=None, error_title="操作失败"):
+        """
+        在后台运行耗时任务，同一时间只运行一个
+        
+        func 的签名为 func(ctx, *args)，on_done/on_partial 在主线程回调
+        """
+        if self.current_task is not None and not self.current_task.done:
+            messagebox.showwarning("提示", f"「{self.current_task.name}」正在运行，请等待完成或取消")
+            return None
+        
+        def finish(message):
+            self.current_task = None
+            self.status_var.set(message)
+            self.progress['value'] = 0
+            self.cancel_button.configure(state=tk.DISABLED)
+        
+        def done(result):
+            finish(f"{name}完成")
+            if on_done is not None:
+                on_done(result)
+        
+        def error(exc):
+            finish(f"{name}失败")
+            messagebox.showerror(error_title, f"处理过程中发生错误: {str(exc)}")
+        
+        def progress(done_count, total, message):
+            self.progress['maximum'] = max(total, 1)
+            self.progress['value'] = done_count
+            self.status_var.set(message or f"{name}中... {done_count}/{total}")
+        
+        self.status_var.set(f"{name}中...")
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.current_task = self.task_runner.submit(
+            func, *args, name=name,
+            on_done=done,
+            on_error=error,
+            on_progress=progress,
+            on_partial=on_partial,
+            on_cancelled=lambda: finish(f"{name}已取消")
+        )
+        return self.current_task
+    
+    def cancel_task(self):
+        """取消当前任务"""
+        if self.current_task is not None:
+            self.current_task.cancel()
+            self.status_var.set(f"正在取消「{self.current_task.name}」...")
+    
+    def on_close(self):
+        """关闭窗口：取消后台任务后退出"""
+        self.cancel_task()
+        self.task_runner.shutdown(wait=False)
+        self.trend_chart.close()
+        self.root.destroy()
+    
     def create_analysis_tab(self):
         """创建单品分析选项卡"""
         self.analysis_frame = ttk.Frame(self.notebook)
@@ -122,13 +268,45 @@ class ProfitAnalysisGUI:
         ttk.Button(file_frame, text="选择CSV文件", command=self.select_csv_file).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(file_frame, text="批量计算", command=self.batch_calculate).pack(side=tk.LEFT)
         
+        # 显示范围：大目录只看排名前/后 N 名，完整结果导出到文件
+        view_frame = ttk.Frame(self.batch_frame)
+        view_frame.pack(fill=tk.X, padx=10)
+        
+        ttk.Label(view_frame, text="显示:").pack(side=tk.LEFT)
+        self.batch_view_var = tk.StringVar(value=BATCH_VIEWS[0])
+        view_combo = ttk.Combobox(view_frame, textvariable=self.batch_view_var, values=BATCH_VIEWS,
+                                  state="readonly", width=8)
+        view_combo.pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(view_frame, text="排名指标:").pack(side=tk.LEFT)
+        self.batch_metric_var = tk.StringVar(value=RANKING_METRICS[0])
+        metric_combo = ttk.Combobox(view_frame, textvariable=self.batch_metric_var, values=RANKING_METRICS,
+                                    state="readonly", width=10)
+        metric_combo.pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(view_frame, text="N:").pack(side=tk.LEFT)
+        self.batch_top_n_var = tk.StringVar(value=str(Settings.RANKING_CONFIG["display_n"]))
+        ttk.Spinbox(view_frame, textvariable=self.batch_top_n_var, from_=1, to=BATCH_PAGE_SIZE,
+                    width=6, command=self.apply_batch_view).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Button(view_frame, text="导出全部结果", command=self.export_batch_results).pack(side=tk.RIGHT)
+        view_combo.bind("<<ComboboxSelected>>", self.apply_batch_view)
+        metric_combo.bind("<<ComboboxSelected>>", self.apply_batch_view)
+        
+        # 分页控制
+        page_frame = ttk.Frame(self.batch_frame)
+        page_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 10))
+        
+        ttk.Button(page_frame, text="上一页", command=lambda: self.show_batch_page(self.batch_page - 1)).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(page_frame, text="下一页", command=lambda: self.show_batch_page(self.batch_page + 1)).pack(side=tk.LEFT, padx=(0, 10))
+        self.batch_page_var = tk.StringVar(value="")
+        ttk.Label(page_frame, textvariable=self.batch_page_var).pack(side=tk.LEFT)
+        
         # 结果显示区域
-        self.batch_tree = ttk.Treeview(self.batch_frame, columns=("型号", "售价", "利润", "利润率", "退款率"), show="headings")
+        self.batch_tree = ttk.Treeview(self.batch_frame, columns=("型号", "售价", "利润", "利润率", "退款率", "风险"), show="headings")
         self.batch_tree.heading("型号", text="商品型号")
         self.batch_tree.heading("售价", text="售价")
         self.batch_tree.heading("利润", text="总利润")
         self.batch_tree.heading("利润率", text="利润率(%)")
         self.batch_tree.heading("退款率", text="退款率(%)")
+        self.batch_tree.heading("风险", text="风险提示")
         
         self.batch_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
@@ -209,6 +387,7 @@ class ProfitAnalysisGUI:
         # 图表显示区域
         self.trend_canvas_frame = ttk.Frame(self.trend_frame)
         self.trend_canvas_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.trend_chart = TrendChart(self.trend_canvas_frame)
         
     def calculate_profit(self):
         """计算利润"""
@@ -342,73 +521,164 @@ class ProfitAnalysisGUI:
             self.file_path_var.set(filename)
     
     def batch_calculate(self):
-        """批量计算"""
+        """批量计算（后台线程计算并格式化，结果分页、分块填入表格）"""
         file_path = self.file_path_var.get()
         if not file_path:
             messagebox.showwarning("提示", "请先选择CSV文件")
             return
         
-        try:
-            # 读取CSV文件
-            df = pd.read_csv(file_path)
-            
-            # 清空现有结果
-            for item in self.batch_tree.get_children():
-                self.batch_tree.delete(item)
-            
-            # 批量计算
-            for idx, row in df.iterrows():
-                input_data = ProfitInput(
-                    model_name=row.get('model_name', f'SKU-{idx}'),
-                    price=row.get('price', 0),
-                    cost=row.get('cost', 0),
-                    other_cost=row.get('other_cost', 0),
-                    shipping_fee=row.get('shipping_fee', 0),
-                    commission_rate=row.get('commission_rate', 0) / 100 if row.get('commission_rate', 0) > 1 else row.get('commission_rate', 0),
-                    sales_volume=row.get('sales_volume', 100),
-                    return_quantity=row.get('return_quantity', 10),
-                    deal_orders=row.get('deal_orders', 95),
-                    net_deal_orders=row.get('net_deal_orders', 85),
-                    post_shipping_refund_ratio=0.0,
-                    ad_deal_price=row.get('ad_deal_price', 0),
-                    ad_enabled=row.get('ad_enabled', False)
-                )
-                
-                result = calculate_profit(input_data, 100)
-                
-                # 添加到表格
-                self.batch_tree.insert("", tk.END, values=(
-                    result['商品型号'],
-                    f"{input_data.price:.2f}",
-                    f"{result['总利润']:.2f}",
-                    f"{result['利润率']:.2f}",
-                    f"{result['退款率']:.2f}"
-                ))
-            
-            messagebox.showinfo("成功", f"批量计算完成，处理了 {len(df)} 条记录")
-            
-        except Exception as e:
-            messagebox.showerror("批量计算失败", f"处理过程中发生错误: {str(e)}")
+        self.run_task(
+            "批量计算", self._batch_worker, file_path,
+            on_done=self._show_batch_results,
+            error_title="批量计算失败"
+        )
     
-    def refresh_history(self):
-        """刷新历史记录"""
-        # 清空现有记录
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
+    @classmethod
+    def _batch_worker(cls, ctx, file_path):
+        """工作线程：读取CSV → 向量化计算 → 批量格式化为表格行"""
+        ctx.report_progress(0, 3, "正在读取CSV...")
+        df = pd.read_csv(file_path)
+        ctx.check_cancelled()
+        
+        ctx.report_progress(1, 3, f"正在计算 {len(df)} 条记录...")
+        parsed = parse_inputs(df)
+        inputs = parsed.frame
+        results = calculate_profit_frame(inputs, 100)
+        flags = screen_inputs(inputs, results).flags()
+        ctx.check_cancelled()
+        
+        ctx.report_progress(2, 3, "正在整理结果...")
+        risk = flags[ERROR_FLAG_COLUMN].where(
+            flags[WARNING_FLAG_COLUMN] == '',
+            (flags[ERROR_FLAG_COLUMN] + '；' + flags[WARNING_FLAG_COLUMN]).str.strip('；')
+        )
+        rows = list(zip(
+            results['商品型号'],
+            inputs['price'].map('{:.2f}'.format),
+            results['总利润'].map('{:.2f}'.format),
+            results['利润率'].map('{:.2f}'.format),
+            results['退款率'].map('{:.2f}'.format),
+            risk,
+        ))
+        # 排名指标与 rows 按位置对齐；带风险标记的结果表供导出使用
+        return rows, parsed.errors, ranking_metrics(results), attach_dimensions(results, inputs).join(flags), inputs
+    
+    def _show_batch_results(self, output):
+        """主线程：保存全部结果并按当前显示范围显示第一页"""
+        rows, errors, metrics, results, inputs = output
+        self.batch_all_rows = rows
+        self.batch_metrics = metrics
+        self.batch_export = (results, inputs)
+        self.apply_batch_view()
+        message = f"批量计算完成，处理了 {len(rows)} 条记录"
+        if len(errors):
+            # CSV 第1行为表头，数据行号 = 索引 + 2
+            details = "\n".join(
+                f"第{row + 2}行 {column}={value!r}: {error}"
+                for row, column, value, error in errors.head(10).itertuples(index=False)
+            )
+            more = f"\n... 共 {len(errors)} 处错误" if len(errors) > 10 else ""
+            messagebox.showwarning("部分数据有误", f"{message}，跳过 {errors['行'].nunique()} 行有误数据：\n{details}{more}")
+        else:
+            messagebox.showinfo("成功", message)
+    
+    def apply_batch_view(self, event=None):
+        """按显示范围筛选行：前/后 N 名用 argpartition 选取，不对全部结果排序"""
+        view = self.batch_view_var.get()
+        if view == BATCH_VIEWS[0] or self.batch_metrics is None:
+            self.batch_rows = self.batch_all_rows
+        else:
+            try:
+                top_n = max(int(self.batch_top_n_var.get()), 1)
+            except ValueError:
+                top_n = Settings.RANKING_CONFIG["display_n"]
+            values = self.batch_metrics[self.batch_metric_var.get()].to_numpy()
+            indices = top_k_indices(values, top_n, largest=view == BATCH_VIEWS[1])
+            self.batch_rows = [self.batch_all_rows[i] for i in indices]
+        self.show_batch_page(0)
+    
+    def export_batch_results(self):
+        """把全部批量结果（含计算公式和风险标记）在后台写入Excel"""
+        if self.batch_export is None:
+            messagebox.showwarning("提示", "请先进行批量计算")
+            return
         
-        # 加载历史记录
+        filename = filedialog.asksaveasfilename(
+            title="导出批量结果",
+            defaultextension=".xlsx",
+            initialfile=f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            filetypes=[("Excel files", "*.xlsx")]
+        )
+        if not filename:
+            return
+        
+        results, inputs = self.batch_export
+        self.run_task(
+            "导出批量结果",
+            lambda ctx: export_batch_to_excel(results, filename, inputs=inputs),
+            on_done=lambda written: messagebox.showinfo("导出成功", f"批量结果已导出: {written['xlsx']}"),
+            error_title="导出失败"
+        )
+    
+    def show_batch_page(self, page):
+        """显示指定页：清空表格后用 after() 分块插入，避免一次性重绘卡顿"""
+        page_count = max(1, -(-len(self.batch_rows) // BATCH_PAGE_SIZE))
+        page = min(max(page, 0), page_count - 1)
+        self.batch_page = page
+        
+        if self._batch_insert_job is not None:
+            self.root.after_cancel(self._batch_insert_job)
+            self._batch_insert_job = None
+        self.batch_tree.delete(*self.batch_tree.get_children())
+        
+        start = page * BATCH_PAGE_SIZE
+        page_rows = self.batch_rows[start:start + BATCH_PAGE_SIZE]
+        self.batch_page_var.set(f"第 {page + 1}/{page_count} 页，共 {len(self.batch_rows)} 条")
+        self._insert_batch_chunk(page_rows, 0)
+    
+    def _insert_batch_chunk(self, rows, offset):
+        """插入一块行，剩余部分交给下一次 after()"""
+        insert = self.batch_tree.insert
+        for values in rows[offset:offset + BATCH_INSERT_CHUNK]:
+            insert("", tk.END, values=values)
+        
+        offset += BATCH_INSERT_CHUNK
+        if offset < len(rows):
+            self._batch_insert_job = self.root.after(1, self._insert_batch_chunk, rows, offset)
+        else:
+            self._batch_insert_job = None
+    
+    def refresh_history(self):
+        """刷新历史记录（后台加载）"""
+        self.run_task("加载历史记录", self._history_rows_worker,
+                      on_done=self._fill_history_tree, error_title="加载失败")
+    
+    @staticmethod
+    def _history_rows_worker(ctx):
+        """工作线程：加载历史记录并格式化最近50条"""
         history = history_manager.load_history()
+        ctx.check_cancelled()
         
-        # 显示最近的记录
+        rows = []
         for record in reversed(history[-50:]):  # 显示最近50条
             result = record['result']
-            self.history_tree.insert("", tk.END, values=(
+            rows.append((
                 record['analysis_id'],
                 record['timestamp'][:19].replace('T', ' '),
                 result.get('商品型号', 'N/A'),
                 f"{result['总利润']:.2f}",
                 f"{result['利润率']:.2f}"
             ))
+        return rows
+    
+    def _fill_history_tree(self, rows):
+        """主线程：用格式化好的行替换历史记录表格"""
+        # 清空现有记录
+        for item in self.history_tree.get_children():
+            self.history_tree.delete(item)
+        
+        for values in rows:
+            self.history_tree.insert("", tk.END, values=values)
     
     def search_history(self):
         """搜索历史记录"""
@@ -521,12 +791,12 @@ class ProfitAnalysisGUI:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
     
     def export_history(self):
-        """导出历史记录"""
-        try:
-            filename = history_manager.export_history_to_excel()
-            messagebox.showinfo("导出成功", f"历史记录已导出: {filename}")
-        except Exception as e:
-            messagebox.showerror("导出失败", f"导出过程中发生错误: {str(e)}")
+        """导出历史记录（后台执行）"""
+        self.run_task(
+            "导出历史记录", lambda ctx: history_manager.export_history_to_excel(),
+            on_done=lambda filename: messagebox.showinfo("导出成功", f"历史记录已导出: {filename}"),
+            error_title="导出失败"
+        )
     
     def clear_history(self):
         """清空历史记录"""
@@ -550,6 +820,9 @@ class ProfitAnalysisGUI:
             if min_price >= max_price:
                 messagebox.showerror("参数错误", "最低价格必须小于最高价格")
                 return
+            if step <= 0:
+                messagebox.showerror("参数错误", "价格步长必须大于0")
+                return
             
             # 获取基础参数（使用单品分析的参数）
             base_input = ProfitInput(
@@ -568,67 +841,64 @@ class ProfitAnalysisGUI:
                 ad_enabled=self.ad_enabled_var.get()
             )
             
-            # 计算趋势数据
-            prices = []
-            profits = []
-            
-            current_price = min_price
-            while current_price <= max_price:
-                test_input = ProfitInput(
-                    model_name=base_input.model_name,
-                    price=current_price,
-                    cost=base_input.cost,
-                    other_cost=base_input.other_cost,
-                    shipping_fee=base_input.shipping_fee,
-                    commission_rate=base_input.commission_rate,
-                    sales_volume=base_input.sales_volume,
-                    return_quantity=base_input.return_quantity,
-                    deal_orders=base_input.deal_orders,
-                    net_deal_orders=base_input.net_deal_orders,
-                    post_shipping_refund_ratio=base_input.post_shipping_refund_ratio,
-                    ad_deal_price=base_input.ad_deal_price,
-                    ad_enabled=base_input.ad_enabled
-                )
-                
-                result = calculate_profit(test_input, int(self.entries['order_count'].get()))
-                prices.append(current_price)
-                profits.append(result['总利润'])
-                current_price += step
-            
-            # 绘制图表
-            self.plot_trend(prices, profits)
-            
+            order_count = int(self.entries['order_count'].get())
         except ValueError:
             messagebox.showerror("输入错误", "请检查趋势参数输入是否正确")
-        except Exception as e:
-            messagebox.showerror("生成失败", f"生成趋势图时发生错误: {str(e)}")
+            return
+        
+        # 控件值已在主线程读取，计算交给后台线程
+        self.run_task(
+            "生成趋势图", self._trend_worker, base_input, min_price, max_price, step, order_count,
+            on_done=lambda data: self.plot_trend(*data),
+            error_title="生成失败"
+        )
+    
+    @staticmethod
+    def _trend_worker(ctx, base_input, min_price, max_price, step, order_count):
+        """工作线程：计算各价格点的利润"""
+        total = int((max_price - min_price) / step) + 1
+        prices = []
+        profits = []
+        
+        current_price = min_price
+        while current_price <= max_price:
+            ctx.check_cancelled()
+            test_input = ProfitInput(
+                model_name=base_input.model_name,
+                price=current_price,
+                cost=base_input.cost,
+                other_cost=base_input.other_cost,
+                shipping_fee=base_input.shipping_fee,
+                commission_rate=base_input.commission_rate,
+                sales_volume=base_input.sales_volume,
+                return_quantity=base_input.return_quantity,
+                deal_orders=base_input.deal_orders,
+                net_deal_orders=base_input.net_deal_orders,
+                post_shipping_refund_ratio=base_input.post_shipping_refund_ratio,
+                ad_deal_price=base_input.ad_deal_price,
+                ad_enabled=base_input.ad_enabled
+            )
+            
+            result = calculate_profit(test_input, order_count)
+            prices.append(current_price)
+            profits.append(result['总利润'])
+            current_price += step
+            
+            if len(prices) % 1000 == 0:
+                ctx.report_progress(len(prices), total)
+        
+        return prices, profits
     
     def plot_trend(self, prices, profits):
-        """绘制趋势图"""
-        # 清除之前的图表
-        for widget in self.trend_canvas_frame.winfo_children():
-            widget.destroy()
-        
-        # 创建图表
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(prices, profits, marker='o', linewidth=2, markersize=4)
-        ax.set_xlabel('售价 (元)')
-        ax.set_ylabel('利润 (元)')
-        ax.set_title('不同售价下的利润变化趋势')
-        ax.grid(True, alpha=0.3)
-        
-        # 添加到GUI
-        canvas = FigureCanvasTkAgg(fig, self.trend_canvas_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        plt.tight_layout()
+        """绘制趋势图（复用常驻图表，仅更新数据）"""
+        self.trend_chart.update(prices, profits)
 
 
 def main():
     """主函数"""
     root = tk.Tk()
     app = ProfitAnalysisGUI(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
     
     # 加载历史记录
     app.refresh_history()
@@ -8,7 +8,7 @@ import sys
 import argparse
 from src.input_module import collect_user_input
 from src.calculation_engine import calculate_profit
-from src.output_module import print_profit_report, plot_cost_breakdown
+from src.output_module import print_profit_report, plot_cost_breakdown, save_cost_breakdown_charts
 from src.history_manager import history_manager
 
 def main():
@@ -24,6 +24,10 @@ def main():
                        help='查看历史记录')
     parser.add_argument('--save-history', action='store_true', default=True,
                        help='保存分析到历史记录 (默认: True)')
+    parser.add_argument('--maintain', action='store_true',
+                       help='执行历史记录维护（按月归档、保留策略、压缩）后退出')
+    parser.add_argument('--chart', choices=['show', 'png', 'svg', 'none'], default='show',
+                       help='成本构成图: show(弹出窗口) / png、svg(保存到输出目录，无需图形界面) / none(不生成)')
     
     args = parser.parse_args()
     
@@ -37,6 +41,11 @@ def main():
         show_history_menu()
         return
     
+    if args.maintain:
+        from src.history_maintenance import main as maintenance_main
+        maintenance_main([])
+        return
+    
     print("=" * 50)
     print("💰 拼多多利润计算软件")
     print("=" * 50)
@@ -75,8 +84,12 @@ def main():
             filename = export_to_excel(result)
             print(f"\n📥 Excel报告已导出: {filename}")
         
-        print("\n🎨 正在生成成本构成图表...")
-        plot_cost_breakdown(result['成本构成'])
+        if args.chart == 'show':
+            print("\n🎨 正在生成成本构成图表...")
+            plot_cost_breakdown(result['成本构成'])
+        elif args.chart != 'none':
+            filename, = save_cost_breakdown_charts([result], fmt=args.chart)
+            print(f"\n🎨 成本构成图已保存: {filename}")
         
     except KeyboardInterrupt:
         print("\n\n👋 程序已退出")
@@ -0,0 +1,152 @@
+"""
+广告预算分配 - 在多个商品之间分配每日广告预算
+
+每个商品的每笔广告成交花费"出价"，带来"保本广告出价"（扣除扣点和各项成本后的
+单笔毛利）的收益，单笔净利润 = 保本广告出价 - 出价。各商品可承接的广告成交数有上限，
+问题即分数背包：按每元预算的净利润从高到低依次分配，直到预算用完。这也是对应
+线性规划的最优解。全部以数组运算完成，10万个商品也只需一次排序。
+
+suggest_ad_bids 是 Settings.get_ad_cost_suggestion 的批量版本：整个目录一次算出
+保守/适中/激进三档出价，并与各商品的保本广告出价比较给出建议出价。
+"""
+
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Settings
+from .batch_engine import safe_divide
+
+# 分配状态
+ALLOCATED = '已分配'
+PARTIAL = '部分分配'
+OUT_OF_BUDGET = '预算不足'
+ABOVE_BREAK_EVEN = '出价不低于保本出价'
+NO_MARGIN = '无利润空间'
+NO_CAPACITY = '无可承接单量'
+
+# 出价建议档位名称（键同 AD_SUGGESTION_CONFIG["tiers"]）
+TIER_LABELS = {'conservative': '保守', 'moderate': '适中', 'aggressive': '激进'}
+NOT_RECOMMENDED = '不建议投放'
+
+
+def allocate_ad_budget(results: pd.DataFrame, budget: float,
+                       capacity: Union[float, np.ndarray, pd.Series] = None,
+                       bid_ratio: float = None) -> pd.DataFrame:
+    """
+    按预算生成各商品的广告出价计划
+
+    Args:
+        results: calculate_profit_frame 的结果（使用 保本广告出价、每单广告出价、商品型号）
+        budget: 总广告预算（元）
+        capacity: 每个商品可承接的广告成交单数，标量或与 results 对齐的数组；
+            默认 AD_BUDGET_CONFIG["default_order_capacity"]
+        bid_ratio: 未设置出价（每单广告出价为0）的商品，建议出价 = 保本广告出价 × bid_ratio
+
+    Returns:
+        出价计划，索引与 results 一致，按每元净利润从高到低排在前面的先获得预算
+    """
+    config = Settings.AD_BUDGET_CONFIG
+    if budget < 0:
+        raise ValueError("广告预算不能为负数")
+    if capacity is None:
+        capacity = config["default_order_capacity"]
+    if bid_ratio is None:
+        bid_ratio = config["default_bid_ratio"]
+
+    count = len(results)
+    break_even_bid = results['保本广告出价'].to_numpy(dtype=float)
+    current_bid = results['每单广告出价'].to_numpy(dtype=float)
+    bid = np.where(current_bid > 0, current_bid, break_even_bid * bid_ratio)
+    capacity = np.broadcast_to(np.asarray(capacity, dtype=float), (count,))
+
+    margin = break_even_bid - bid
+    eligible = (break_even_bid > 0) & (bid > 0) & (margin > 0) & (capacity > 0)
+    return_per_yuan = np.where(eligible, safe_divide(margin, bid), 0.0)
+    spend_cap = np.where(eligible, bid * capacity, 0.0)
+
+    # 分数背包：按每元净利润降序，累计可花费额，超过预算的部分截断
+    order = np.argsort(-return_per_yuan, kind='stable')
+    spent_before = np.cumsum(spend_cap[order]) - spend_cap[order]
+    allocation = np.empty(count)
+    allocation[order] = np.clip(budget - spent_before, 0, spend_cap[order])
+
+    ad_orders = safe_divide(allocation, bid)
+    status = np.select(
+        [break_even_bid <= 0, margin <= 0, capacity <= 0, allocation >= spend_cap, allocation > 0],
+        [NO_MARGIN, ABOVE_BREAK_EVEN, NO_CAPACITY, ALLOCATED, PARTIAL],
+        default=OUT_OF_BUDGET,
+    )
+
+    return pd.DataFrame({
+        '商品型号': results['商品型号'].to_numpy() if '商品型号' in results.columns else results.index,
+        '保本广告出价': break_even_bid,
+        '建议出价': bid,
+        '单笔净利润': margin,
+        '每元净利润': return_per_yuan,
+        '投放上限': spend_cap,
+        '分配预算': allocation,
+        '预计广告成交': ad_orders,
+        '预计广告利润': ad_orders * margin,
+        '状态': status,
+    }, index=results.index)
+
+
+def plan_summary(plan: pd.DataFrame) -> dict:
+    """出价计划汇总"""
+    return {
+        '分配预算': float(plan['分配预算'].sum()),
+        '预计广告成交': float(plan['预计广告成交'].sum()),
+        '预计广告利润': float(plan['预计广告利润'].sum()),
+        '投放商品数': int((plan['分配预算'] > 0).sum()),
+    }
+
+
+def suggest_ad_bids(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    批量生成广告出价建议
+
+    各档出价 = 售价 × (1 - 扣点) × profit_share × 档位比例（与 get_ad_cost_suggestion 相同），
+    售价和扣点由结果表反推（总收入 / 订单总数、平台扣点 / 总收入），因此按类目补齐或
+    行内填写的扣点都会生效。建议出价取低于保本广告出价的最高一档，没有时不建议投放。
+
+    Args:
+        results: calculate_profit_frame 的结果
+
+    Returns:
+        出价建议表，索引与 results 一致
+    """
+    config = Settings.AD_SUGGESTION_CONFIG
+    revenue = results['总收入'].to_numpy(dtype=float)
+    price = safe_divide(revenue, results['订单总数'])
+    commission_rate = safe_divide(results['平台扣点'], revenue)
+    break_even_bid = results['保本广告出价'].to_numpy(dtype=float)
+
+    tiers = list(config["tiers"])
+    labels = np.array([TIER_LABELS.get(tier, tier) for tier in tiers], dtype=object)
+    ratios = np.array([config["tiers"][tier] for tier in tiers], dtype=float)
+    base = price * (1 - commission_rate) * config["profit_share"]
+    # 每行一个商品、每列一档出价
+    bids = base[:, None] * ratios
+
+    # 出价随档位比例递增，低于保本出价的档数即可确定可用的最高一档
+    order = np.argsort(ratios, kind='stable')
+    safe_count = (bids[:, order] < break_even_bid[:, None]).sum(axis=1)
+    chosen = order[np.maximum(safe_count - 1, 0)]
+    has_tier = safe_count > 0
+    recommended = np.where(has_tier, base * ratios[chosen], 0.0)
+
+    table = pd.DataFrame({
+        '商品型号': results['商品型号'].to_numpy() if '商品型号' in results.columns else results.index,
+        '售价': price,
+        '扣点率': commission_rate * 100,
+    }, index=results.index)
+    for i, tier in enumerate(tiers):
+        table[f'{TIER_LABELS.get(tier, tier)}出价'] = bids[:, i]
+    table['保本广告出价'] = break_even_bid
+    table['当前出价'] = results['每单广告出价'].to_numpy(dtype=float)
+    table['建议档位'] = np.where(has_tier, labels[chosen], NOT_RECOMMENDED)
+    table['建议出价'] = recommended
+    table['出价空间'] = np.where(has_tier, break_even_bid - recommended, 0.0)
+    return table
@@ -0,0 +1,231 @@
+"""
+批量利润计算引擎 - calculate_profit 的向量化版本
+
+输入为每行一个商品的 DataFrame（列名与 ProfitInput 字段一致，平台扣点为小数），
+所有公式以 numpy 数组一次算完，结果与逐行调用 calculate_profit 一致。
+"""
+
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from .calculation_engine import build_formulas
+from .commission import resolve_commission_rates
+from .shipping import resolve_shipping_fees
+from .input_module import ProfitInput
+
+# 输入列及缺省值（与 ProfitInput 字段一致）
+INPUT_DEFAULTS = {
+    'model_name': '',
+    'price': 0.0,
+    'cost': 0.0,
+    'other_cost': 0.0,
+    'shipping_fee': 0.0,
+    'commission_rate': 0.0,
+    'sales_volume': 0,
+    'return_quantity': 0,
+    'deal_orders': 0,
+    'net_deal_orders': 0,
+    'post_shipping_refund_ratio': 0.0,
+    'ad_deal_price': 0.0,
+    'ad_enabled': False,
+}
+
+# 成本构成中的各项（按 calculate_profit 中的顺序）
+COST_ITEMS = ['商品成本', '运费', '平台扣点', '广告费用', '退款广告损失']
+
+# calculate_profit 结果的键（不含"计算公式"）
+RESULT_KEYS = [
+    '商品型号', '总利润', '单均利润', '利润率', '总收入', '总成本', '成本构成',
+    '保本售价', '保本广告出价', '最高广告投入', '保本ROI', '当前ROI', '订单总数',
+    '销量', '退货数量', '成交订单数', '净成交订单数', '退款率', '秒退率',
+    '广告费用', '广告启用', '每单广告出价',
+]
+
+
+def safe_divide(numerator, denominator) -> np.ndarray:
+    """逐元素相除，分母为0处结果为0"""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    return np.divide(numerator, denominator, out=out, where=denominator != 0)
+
+
+def profit_arrays(price, cost, other_cost, shipping_fee, commission_rate,
+                  ad_deal_price, ad_enabled, refund_rate, order_count) -> Dict[str, np.ndarray]:
+    """
+    利润公式的数组形式（参数可为标量或可广播的数组）
+    
+    公式与 calculate_profit 完全相同；广告未启用时"最高广告投入"、"保本ROI"、
+    "当前ROI"为 NaN（对应单条计算中的 None）。
+    """
+    price = np.asarray(price, dtype=float)
+    commission_rate = np.asarray(commission_rate, dtype=float)
+    ad_deal_price = np.asarray(ad_deal_price, dtype=float)
+    ad_enabled = np.asarray(ad_enabled, dtype=bool)
+    refund_rate = np.asarray(refund_rate, dtype=float)
+    total_orders = np.asarray(order_count, dtype=float)
+    ad_active = ad_enabled & (ad_deal_price > 0)
+    
+    # 收入与成本
+    actual_revenue = total_orders * price
+    total_product_cost = total_orders * (np.add(cost, other_cost))
+    total_shipping_cost = total_orders * np.asarray(shipping_fee, dtype=float)
+    commission = actual_revenue * commission_rate
+    ad_cost = np.where(ad_active, total_orders * ad_deal_price, 0.0)
+    refund_ad_loss = np.where(ad_active, ad_deal_price * refund_rate, 0.0)
+    total_cost = total_product_cost + total_shipping_cost + commission + ad_cost + refund_ad_loss
+    
+    # 利润
+    final_profit = actual_revenue - total_cost
+    profit_per_order = safe_divide(final_profit, total_orders)
+    profit_rate = safe_divide(final_profit, actual_revenue) * 100
+    
+    # 保本分析
+    max_ad_deal_price = np.maximum(0, price * (1 - commission_rate) - cost - other_cost - shipping_fee)
+    unit_cost = np.add(cost, other_cost) + shipping_fee + np.where(ad_enabled, ad_deal_price, 0.0)
+    break_even_price = np.where(1 - commission_rate > 0, safe_divide(unit_cost, 1 - commission_rate), 0.0)
+    max_ad_investment = np.where(ad_enabled, max_ad_deal_price * (1 - refund_rate), np.nan)
+    break_even_roi = np.where(ad_enabled, safe_divide(break_even_price, max_ad_deal_price), np.nan)
+    current_roi = np.where(ad_active, safe_divide(price, ad_deal_price), np.nan)
+    
+    return {
+        '总利润': final_profit,
+        '单均利润': profit_per_order,
+        '利润率': profit_rate,
+        '总收入': actual_revenue,
+        '总成本': total_cost,
+        '商品成本': total_product_cost,
+        '运费': total_shipping_cost,
+        '平台扣点': commission,
+        '广告费用': ad_cost,
+        '退款广告损失': refund_ad_loss,
+        '保本售价': break_even_price,
+        '保本广告出价': max_ad_deal_price,
+        '最高广告投入': max_ad_investment,
+        '保本ROI': break_even_roi,
+        '当前ROI': current_roi,
+        '每单广告出价': np.where(ad_enabled, ad_deal_price, 0.0),
+    }
+
+
+def inputs_to_frame(inputs: List[Union[ProfitInput, Dict]]) -> pd.DataFrame:
+    """把 ProfitInput 或 input_data 字典列表转换为输入 DataFrame"""
+    rows = [vars(item) if isinstance(item, ProfitInput) else item for item in inputs]
+    return pd.DataFrame(rows)
+
+
+def resolve_inputs(inputs: pd.DataFrame) -> pd.DataFrame:
+    """按类目补齐扣点、按重量或运费等级估算运费（均只处理未填写的行）"""
+    return resolve_shipping_fees(resolve_commission_rates(inputs))
+
+
+def complete_frame(inputs: pd.DataFrame) -> pd.DataFrame:
+    """
+    补齐 INPUT_DEFAULTS 中缺少的列和缺失值（其余列原样保留）
+    
+    含 category 列时，未填写的平台扣点先按全局类目扣点表补齐；
+    含 weight / shipping_class 列时，未填写的运费先按全局运费估算器估算。
+    """
+    frame = resolve_inputs(inputs).reindex(columns=list(dict.fromkeys(list(INPUT_DEFAULTS) + list(inputs.columns))))
+    for column, default in INPUT_DEFAULTS.items():
+        if frame[column].isna().any():
+            frame[column] = frame[column].fillna(default)
+    return frame
+
+
+def refund_rates(frame: pd.DataFrame):
+    """
+    计算退款率和秒退率（小数数组）
+    
+    默认按数量计算；输入含 refund_rate / instant_refund_rate 列时，
+    其中的非空值优先。frame 需已经过 complete_frame 补齐。
+    """
+    sales_volume = frame['sales_volume'].to_numpy(dtype=float)
+    return_quantity = frame['return_quantity'].to_numpy(dtype=float)
+    deal_orders = frame['deal_orders'].to_numpy(dtype=float)
+    net_deal_orders = frame['net_deal_orders'].to_numpy(dtype=float)
+    refund_rate = safe_divide(return_quantity, np.where(sales_volume > 0, sales_volume, 0))
+    instant_refund_rate = safe_divide(deal_orders - net_deal_orders, np.where(deal_orders > 0, deal_orders, 0))
+    if 'refund_rate' in frame.columns:
+        refund_rate = frame['refund_rate'].fillna(pd.Series(refund_rate, index=frame.index)).to_numpy(dtype=float)
+    if 'instant_refund_rate' in frame.columns:
+        instant_refund_rate = frame['instant_refund_rate'].fillna(
+            pd.Series(instant_refund_rate, index=frame.index)).to_numpy(dtype=float)
+    return refund_rate, instant_refund_rate
+
+
+def calculate_profit_frame(inputs: pd.DataFrame, order_count=100) -> pd.DataFrame:
+    """
+    向量化批量计算利润
+    
+    Args:
+        inputs: 输入数据，缺少的列按 INPUT_DEFAULTS 补齐
+        order_count: 分析订单数，可为标量；输入含 analysis_orders 列时按行取值
+        
+    Returns:
+        每行一个商品的结果表，列名与 calculate_profit 结果的键一致，
+        成本构成各项展开为独立列
+    """
+    frame = complete_frame(inputs)
+    if 'analysis_orders' in frame.columns:
+        order_count = frame['analysis_orders'].fillna(order_count).to_numpy()
+    
+    refund_rate, instant_refund_rate = refund_rates(frame)
+    ad_enabled = frame['ad_enabled'].to_numpy(dtype=bool)
+    
+    arrays = profit_arrays(
+        price=frame['price'].to_numpy(dtype=float),
+        cost=frame['cost'].to_numpy(dtype=float),
+        other_cost=frame['other_cost'].to_numpy(dtype=float),
+        shipping_fee=frame['shipping_fee'].to_numpy(dtype=float),
+        commission_rate=frame['commission_rate'].to_numpy(dtype=float),
+        ad_deal_price=frame['ad_deal_price'].to_numpy(dtype=float),
+        ad_enabled=ad_enabled,
+        refund_rate=refund_rate,
+        order_count=order_count,
+    )
+    
+    result = pd.DataFrame({'商品型号': frame['model_name'].astype(str).to_numpy()}, index=frame.index)
+    for key, values in arrays.items():
+        result[key] = np.broadcast_to(values, len(frame))
+    result['订单总数'] = np.broadcast_to(np.asarray(order_count), len(frame))
+    result['销量'] = frame['sales_volume'].to_numpy()
+    result['退货数量'] = frame['return_quantity'].to_numpy()
+    result['成交订单数'] = frame['deal_orders'].to_numpy()
+    result['净成交订单数'] = frame['net_deal_orders'].to_numpy()
+    result['退款率'] = refund_rate * 100
+    result['秒退率'] = instant_refund_rate * 100
+    result['广告启用'] = ad_enabled
+    return result
+
+
+def frame_to_results(results: pd.DataFrame, inputs: pd.DataFrame = None) -> List[Dict]:
+    """
+    把 calculate_profit_frame 的结果表还原为 calculate_profit 格式的字典列表
+    
+    Args:
+        results: 批量计算结果
+        inputs: 对应的输入表；提供时同时生成"计算公式"
+    """
+    records = results.to_dict('records')
+    input_rows = resolve_inputs(inputs).to_dict('records') if inputs is not None else None
+    
+    output = []
+    for i, row in enumerate(records):
+        cost_breakdown = {item: row[item] for item in COST_ITEMS}
+        for item in ('广告费用', '退款广告损失'):
+            if not cost_breakdown[item] > 0:
+                del cost_breakdown[item]
+        row['成本构成'] = cost_breakdown
+        row['广告启用'] = bool(row['广告启用'])
+        for key in ('最高广告投入', '保本ROI', '当前ROI'):
+            if pd.isna(row[key]):
+                row[key] = None
+        
+        result = {key: row[key] for key in RESULT_KEYS}
+        if input_rows is not None:
+            result['计算公式'] = build_formulas(ProfitInput.from_dict(input_rows[i]), result)
+        output.append(result)
+    return output
@@ -1,6 +1,9 @@
 from typing import Dict
 from .input_module import ProfitInput
 
+# 计算公式版本：公式变化时递增，历史记录据此判断是否需要重新计算
+ENGINE_VERSION = "1.0"
+
 def calculate_profit(inputs: ProfitInput, order_count: int = 100) -> Dict:
     """
     拼多多利润计算引擎 - 基于净成交广告出价的版本
@@ -131,7 +134,7 @@ def calculate_profit(inputs: ProfitInput, order_count: int = 100) -> Dict:
     if refund_ad_loss > 0:
         cost_breakdown['退款广告损失'] = refund_ad_loss
 
-    return {
+    result = {
         '商品型号': inputs.model_name,
         '总利润': final_profit,
         '单均利润': profit_per_order,
@@ -153,38 +156,71 @@ def calculate_profit(inputs: ProfitInput, order_count: int = 100) -> Dict:
         '秒退率': instant_refund_rate * 100,  # 转换为百分比显示
         '广告费用': ad_cost,
         '广告启用': inputs.ad_enabled,
-        '每单广告出价': inputs.ad_deal_price if inputs.ad_enabled else 0,
-        # 添加计算公式说明
-        '计算公式': {
-            '订单分析': {
-                '销量': f'{sales_volume}',
-                '退货数量': f'{return_quantity}',
-                '成交订单数': f'{deal_orders}',
-                '净成交订单数': f'{net_deal_orders}',
-                '退款率': f'{return_quantity} ÷ {sales_volume} × 100% = {refund_rate * 100:.2f}%',
-                '秒退率': f'({deal_orders} - {net_deal_orders}) ÷ {deal_orders} × 100% = {instant_refund_rate * 100:.2f}%'
-            },
-            '收入计算': {
-                '实际收入': f'{total_orders} × {inputs.price} = {actual_revenue:.2f}'
-            },
-            '成本计算': {
-                '商品成本': f'{total_orders} × ({inputs.cost} + {inputs.other_cost}) = {total_product_cost:.2f}',
-                '运费成本': f'{total_orders} × {inputs.shipping_fee} = {total_shipping_cost:.2f}',
-                '平台扣点': f'{actual_revenue:.2f} × {inputs.commission_rate} = {commission:.2f}',
-                '广告费用': f'{total_orders} × {inputs.ad_deal_price} = {ad_cost:.2f}' if inputs.ad_enabled else '未启用广告',
-                '退款广告损失': f'{inputs.ad_deal_price} × {refund_rate:.2%} = {refund_ad_loss:.2f}' if inputs.ad_enabled else '未启用广告',
-                '总成本': f'{total_product_cost:.2f} + {total_shipping_cost:.2f} + {commission:.2f} + {ad_cost:.2f} + {refund_ad_loss:.2f} = {total_cost:.2f}'
-            },
-            '利润计算': {
-                '总利润': f'{actual_revenue:.2f} - {total_cost:.2f} = {final_profit:.2f}',
-                '利润率': f'({final_profit:.2f} ÷ {actual_revenue:.2f}) × 100% = {profit_rate:.2f}%'
-            },
-            '保本分析': {
-                '保本售价': f'({inputs.cost} + {inputs.other_cost} + {inputs.shipping_fee} + {inputs.ad_deal_price if inputs.ad_enabled else 0:.2f}) ÷ (1 - {inputs.commission_rate}) = {break_even_price:.2f}',
-                '保本广告出价': f'{inputs.price} × (1 - {inputs.commission_rate}) - {inputs.cost} - {inputs.other_cost} - {inputs.shipping_fee} = {max_ad_deal_price:.2f}' if max_ad_deal_price is not None else '未启用广告',
-                '最高广告投入': f'{max_ad_deal_price:.2f} × (1 - {refund_rate:.2%}) = {max_ad_investment:.2f}' if max_ad_investment is not None else '未启用广告',
-                '保本ROI': f'{break_even_price:.2f} ÷ {max_ad_deal_price:.2f} = {break_even_roi:.2f}' if break_even_roi is not None else '未启用广告',
-                '当前ROI': f'{inputs.price} ÷ {inputs.ad_deal_price} = {current_roi:.2f}' if current_roi is not None else '未启用广告'
-            }
+        '每单广告出价': inputs.ad_deal_price if inputs.ad_enabled else 0
+    }
+    result['计算公式'] = build_formulas(inputs, result)
+    return result
+
+
+def build_formulas(inputs: ProfitInput, result: Dict) -> Dict:
+    """
+    根据输入参数和数值结果生成计算公式说明
+    
+    公式字符串完全由输入和数值结果决定，历史记录可以只保存数值结果，
+    需要展示时再调用本函数重新生成。
+    """
+    total_orders = result['订单总数']
+    sales_volume = result['销量']
+    return_quantity = result['退货数量']
+    deal_orders = result['成交订单数']
+    net_deal_orders = result['净成交订单数']
+    refund_rate = result['退款率'] / 100
+    instant_refund_rate = result['秒退率'] / 100
+    actual_revenue = result['总收入']
+    total_cost = result['总成本']
+    final_profit = result['总利润']
+    profit_rate = result['利润率']
+    cost_breakdown = result['成本构成']
+    total_product_cost = cost_breakdown.get('商品成本', 0.0)
+    total_shipping_cost = cost_breakdown.get('运费', 0.0)
+    commission = cost_breakdown.get('平台扣点', 0.0)
+    ad_cost = result['广告费用']
+    refund_ad_loss = cost_breakdown.get('退款广告损失', 0.0)
+    break_even_price = result['保本售价']
+    max_ad_deal_price = result['保本广告出价']
+    max_ad_investment = result['最高广告投入']
+    break_even_roi = result['保本ROI']
+    current_roi = result['当前ROI']
+    
+    return {
+        '订单分析': {
+            '销量': f'{sales_volume}',
+            '退货数量': f'{return_quantity}',
+            '成交订单数': f'{deal_orders}',
+            '净成交订单数': f'{net_deal_orders}',
+            '退款率': f'{return_quantity} ÷ {sales_volume} × 100% = {refund_rate * 100:.2f}%',
+            '秒退率': f'({deal_orders} - {net_deal_orders}) ÷ {deal_orders} × 100% = {instant_refund_rate * 100:.2f}%'
+        },
+        '收入计算': {
+            '实际收入': f'{total_orders} × {inputs.price} = {actual_revenue:.2f}'
+        },
+        '成本计算': {
+            '商品成本': f'{total_orders} × ({inputs.cost} + {inputs.other_cost}) = {total_product_cost:.2f}',
+            '运费成本': f'{total_orders} × {inputs.shipping_fee} = {total_shipping_cost:.2f}',
+            '平台扣点': f'{actual_revenue:.2f} × {inputs.commission_rate} = {commission:.2f}',
+            '广告费用': f'{total_orders} × {inputs.ad_deal_price} = {ad_cost:.2f}' if inputs.ad_enabled else '未启用广告',
+            '退款广告损失': f'{inputs.ad_deal_price} × {refund_rate:.2%} = {refund_ad_loss:.2f}' if inputs.ad_enabled else '未启用广告',
+            '总成本': f'{total_product_cost:.2f} + {total_shipping_cost:.2f} + {commission:.2f} + {ad_cost:.2f} + {refund_ad_loss:.2f} = {total_cost:.2f}'
+        },
+        '利润计算': {
+            '总利润': f'{actual_revenue:.2f} - {total_cost:.2f} = {final_profit:.2f}',
+            '利润率': f'({final_profit:.2f} ÷ {actual_revenue:.2f}) × 100% = {profit_rate:.2f}%'
+        },
+        '保本分析': {
+            '保本售价': f'({inputs.cost} + {inputs.other_cost} + {inputs.shipping_fee} + {inputs.ad_deal_price if inputs.ad_enabled else 0:.2f}) ÷ (1 - {inputs.commission_rate}) = {break_even_price:.2f}',
+            '保本广告出价': f'{inputs.price} × (1 - {inputs.commission_rate}) - {inputs.cost} - {inputs.other_cost} - {inputs.shipping_fee} = {max_ad_deal_price:.2f}' if max_ad_deal_price is not None else '未启用广告',
+            '最高广告投入': f'{max_ad_deal_price:.2f} × (1 - {refund_rate:.2%}) = {max_ad_investment:.2f}' if max_ad_investment is not None else '未启用广告',
+            '保本ROI': f'{break_even_price:.2f} ÷ {max_ad_deal_price:.2f} = {break_even_roi:.2f}' if break_even_roi is not None else '未启用广告',
+            '当前ROI': f'{inputs.price} ÷ {inputs.ad_deal_price} = {current_roi:.2f}' if current_roi is not None else '未启用广告'
         }
-    } 
\ No newline at end of file
+    }
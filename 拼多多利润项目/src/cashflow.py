@@ -0,0 +1,181 @@
+"""
+现金流预测 - 按天模拟全部商品的回款、退款、履约成本和广告支出
+
+calculate_profit 给出的是静态利润；这里把同样的单均金额（profit_arrays，订单数取1）
+放到时间轴上：每个商品每天的订单数组成"商品 × 天"数组，各项现金按发生的时间
+整体平移后相加，再沿天数累加得到累计现金。商品按批处理以限制内存。
+
+现金发生时间（第 t 天下单）：
+    - 履约成本（商品成本 + 其他成本 + 运费）、广告支出：第 t 天支付，秒退订单不发货，不计履约成本
+    - 回款（售价 - 平台扣点，不含秒退订单）：第 t + 回款周期 天到账
+    - 发货后退款（回款 × 退款率）：第 t + 退款时间 天扣除；早于回款时从待结算货款中扣除，
+      即与回款同一天
+"""
+
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Settings
+from .batch_engine import complete_frame, profit_arrays, refund_rates
+
+# 每日现金流的各项（回款为流入，其余为流出）
+FLOW_ITEMS = ['回款', '退款', '履约成本', '广告支出']
+
+DAILY_COLUMNS = ['订单数'] + FLOW_ITEMS + ['净现金流', '累计现金']
+
+SKU_COLUMNS = ['商品型号', '日均订单', '单均净现金', '期末现金', '期末待回款', '最低现金', '最低现金日', '回本日']
+
+
+@dataclass
+class CashflowProjection:
+    """
+    现金流预测结果
+
+    daily: 以天数（1 起）为索引的全目录每日现金流，累计现金含期初现金
+    skus: 每个商品一行，现金均不含期初现金；回本日为累计现金此后不再为负的第一天，
+          期末仍为负时为 NaN
+    receivable: 期末已下单但尚未结算的货款（已扣除其中的退款）
+    """
+    daily: pd.DataFrame
+    skus: pd.DataFrame
+    receivable: float
+
+
+def unit_cash_flows(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    每个商品每单的各项现金（与 calculate_profit 使用相同的公式）
+
+    Args:
+        frame: 已经过 complete_frame 补齐的输入表
+    """
+    refund_rate, instant_refund_rate = refund_rates(frame)
+    per_order = profit_arrays(
+        price=frame['price'].to_numpy(dtype=float),
+        cost=frame['cost'].to_numpy(dtype=float),
+        other_cost=frame['other_cost'].to_numpy(dtype=float),
+        shipping_fee=frame['shipping_fee'].to_numpy(dtype=float),
+        commission_rate=frame['commission_rate'].to_numpy(dtype=float),
+        ad_deal_price=frame['ad_deal_price'].to_numpy(dtype=float),
+        ad_enabled=frame['ad_enabled'].to_numpy(dtype=bool),
+        refund_rate=refund_rate,
+        order_count=1,
+    )
+    shipped = 1 - instant_refund_rate
+    settlement = (per_order['总收入'] - per_order['平台扣点']) * shipped
+    return {
+        '回款': settlement,
+        '退款': settlement * refund_rate,
+        '履约成本': (per_order['商品成本'] + per_order['运费']) * shipped,
+        '广告支出': per_order['广告费用'] + per_order['退款广告损失'],
+    }
+
+
+def daily_order_rates(frame: pd.DataFrame, sales_period_days: int = None) -> np.ndarray:
+    """日均订单数：优先取 daily_orders 列，否则按销量 / 销售天数折算"""
+    sales_period_days = sales_period_days or Settings.CASHFLOW_CONFIG["sales_period_days"]
+    rates = frame['sales_volume'].to_numpy(dtype=float) / sales_period_days
+    if 'daily_orders' in frame.columns:
+        given = frame['daily_orders'].to_numpy(dtype=float, na_value=np.nan)
+        rates = np.where(np.isnan(given), rates, given)
+    return rates
+
+
+def _shift_add(target: np.ndarray, values: np.ndarray, lag: int):
+    """把 values 沿最后一维（天）推迟 lag 天后加到 target，超出预测期的部分丢弃"""
+    days = target.shape[-1]
+    if lag < days:
+        target[..., lag:] += values[..., :days - lag]
+
+
+def project_cashflow(inputs: pd.DataFrame, horizon_days: int = None, settlement_lag_days: int = None,
+                     refund_delay_days: int = None, opening_cash: float = None, demand_curve=None,
+                     chunk_size: int = None) -> CashflowProjection:
+    """
+    逐日预测目录的现金流
+
+    Args:
+        inputs: 批量引擎输入表（可含 daily_orders 列）
+        horizon_days: 预测天数
+        settlement_lag_days: 下单到回款的天数
+        refund_delay_days: 下单到发货后退款的天数
+        opening_cash: 期初现金
+        demand_curve: 每天订单数相对日均订单的倍数，形状为 (天数,) 时全部商品相同，
+                      (商品数, 天数) 时逐商品指定；默认每天相同
+        chunk_size: 每批模拟的商品数
+    """
+    config = Settings.CASHFLOW_CONFIG
+    days = int(horizon_days or config["horizon_days"])
+    settlement_lag = int(config["settlement_lag_days"] if settlement_lag_days is None else settlement_lag_days)
+    refund_delay = int(config["refund_delay_days"] if refund_delay_days is None else refund_delay_days)
+    opening_cash = float(config["opening_cash"] if opening_cash is None else opening_cash)
+    chunk_size = chunk_size or config["chunk_size"]
+    if days <= 0 or settlement_lag < 0 or refund_delay < 0:
+        raise ValueError("预测天数必须为正，回款周期和退款时间不能为负")
+    # 结算前发生的退款直接从待结算货款中扣除
+    refund_lag = max(refund_delay, settlement_lag)
+
+    frame = complete_frame(inputs)
+    count = len(frame)
+    curve = np.ones(days) if demand_curve is None else np.asarray(demand_curve, dtype=float)
+    if curve.shape not in ((days,), (count, days)):
+        raise ValueError(f"需求曲线的形状应为 ({days},) 或 ({count}, {days})")
+
+    rates = daily_order_rates(frame)
+    flows = unit_cash_flows(frame)
+    signed = {'回款': 1.0, '退款': -1.0, '履约成本': -1.0, '广告支出': -1.0}
+    lags = {'回款': settlement_lag, '退款': refund_lag, '履约成本': 0, '广告支出': 0}
+
+    totals = {item: np.zeros(days) for item in ['订单数'] + FLOW_ITEMS}
+    final_cash = np.empty(count)
+    receivable = np.empty(count)
+    low_cash = np.empty(count)
+    low_day = np.empty(count, dtype=np.int64)
+    payback_day = np.empty(count)
+
+    for start in range(0, count, chunk_size):
+        rows = slice(start, min(start + chunk_size, count))
+        chunk_curve = curve if curve.ndim == 1 else curve[rows]
+        orders = rates[rows, None] * chunk_curve
+        totals['订单数'] += orders.sum(axis=0)
+
+        # 商品 × 天 的净现金流，逐项按发生时间平移后累加
+        net = np.zeros_like(orders)
+        for item in FLOW_ITEMS:
+            amounts = flows[item][rows]
+            _shift_add(totals[item], amounts @ orders, lags[item])
+            _shift_add(net, (signed[item] * amounts)[:, None] * orders, lags[item])
+        # 预测期末尚未结算的货款：回款周期内下的订单
+        pending = orders[:, max(days - settlement_lag, 0):].sum(axis=1) * flows['回款'][rows]
+        pending -= orders[:, max(days - refund_lag, 0):].sum(axis=1) * flows['退款'][rows]
+        receivable[rows] = pending
+
+        cash = np.cumsum(net, axis=1, out=net)
+        final_cash[rows] = cash[:, -1]
+        low = np.argmin(cash, axis=1)
+        low_day[rows] = low + 1
+        low_cash[rows] = cash[np.arange(len(cash)), low]
+        # 最后一个为负的天数之后即回本；从未为负为第1天，期末仍为负则未回本
+        negative = cash < 0
+        last_negative = days - 1 - np.argmax(negative[:, ::-1], axis=1)
+        payback = np.where(negative.any(axis=1), last_negative + 2, 1).astype(float)
+        payback_day[rows] = np.where(negative[:, -1], np.nan, payback)
+
+    daily = pd.DataFrame(totals, index=pd.RangeIndex(1, days + 1, name='天数'))
+    daily['净现金流'] = daily['回款'] - daily['退款'] - daily['履约成本'] - daily['广告支出']
+    daily['累计现金'] = opening_cash + daily['净现金流'].cumsum()
+
+    unit_net = flows['回款'] - flows['退款'] - flows['履约成本'] - flows['广告支出']
+    skus = pd.DataFrame({
+        '商品型号': frame['model_name'].astype(str).to_numpy(),
+        '日均订单': rates,
+        '单均净现金': unit_net,
+        '期末现金': final_cash,
+        '期末待回款': receivable,
+        '最低现金': low_cash,
+        '最低现金日': low_day,
+        '回本日': payback_day,
+    }, index=frame.index)
+    return CashflowProjection(daily=daily[DAILY_COLUMNS], skus=skus, receivable=float(receivable.sum()))
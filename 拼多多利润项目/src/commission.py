@@ -0,0 +1,124 @@
+"""
+类目扣点查找 - 按商品类目向量化确定平台扣点
+
+扣点表保存为"类目索引 + 扣点数组"。查找时先把整列类目转为 category 类型，
+只对出现过的类目（通常几十到几千个）在索引中定位一次，再用类目编码直接取数，
+百万行也不需要逐行查字典。行内填写的 commission_rate 优先于类目扣点。
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Settings
+from .input_schema import RATE_UNITS, rate_scale
+
+
+class CommissionTable:
+    """类目 -> 扣点（小数）的查找表，未知或空类目使用 default_rate"""
+
+    def __init__(self, rates: Dict[str, float], default_rate: float = None):
+        self.set_rates(rates, default_rate)
+
+    def set_rates(self, rates: Dict[str, float], default_rate: float = None):
+        """替换全部类目扣点（原地修改，引用同一扣点表的地方立即生效）"""
+        categories = pd.Index([str(category).strip() for category in rates], dtype=object)
+        if not categories.is_unique:
+            raise ValueError("扣点表中存在重复的类目")
+        if default_rate is None:
+            default_rate = rates.get('general', Settings.DEFAULT_COMMISSION_RATE)
+        self.categories = categories
+        self.rates = np.asarray(list(rates.values()), dtype=float)
+        self.default_rate = float(default_rate)
+
+    @classmethod
+    def from_settings(cls) -> 'CommissionTable':
+        """使用 PINDUODUO_CONFIG 中的默认类目扣点"""
+        return cls(Settings.PINDUODUO_CONFIG["default_commission_rates"])
+
+    @classmethod
+    def from_frame(cls, table: pd.DataFrame, category_column: str = 'category',
+                   rate_column: str = 'commission_rate', rate_unit: str = 'auto',
+                   default_rate: float = None) -> 'CommissionTable':
+        """
+        从外部类目扣点表构造
+
+        Args:
+            table: 含类目列和扣点列的表格；同一类目出现多次时以最后一行为准
+            rate_unit: 扣点单位，auto（有大于1的值即按百分数）、percent 或 fraction
+            default_rate: 未列出类目的扣点，默认取表中 general 类目或全局默认扣点
+        """
+        if rate_unit not in RATE_UNITS:
+            raise ValueError(f"不支持的比率单位: {rate_unit}")
+        missing = [column for column in (category_column, rate_column) if column not in table.columns]
+        if missing:
+            raise ValueError(f"扣点表缺少列: {', '.join(missing)}")
+
+        rates = pd.to_numeric(table[rate_column], errors='coerce')
+        rates = rates / rate_scale(rates, rate_unit)
+        categories = table[category_column].astype(str).str.strip()
+        invalid = rates.isna() | (rates < 0) | (rates > 1) | table[category_column].isna() | (categories == '')
+        if invalid.any():
+            rows = ', '.join(str(i + 2) for i in np.flatnonzero(invalid)[:10])
+            raise ValueError(f"扣点表第 {rows} 行的类目或扣点无效")
+        return cls(dict(zip(categories, rates)), default_rate)
+
+    @classmethod
+    def from_csv(cls, path, **kwargs) -> 'CommissionTable':
+        """读取类目扣点CSV（参数同 from_frame）"""
+        return cls.from_frame(pd.read_csv(path, encoding='utf-8-sig'), **kwargs)
+
+    def load_csv(self, path, **kwargs):
+        """用外部CSV替换当前扣点表的内容（如全目录扣点调整后重新计算）"""
+        loaded = self.from_csv(path, **kwargs)
+        self.set_rates(dict(zip(loaded.categories, loaded.rates)), loaded.default_rate)
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def lookup(self, categories) -> np.ndarray:
+        """
+        按类目查找扣点
+
+        Args:
+            categories: 类目序列（建议为 category 类型，其他类型会先转换）
+
+        Returns:
+            与输入等长的扣点数组（小数）
+        """
+        values = pd.Categorical(categories)
+        labels = pd.Index(values.categories.astype(str)).str.strip()
+        # 每个出现过的类目在表中的位置，-1 表示表中没有，落到末尾的默认扣点
+        positions = self.categories.get_indexer(labels)
+        category_rates = np.append(self.rates, self.default_rate)[positions]
+        # 缺失值的编码为 -1，同样取到末尾的默认扣点
+        return np.append(category_rates, self.default_rate)[values.codes]
+
+
+# 全局扣点表（默认取配置中的类目扣点，可用 load_csv 替换为外部扣点表）
+commission_table = CommissionTable.from_settings()
+
+
+def resolve_commission_rates(inputs: pd.DataFrame, table: CommissionTable = None) -> pd.DataFrame:
+    """
+    为没有填写扣点的行按类目补齐 commission_rate
+
+    仅在输入含 category 列时生效；已填写扣点的行保持不变。
+
+    Args:
+        inputs: 批量引擎输入表
+        table: 扣点表，默认使用全局 commission_table
+    """
+    if 'category' not in inputs.columns:
+        return inputs
+    if table is None:
+        table = commission_table
+    current = inputs['commission_rate'] if 'commission_rate' in inputs.columns else None
+    if current is not None and current.notna().all():
+        return inputs
+
+    rates = table.lookup(inputs['category'])
+    if current is not None:
+        rates = np.where(current.isna().to_numpy(), rates, current.to_numpy(dtype=float, na_value=np.nan))
+    return inputs.assign(commission_rate=rates)
@@ -0,0 +1,129 @@
+"""
+图表降采样工具
+
+大数据量（1万~100万点）直接交给 plotly 会导致序列化和浏览器渲染都很慢。
+这里提供折线降采样（LTTB、最小/最大值分桶）以及柱状图的 Top-N + "其他" 聚合、
+预先分箱的直方图，图表只接收聚合后的少量数据。
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _as_arrays(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.shape != y.shape:
+        raise ValueError("x 与 y 的长度必须一致")
+    return x, y
+
+
+def lttb(x, y, n_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets 降采样
+
+    保留首尾点，中间按等宽分桶，每桶选出与前一个选中点、下一桶均值构成
+    三角形面积最大的点，能较好地保留曲线形状（峰谷）。x 需已排序。
+    """
+    x, y = _as_arrays(x, y)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # 中间 n-2 个点均分为 n_out-2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        areas = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+
+    return x[selected], y[selected]
+
+
+def minmax_downsample(x, y, n_buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    最小/最大值分桶降采样
+
+    每个桶保留最小值和最大值两个点（按原顺序），输出最多 2*n_buckets 个点，
+    不会丢失极值。比 LTTB 更快，适合超大数据量。x 需已排序。
+    """
+    x, y = _as_arrays(x, y)
+    n = len(x)
+    if 2 * n_buckets >= n or n_buckets < 1:
+        return x, y
+
+    starts = np.linspace(0, n, n_buckets, endpoint=False).astype(int)
+    counts = np.diff(np.append(starts, n))
+    bucket_min = np.repeat(np.minimum.reduceat(y, starts), counts)
+    bucket_max = np.repeat(np.maximum.reduceat(y, starts), counts)
+
+    # 每桶中等于桶内最小/最大值的点，取第一个出现的位置
+    bucket = np.repeat(np.arange(n_buckets), counts)
+    is_min = np.flatnonzero(y == bucket_min)
+    is_max = np.flatnonzero(y == bucket_max)
+    first_min = is_min[np.unique(bucket[is_min], return_index=True)[1]]
+    first_max = is_max[np.unique(bucket[is_max], return_index=True)[1]]
+    idx = np.union1d(first_min, first_max)
+    return x[idx], y[idx]
+
+
+def top_n_with_others(labels, values, n: int, others_label: str = "其他") -> pd.DataFrame:
+    """
+    取数值最大的 n 行，其余合并为一项
+
+    按行取 Top-N，同名标签仍各占一行，不会合并。"其他" 的数值取剩余各项的
+    平均值（与单个商品可比，求和会远大于 Top-N 各项），并给出项数和合计。
+    返回列为 标签/数值/数量/合计 的 DataFrame，按数值降序，"其他" 固定在最后一行；
+    不超过 n 项时只排序。
+    """
+    values = np.asarray(values, dtype=float)
+    labels = np.asarray(labels).astype(str)
+    order = np.argsort(-values, kind="stable")
+    if len(values) > n:
+        top = np.argpartition(-values, n - 1)[:n]
+        order = top[np.argsort(-values[top], kind="stable")]
+
+    table = pd.DataFrame({
+        "标签": labels[order],
+        "数值": values[order],
+        "数量": 1,
+        "合计": values[order],
+    })
+    if len(values) > n:
+        rest = np.ones(len(values), dtype=bool)
+        rest[order] = False
+        rest_values = values[rest]
+        table.loc[len(table)] = [f"{others_label}({len(rest_values)}个，平均)",
+                                 rest_values.mean(), len(rest_values), rest_values.sum()]
+    return table
+
+
+def histogram_bins(values, bins: int = 50) -> pd.DataFrame:
+    """预先分箱，返回每箱的中点、左右边界和计数（忽略 NaN）"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame({
+        "中点": (edges[:-1] + edges[1:]) / 2,
+        "左边界": edges[:-1],
+        "右边界": edges[1:],
+        "数量": counts,
+    })
@@ -0,0 +1,231 @@
+"""
+价格弹性 - 从历史记录拟合各商品的需求曲线并求利润最大化售价
+
+每个商品拟合常弹性需求曲线 ln(销量) = a + b·ln(售价)，b 即价格弹性。
+最小二乘只依赖各商品的充分统计量（样本数及 x、y、x²、xy、y² 的和），
+全部商品用一次 groupby 求和、一组数组公式同时求解；新记录只需把统计量加上去，
+无需重新读取全部历史。
+
+结合批量引擎的成本模型：单件利润 = (售价 - 保本售价) × (1 - 扣点)，
+弹性 b < -1 时利润最大化售价为 保本售价 × b / (1 + b)。
+"""
+
+import threading
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Settings
+from .batch_engine import calculate_profit_frame, safe_divide
+
+# 充分统计量列
+STAT_COLUMNS = ['n', 'sx', 'sy', 'sxx', 'sxy', 'syy']
+
+# 最优售价状态
+OPTIMAL = '最优'
+CLIPPED = '超出历史价格范围，已截断'
+INELASTIC = '需求缺乏弹性，取价格上限'
+INSUFFICIENT = '数据不足'
+
+
+def _record_points(records: Iterable[Dict]) -> pd.DataFrame:
+    """从历史记录取出 (商品型号, 售价, 销量)，只保留售价和销量都为正的记录"""
+    rows = [
+        (data.get('model_name') or '', data.get('price'), data.get('sales_volume'))
+        for data in (record.get('input_data') or {} for record in records)
+    ]
+    points = pd.DataFrame(rows, columns=['model_name', 'price', 'sales_volume'])
+    points['price'] = pd.to_numeric(points['price'], errors='coerce')
+    points['sales_volume'] = pd.to_numeric(points['sales_volume'], errors='coerce')
+    return points[(points['model_name'] != '') & (points['price'] > 0) & (points['sales_volume'] > 0)]
+
+
+def sufficient_statistics(points: pd.DataFrame) -> pd.DataFrame:
+    """
+    按商品汇总对数坐标下的充分统计量及历史价格范围
+
+    Args:
+        points: 含 model_name、price、sales_volume 列（售价、销量为正）
+    """
+    x = np.log(points['price'].to_numpy(dtype=float))
+    y = np.log(points['sales_volume'].to_numpy(dtype=float))
+    terms = pd.DataFrame({
+        'model_name': points['model_name'].to_numpy(),
+        'n': 1, 'sx': x, 'sy': y, 'sxx': x * x, 'sxy': x * y, 'syy': y * y,
+        'min_price': points['price'].to_numpy(dtype=float),
+        'max_price': points['price'].to_numpy(dtype=float),
+    })
+    grouped = terms.groupby('model_name', sort=False)
+    stats = grouped[STAT_COLUMNS].sum()
+    stats['min_price'] = grouped['min_price'].min()
+    stats['max_price'] = grouped['max_price'].max()
+    return stats
+
+
+def fit_curves(stats: pd.DataFrame, min_points: int = None) -> pd.DataFrame:
+    """
+    由充分统计量求解每个商品的需求曲线
+
+    Returns:
+        以商品型号为索引：样本数、弹性、截距、R²；样本不足或价格没有变化的商品弹性为 NaN
+    """
+    min_points = min_points or Settings.ELASTICITY_CONFIG["min_points"]
+    n = stats['n'].to_numpy(dtype=float)
+    sx, sy = stats['sx'].to_numpy(), stats['sy'].to_numpy()
+    # 去均值后的平方和与交叉积
+    sxx = stats['sxx'].to_numpy() - safe_divide(sx * sx, n)
+    sxy = stats['sxy'].to_numpy() - safe_divide(sx * sy, n)
+    syy = stats['syy'].to_numpy() - safe_divide(sy * sy, n)
+
+    valid = (n >= min_points) & (sxx > 1e-12)
+    slope = np.where(valid, safe_divide(sxy, sxx), np.nan)
+    intercept = np.where(valid, safe_divide(sy - slope * sx, n), np.nan)
+    r_squared = np.where(valid & (syy > 1e-12), safe_divide(sxy * sxy, sxx * syy), np.nan)
+    return pd.DataFrame({
+        '样本数': n.astype(np.int64),
+        '弹性': slope,
+        '截距': intercept,
+        'R²': r_squared,
+    }, index=stats.index)
+
+
+class ElasticityModel:
+    """
+    按商品维护需求曲线的充分统计量，可随历史记录的保存增量更新
+
+    attach(history_manager) 后每次保存分析都会更新统计量，删除、清空或压缩
+    移除记录后从全部历史重新拟合；latest_inputs 保存每个商品最近一次的输入，
+    用于成本模型。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = pd.DataFrame(columns=STAT_COLUMNS + ['min_price', 'max_price'], dtype=float)
+        self.latest_inputs: Dict[str, Dict] = {}
+        self._manager = None
+
+    @classmethod
+    def from_history(cls, records: List[Dict]) -> 'ElasticityModel':
+        """用全部历史记录拟合"""
+        model = cls()
+        model.update(records)
+        return model
+
+    def update(self, records: Iterable[Dict]):
+        """把新记录加入统计量（可一次传入多条）"""
+        records = list(records)
+        points = _record_points(records)
+        if points.empty:
+            return
+        new = sufficient_statistics(points)
+        with self._lock:
+            stats = self.stats.reindex(self.stats.index.union(new.index, sort=False))
+            new = new.reindex(stats.index)
+            stats[STAT_COLUMNS] = stats[STAT_COLUMNS].fillna(0) + new[STAT_COLUMNS].fillna(0)
+            stats['min_price'] = np.fmin(stats['min_price'], new['min_price'])
+            stats['max_price'] = np.fmax(stats['max_price'], new['max_price'])
+            self.stats = stats
+            for record in records:
+                data = record.get('input_data') or {}
+                if data.get('model_name'):
+                    self.latest_inputs[data['model_name']] = data
+
+    def refit(self, records: Iterable[Dict]):
+        """丢弃现有统计量，用给定的全部记录重新拟合"""
+        fresh = ElasticityModel.from_history(list(records))
+        with self._lock:
+            self.stats = fresh.stats
+            self.latest_inputs = fresh.latest_inputs
+
+    def attach(self, manager):
+        """注册到历史记录管理器，之后保存的分析自动加入拟合，移除记录后自动重新拟合"""
+        self._manager = manager
+        manager.add_listener(self._on_saved)
+        manager.add_removal_listener(self._on_removed)
+
+    def detach(self, manager):
+        """取消注册"""
+        manager.remove_listener(self._on_saved)
+        manager.remove_removal_listener(self._on_removed)
+        self._manager = None
+
+    def _on_saved(self, record: Dict):
+        self.update([record])
+
+    def _on_removed(self):
+        if self._manager is not None:
+            self.refit(self._manager.load_history())
+
+    def curves(self) -> pd.DataFrame:
+        """当前的需求曲线拟合结果"""
+        with self._lock:
+            stats = self.stats.copy()
+        return fit_curves(stats)
+
+    def optimal_prices(self, inputs: pd.DataFrame = None, extrapolation: float = None) -> pd.DataFrame:
+        """
+        各商品的利润最大化售价
+
+        Args:
+            inputs: 用于成本模型的输入表（含 model_name），默认使用各商品最近一次的历史输入
+            extrapolation: 最优售价最多超出历史价格范围的比例
+
+        Returns:
+            以商品型号为索引的表：需求曲线参数、当前售价、保本售价、最优售价、
+            预计销量、预计单件利润、预计利润、当前售价下的预计利润以及状态
+        """
+        if extrapolation is None:
+            extrapolation = Settings.ELASTICITY_CONFIG["price_extrapolation"]
+        with self._lock:
+            stats = self.stats.copy()
+            latest = list(self.latest_inputs.values())
+        curves = fit_curves(stats)
+        if inputs is None:
+            inputs = pd.DataFrame(latest)
+        if curves.empty or inputs.empty:
+            return curves
+
+        inputs = inputs.drop_duplicates('model_name', keep='last').set_index('model_name', drop=False)
+        inputs = inputs.reindex(curves.index).dropna(subset=['model_name'])
+        curves = curves.loc[inputs.index]
+        stats = stats.loc[inputs.index]
+        results = calculate_profit_frame(inputs)
+
+        price = inputs['price'].to_numpy(dtype=float)
+        break_even = results['保本售价'].to_numpy(dtype=float)
+        keep_rate = 1 - safe_divide(results['平台扣点'], results['总收入'])
+        slope = curves['弹性'].to_numpy()
+        intercept = curves['截距'].to_numpy()
+        low = stats['min_price'].to_numpy() * (1 - extrapolation)
+        high = stats['max_price'].to_numpy() * (1 + extrapolation)
+
+        fitted = ~np.isnan(slope)
+        elastic = fitted & (slope < -1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            unconstrained = np.where(elastic, break_even * slope / (1 + slope), high)
+        optimal = np.where(fitted, np.clip(unconstrained, low, high), np.nan)
+        status = np.select(
+            [~fitted, ~elastic, optimal != unconstrained],
+            [INSUFFICIENT, INELASTIC, CLIPPED],
+            default=OPTIMAL,
+        )
+
+        def demand(p):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.exp(intercept) * np.power(p, slope)
+
+        volume = demand(optimal)
+        unit_profit = (optimal - break_even) * keep_rate
+        current_profit = demand(price) * (price - break_even) * keep_rate
+        return curves.assign(**{
+            '当前售价': price,
+            '保本售价': break_even,
+            '最优售价': optimal,
+            '预计销量': volume,
+            '预计单件利润': unit_profit,
+            '预计利润': volume * unit_profit,
+            '当前预计利润': current_profit,
+            '状态': status,
+        })
+
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史记录维护任务 - 按月滚动归档、保留策略与压缩
+
+可作为后台线程随应用运行，也可通过命令行单独执行：
+    python -m src.history_maintenance --max-age-days 365 --keep-per-sku 20
+"""
+
+import argparse
+import logging
+import threading
+from typing import Optional
+
+from config.settings import Settings
+from .history_manager import HistoryManager, RetentionPolicy, history_manager
+
+logger = logging.getLogger(__name__)
+
+
+def policy_from_settings() -> RetentionPolicy:
+    """从 Settings.HISTORY_CONFIG 构造保留策略"""
+    return RetentionPolicy(**Settings.HISTORY_CONFIG["retention"])
+
+
+class MaintenanceScheduler:
+    """后台维护线程：按固定间隔执行 rollover + compact"""
+    
+    def __init__(self, manager: HistoryManager = history_manager,
+                 policy: Optional[RetentionPolicy] = None,
+                 interval_hours: Optional[float] = None):
+        self.manager = manager
+        self.policy = policy or policy_from_settings()
+        if interval_hours is None:
+            interval_hours = Settings.HISTORY_CONFIG["maintenance_interval_hours"]
+        self.interval = interval_hours * 3600
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """启动后台线程（重复调用无副作用）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="history-maintenance", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止后台线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                stats = self.manager.run_maintenance(self.policy)
+                logger.info("历史记录维护完成: %s", stats)
+            except Exception:
+                logger.exception("历史记录维护失败")
+            self._stop_event.wait(self.interval)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_background_maintenance(manager: HistoryManager = history_manager) -> MaintenanceScheduler:
+    """为长期运行的服务启动后台维护（进程内只启动一次）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = MaintenanceScheduler(manager)
+            _scheduler.start()
+        return _scheduler
+
+
+def main(argv=None):
+    """命令行入口"""
+    defaults = Settings.HISTORY_CONFIG["retention"]
+    parser = argparse.ArgumentParser(description='历史记录维护：滚动归档、保留策略与压缩')
+    parser.add_argument('--history-file', default=history_manager.history_file,
+                        help='历史记录文件路径')
+    parser.add_argument('--max-age-days', type=int, default=defaults["max_age_days"],
+                        help='最长保留天数')
+    parser.add_argument('--max-records', type=int, default=defaults["max_records"],
+                        help='最多保留记录数')
+    parser.add_argument('--keep-per-sku', type=int, default=defaults["keep_latest_per_sku"],
+                        help='每个商品型号保留最新N条')
+    args = parser.parse_args(argv)
+    
+    # 使用配置中的存储格式，否则重写的文件会变回缩进JSON
+    manager = HistoryManager(args.history_file, **Settings.HISTORY_CONFIG["storage"])
+    policy = RetentionPolicy(
+        max_age_days=args.max_age_days,
+        max_records=args.max_records,
+        keep_latest_per_sku=args.keep_per_sku
+    )
+    stats = manager.run_maintenance(policy)
+    
+    print("🧹 历史记录维护完成")
+    print(f"   归档到月度分段: {stats['rolled_over']} 条")
+    print(f"   扫描记录: {stats['scanned']} 条")
+    print(f"   删除记录: {stats['removed']} 条")
+    print(f"   删除分段: {stats['segments_removed']} 个")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,516 @@
+import atexit
+import glob
 import json
+import logging
 import os
-from datetime import datetime
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import pandas as pd
 
+from config.settings import Settings
+from .batch_engine import calculate_profit_frame, frame_to_results
+from .calculation_engine import ENGINE_VERSION, build_formulas
+from .input_module import ProfitInput
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 可选的存储编码依赖
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+RECORD_MODES = ("full", "compact", "inputs")
+ENCODINGS = ("json", "compact_json", "msgpack")
+COMPRESSIONS = (None, "zstd")
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+RESULT_CACHE_SIZE = 100_000  # 按需重算结果的缓存条数
+WRITER_EXIT_TIMEOUT = 10.0  # 解释器退出时等待后台写入器落盘的最长秒数
+
+
+class FileLock:
+    """跨进程文件锁（POSIX使用fcntl，Windows使用msvcrt）"""
+    
+    def __init__(self, lock_file: str, timeout: float = 30.0):
+        self.lock_file = lock_file
+        self.timeout = timeout
+        self._fd = None
+    
+    def acquire(self):
+        """获取排他锁，超时抛出TimeoutError"""
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"无法获取文件锁: {self.lock_file}")
+                time.sleep(0.005)
+        self._fd = fd
+    
+    def release(self):
+        """释放锁"""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class HistoryWriter:
+    """历史记录后台写入器（write-behind）
+    
+    保存请求先进入有界队列后立即返回，后台线程在 flush_interval 内合并
+    记录、按批次写入，每批只做一次加锁的"读取-修改-写入"。队列满时
+    submit 阻塞形成背压；写入失败的批次最多重试 max_retries 次，仍失败时
+    记录错误并保留到下一批一起写入，不会丢弃，也不会无限阻塞 flush/close。
+    """
+    
+    def __init__(self, manager: 'HistoryManager', max_queue: int = 1000,
+                 batch_size: int = 200, flush_interval: float = 1.0, max_retries: int = 3):
+        self.manager = manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}  # 已提交但尚未落盘的记录
+        self._pending_lock = threading.Lock()
+        self._failed: List[Dict] = []  # 重试后仍未写入、等待下一批的记录（仅后台线程访问）
+        self._stop = object()
+        self._flush_marker = object()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, record: Dict):
+        """提交一条待写入记录"""
+        with self._pending_lock:
+            self._pending[record['analysis_id']] = record
+        self._queue.put(record)
+    
+    def pending_records(self) -> List[Dict]:
+        """返回尚未落盘的记录（按提交顺序）"""
+        with self._pending_lock:
+            return list(self._pending.values())
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待队列中的记录处理完毕（包括重试之前失败的记录）
+        
+        Returns:
+            全部记录都已落盘时为 True；超时或仍有写入失败的记录时为 False
+        """
+        # 标记让后台线程立即写出当前批次，而不必等待 flush_interval
+        try:
+            self._queue.put(self._flush_marker, timeout=timeout)
+        except queue.Full:
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return not self.pending_records()
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        写完剩余记录并停止后台线程
+        
+        Returns:
+            后台线程已停止且没有未落盘的记录时为 True
+        """
+        if self._thread.is_alive():
+            try:
+                self._queue.put(self._stop, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        unwritten = len(self.pending_records())
+        if unwritten:
+            logger.error("历史记录写入器关闭时仍有 %d 条记录未能写入文件", unwritten)
+        return not self._thread.is_alive() and not unwritten
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            markers = 0
+            deadline = time.monotonic() + self.flush_interval
+            
+            # 在 flush_interval 内合并后续记录，遇到 flush/stop 标记或批次满即写出
+            while True:
+                if item is self._stop:
+                    stopping = True
+                if item is self._stop or item is self._flush_marker:
+                    markers += 1
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            if batch or self._failed:
+                self._write_batch(batch)
+            for _ in range(len(batch) + markers):
+                self._queue.task_done()
+    
+    def _write_batch(self, batch: List[Dict]):
+        records = self._failed + batch
+        delay = 0.1
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.manager._append_records(records)
+                break
+            except Exception:
+                if attempt == self.max_retries:
+                    logger.exception("历史记录批量写入失败（已重试%d次），%d 条记录保留到下次写入",
+                                     self.max_retries, len(records))
+                    self._failed = records
+                    return
+                logger.warning("历史记录批量写入失败，%.1f秒后重试", delay, exc_info=True)
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+        
+        self._failed = []
+        with self._pending_lock:
+            for record in records:
+                self._pending.pop(record['analysis_id'], None)
+
+
+@dataclass
+class RetentionPolicy:
+    """历史记录保留策略，未设置（None）的条件不生效"""
+    max_age_days: Optional[int] = None  # 最长保留天数
+    max_records: Optional[int] = None  # 最多保留记录数（保留最新的）
+    keep_latest_per_sku: Optional[int] = None  # 每个商品型号保留最新N条
+    
+    def is_empty(self) -> bool:
+        return self.max_age_days is None and self.max_records is None and self.keep_latest_per_sku is None
+
+
+def _record_month(record: Dict) -> str:
+    """记录所属月份，如 2025-07"""
+    return record.get('timestamp', '')[:7]
+
+
+def _record_sku(record: Dict) -> str:
+    """记录对应的商品型号"""
+    return record.get('input_data', {}).get('model_name') or record.get('result', {}).get('商品型号', '')
+
+
 class HistoryManager:
-    """历史记录管理器"""
+    """历史记录管理器
+    
+    写操作（保存、删除、清空）在进程内线程锁和跨进程文件锁的保护下完成
+    "读取-修改-写入"，并通过临时文件 + os.replace 原子替换历史文件，
+    不会读到写了一半的文件；load_history 读取分段、活动文件和墓碑时
+    持有同一把锁，与 rollover()/compact() 的多文件改写互斥。
+    
+    调用 enable_write_behind() 后保存改由后台 HistoryWriter 批量落盘，
+    save_analysis 立即返回ID；load_history 会合并尚未落盘的记录。
+    
+    存储格式：record_mode="compact" 时结果中不保存"计算公式"字符串，
+    get_analysis()/expand_record() 按需从输入和数值结果重新生成；
+    record_mode="inputs" 时只保存输入和引擎版本，结果在读取时用批量
+    引擎向量化重算并缓存；
+    encoding 可选缩进JSON（旧格式）、紧凑JSON或msgpack，compression
+    可选zstd。读取时按文件内容自动识别格式，新旧记录可以混合存放。
+    
+    存储布局：history_file 为当前活动文件，rollover() 把往月记录移入
+    按月分段的归档文件（analysis_history.2025-07.json）。删除归档中的
+    记录只登记墓碑（analysis_history.tombstones.json），由 compact()
+    统一重写分段时清除，同时按 RetentionPolicy 丢弃过期记录。
     
-    def __init__(self, history_file: str = "data/analysis_history.json"):
+    add_listener() 注册的回调在每次保存后收到新记录，用于增量更新
+    依赖历史数据的模型（如价格弹性）；add_removal_listener() 注册的回调在
+    删除、清空或压缩移除记录后调用，供这类模型重新拟合。version 在每次
+    保存或移除后递增，可作为缓存键。
+    """
+    
+    def __init__(self, history_file: str = "data/analysis_history.json",
+                 record_mode: str = "full", encoding: str = "json",
+                 compression: Optional[str] = None):
+        if record_mode not in RECORD_MODES:
+            raise ValueError(f"未知的记录模式: {record_mode}")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"未知的存储编码: {encoding}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"未知的压缩方式: {compression}")
+        if encoding == "msgpack" and msgpack is None:
+            raise ImportError("使用msgpack编码需要安装 msgpack 包")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("使用zstd压缩需要安装 zstandard 包")
+        
         self.history_file = history_file
+        self.record_mode = record_mode
+        self.encoding = encoding
+        self.compression = compression
+        self.lock_file = history_file + ".lock"
+        self._lock = threading.RLock()
+        self._last_id_base = None
+        self._id_seq = 0
+        self._writer = None
+        # 保护写入器的开启/关闭与提交；与 _lock 分开，提交因队列满阻塞时后台线程仍可加锁写入
+        self._writer_lock = threading.Lock()
+        self._result_cache = OrderedDict()  # (analysis_id, 引擎版本) -> 结果
+        self._cache_lock = threading.Lock()
+        self._listeners = []
+        self._removal_listeners = []
+        self.version = 0  # 本进程内的历史记录版本号，每次保存或移除记录后递增
         self.ensure_data_dir()
         
     def ensure_data_dir(self):
         """确保数据目录存在"""
-        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+        os.makedirs(os.path.dirname(self.history_file) or ".", exist_ok=True)
+    
+    @contextmanager
+    def _locked(self):
+        """同时持有线程锁和文件锁"""
+        with self._lock:
+            with FileLock(self.lock_file):
+                yield
+    
+    def _write_history(self, history: List[Dict]):
+        """原子写入活动历史文件"""
+        self._write_records(self.history_file, history)
+    
+    def _encode(self, records: List) -> bytes:
+        """按配置的编码和压缩方式序列化"""
+        if self.encoding == "msgpack":
+            data = msgpack.packb(records, default=str, use_bin_type=True)
+        elif self.encoding == "compact_json":
+            data = json.dumps(records, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+        else:
+            data = json.dumps(records, ensure_ascii=False, indent=2, default=str).encode('utf-8')
+        
+        if self.compression == "zstd":
+            data = zstandard.ZstdCompressor().compress(data)
+        return data
+    
+    @staticmethod
+    def _decode(data: bytes) -> List:
+        """按内容识别格式反序列化（兼容旧的缩进JSON文件）"""
+        if data.startswith(_ZSTD_MAGIC):
+            if zstandard is None:
+                raise ImportError("读取zstd压缩的历史记录需要安装 zstandard 包")
+            data = zstandard.ZstdDecompressor().decompress(data, max_output_size=1 << 31)
+        
+        if data.lstrip()[:1] in (b'[', b'{'):
+            return json.loads(data.decode('utf-8'))
+        if msgpack is None:
+            raise ImportError("读取msgpack格式的历史记录需要安装 msgpack 包")
+        return msgpack.unpackb(data, raw=False)
+    
+    def _write_records(self, path: str, records: List):
+        """原子写入：先写临时文件，再替换正式文件"""
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._encode(records))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def _read_records(self, path: str) -> List:
+        """读取一个历史文件，不存在或损坏时返回空列表"""
+        if not os.path.exists(path):
+            return []
+        
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            return self._decode(data) if data.strip() else []
+        except (ValueError, FileNotFoundError):
+            # json.JSONDecodeError 与 msgpack 的格式错误均为 ValueError 子类
+            return []
+    
+    @property
+    def _file_stem(self) -> str:
+        return os.path.splitext(self.history_file)[0]
+    
+    @property
+    def tombstone_file(self) -> str:
+        return self._file_stem + ".tombstones.json"
+    
+    def segment_path(self, month: str) -> str:
+        """指定月份（YYYY-MM）的归档分段路径"""
+        return f"{self._file_stem}.{month}.json"
+    
+    def list_segments(self) -> List[tuple]:
+        """按月份升序列出归档分段 [(month, path), ...]"""
+        stem = self._file_stem
+        segments = []
+        for path in glob.glob(glob.escape(stem) + ".*.json"):
+            month = path[len(stem) + 1:-len(".json")]
+            if len(month) == 7 and month[4] == '-' and month.replace('-', '').isdigit():
+                segments.append((month, path))
+        return sorted(segments)
+    
+    def _append_records(self, records: List[Dict]):
+        """在锁内把一批记录追加到历史文件"""
+        with self._locked():
+            history = self._read_history()
+            history.extend(records)
+            self._write_history(history)
+    
+    def enable_write_behind(self, max_queue: int = 1000, batch_size: int = 200,
+                            flush_interval: float = 1.0) -> 'HistoryWriter':
+        """开启后台异步写入模式（重复调用无副作用）"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = HistoryWriter(self, max_queue, batch_size, flush_interval)
+                # 正常退出时尽量让剩余记录落盘（最多等待 WRITER_EXIT_TIMEOUT 秒）
+                atexit.register(self.disable_write_behind, WRITER_EXIT_TIMEOUT)
+            return self._writer
+    
+    def disable_write_behind(self, timeout: Optional[float] = None) -> bool:
+        """写完剩余记录并恢复同步写入模式，返回是否全部落盘"""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            return writer.close(timeout)
+        return True
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待后台写入器中的记录全部落盘，返回是否全部落盘；同步模式下无操作"""
+        writer = self._writer
+        if writer is not None:
+            return writer.flush(timeout)
+        return True
+    
+    def _new_analysis_id(self, existing_ids=(), unique_suffix: bool = False) -> str:
+        """
+        生成分析ID，同一秒内的多次保存追加序号避免重复
+        
+        unique_suffix 为 True 时追加随机后缀，无需读取已有ID也能与其他进程
+        （如同时写入同一文件的GUI和Web界面）生成的ID区分。
+        """
+        if unique_suffix:
+            return datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:8]
+        with self._lock:
+            base = datetime.now().strftime("%Y%m%d_%H%M%S")
+            if base == self._last_id_base:
+                self._id_seq += 1
+            else:
+                self._last_id_base = base
+                self._id_seq = 0
+            
+            analysis_id = base if self._id_seq == 0 else f"{base}_{self._id_seq}"
+            # 其他进程可能已在同一秒写入相同ID
+            while analysis_id in existing_ids:
+                self._id_seq += 1
+                analysis_id = f"{base}_{self._id_seq}"
+            return analysis_id
+    
+    def _make_record(self, analysis_id: str, input_data: dict, result: dict) -> Dict:
+        """构造待保存的记录：紧凑模式去掉公式字符串，输入模式不保存结果"""
+        record = {
+            "analysis_id": analysis_id,
+            "timestamp": datetime.now().isoformat(),
+            "input_data": input_data,
+            "engine_version": ENGINE_VERSION,
+            "created_by": "user"
+        }
+        if self.record_mode == "compact" and '计算公式' in result:
+            record["result"] = {k: v for k, v in result.items() if k != '计算公式'}
+        elif self.record_mode != "inputs":
+            record["result"] = result
+        return record
+    
+    def add_listener(self, callback):
+        """注册保存回调 callback(record)，重复注册无副作用"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """移除保存回调"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def add_removal_listener(self, callback):
+        """注册移除回调 callback()，在删除、清空或压缩移除记录后调用"""
+        if callback not in self._removal_listeners:
+            self._removal_listeners.append(callback)
+    
+    def remove_removal_listener(self, callback):
+        """移除移除回调"""
+        if callback in self._removal_listeners:
+            self._removal_listeners.remove(callback)
+    
+    def _notify(self, record: Dict):
+        """通知保存回调；回调出错只记录日志，不影响保存"""
+        for callback in list(self._listeners):
+            try:
+                callback(record)
+            except Exception:
+                logger.exception("历史记录保存回调失败")
+        # 回调更新完依赖的模型后再递增版本，按版本缓存的结果不会取到旧模型
+        self._bump_version()
+    
+    def _notify_removed(self):
+        """通知移除回调（在释放锁之后调用，回调可以重新读取历史）"""
+        for callback in list(self._removal_listeners):
+            try:
+                callback()
+            except Exception:
+                logger.exception("历史记录移除回调失败")
+        self._bump_version()
+    
+    def _bump_version(self):
+        """递增版本号（+= 不是原子操作，多线程保存时须加锁）"""
+        with self._lock:
+            self.version += 1
     
     def save_analysis(self, input_data: dict, result: dict) -> str:
         """
@@ -26,68 +523,307 @@ class HistoryManager:
         Returns:
             analysis_id: 分析记录ID
         """
-        analysis_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        with self._writer_lock:
+            writer = self._writer
+            if writer is not None:
+                # 异步模式：ID带随机后缀保证跨进程唯一；在锁内提交，避免与关闭写入器竞争而丢失记录
+                record = self._make_record(self._new_analysis_id(unique_suffix=True), input_data, result)
+                writer.submit(record)
+        if writer is not None:
+            self._notify(record)
+            return record["analysis_id"]
         
-        record = {
-            "analysis_id": analysis_id,
-            "timestamp": datetime.now().isoformat(),
-            "input_data": input_data,
-            "result": result,
-            "created_by": "user"
-        }
+        with self._locked():
+            # 读取现有历史记录
+            history = self._read_history()
+            
+            analysis_id = self._new_analysis_id({r.get('analysis_id') for r in history})
+            record = self._make_record(analysis_id, input_data, result)
+            
+            # 添加新记录并保存到文件
+            history.append(record)
+            self._write_history(history)
         
-        # 读取现有历史记录
-        history = self.load_history()
+        self._notify(record)
+        return analysis_id
+    
+    def load_history(self) -> List[Dict]:
+        """加载历史记录（归档分段 + 活动文件 + 后台写入器中尚未落盘的记录）"""
+        # 多个文件须在同一把锁内读取，否则并发的 rollover/compact 会导致记录遗漏或重复
+        with self._locked():
+            history = self._load_records()
+        return self._hydrate(history)
+    
+    def _load_records(self) -> List[Dict]:
+        """在锁内读取全部记录（不补全结果）"""
+        history = []
+        for _, path in self.list_segments():
+            history.extend(self._read_records(path))
+        history.extend(self._read_history())
         
-        # 添加新记录
-        history.append(record)
+        tombstones = set(self._read_records(self.tombstone_file))
+        if tombstones:
+            history = [r for r in history if r.get('analysis_id') not in tombstones]
         
-        # 保存到文件
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, ensure_ascii=False, indent=2, default=str)
+        writer = self._writer
+        if writer is not None:
+            pending = writer.pending_records()
+            if pending:
+                saved_ids = {r.get('analysis_id') for r in history}
+                history.extend(r for r in pending if r['analysis_id'] not in saved_ids)
+        return history
+    
+    def _hydrate(self, history: List[Dict]) -> List[Dict]:
+        """为只保存了输入的记录补上结果：命中缓存直接取，其余一次批量重算"""
+        if all('result' in r for r in history):
+            return history
         
-        return analysis_id
+        # 复制而不修改原记录（待写入队列中的记录不能被补上结果）
+        history = [r if 'result' in r else dict(r) for r in history]
+        missing = [r for r in history if 'result' not in r]
+        
+        to_compute = []
+        with self._cache_lock:
+            for record in missing:
+                cached = self._result_cache.get((record.get('analysis_id'), ENGINE_VERSION))
+                if cached is not None:
+                    record['result'] = cached
+                else:
+                    to_compute.append(record)
+        
+        if to_compute:
+            results = self._compute_results([r['input_data'] for r in to_compute])
+            with self._cache_lock:
+                for record, result in zip(to_compute, results):
+                    record['result'] = result
+                    self._result_cache[(record.get('analysis_id'), ENGINE_VERSION)] = result
+                while len(self._result_cache) > RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+        return history
     
-    def load_history(self) -> List[Dict]:
-        """加载历史记录"""
-        if not os.path.exists(self.history_file):
-            return []
+    @staticmethod
+    def _compute_results(input_rows: List[Dict]) -> List[Dict]:
+        """用批量引擎按当前公式重算一组输入"""
+        inputs = pd.DataFrame(input_rows)
+        return frame_to_results(calculate_profit_frame(inputs))
+    
+    def recompute_history(self, update_stored: bool = False) -> pd.DataFrame:
+        """
+        用当前公式版本一次性重算全部历史记录
         
-        try:
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+        Args:
+            update_stored: 为True时把新结果和引擎版本写回保存了结果的记录
+            
+        Returns:
+            以分析ID为索引的批量结果表
+        """
+        self.flush()
+        with self._locked():
+            records = [r for r in self._hydrate(self._load_records()) if r.get('input_data')]
+            inputs = pd.DataFrame([r['input_data'] for r in records])
+            results = calculate_profit_frame(inputs)
+            results.index = pd.Index([r.get('analysis_id') for r in records], name='分析ID')
+            
+            if update_stored and records:
+                new_results = dict(zip(results.index, frame_to_results(results)))
+                paths = [path for _, path in self.list_segments()] + [self.history_file]
+                for path in paths:
+                    stored = self._read_records(path)
+                    changed = False
+                    for record in stored:
+                        if 'result' in record and record.get('analysis_id') in new_results:
+                            result = new_results[record['analysis_id']]
+                            if self.record_mode == "full":
+                                result = self.expand_record({**record, 'result': result})['result']
+                            record['result'] = result
+                            record['engine_version'] = ENGINE_VERSION
+                            changed = True
+                    if changed:
+                        self._write_records(path, stored)
+        return results
+    
+    def _read_history(self) -> List[Dict]:
+        """从活动文件读取历史记录"""
+        return self._read_records(self.history_file)
     
     def get_analysis(self, analysis_id: str) -> Optional[Dict]:
-        """获取指定的分析记录"""
+        """获取指定的分析记录（紧凑记录会补全计算公式）"""
         history = self.load_history()
         for record in history:
             if record.get('analysis_id') == analysis_id:
-                return record
+                return self.expand_record(record)
         return None
     
+    @staticmethod
+    def expand_record(record: Dict) -> Dict:
+        """为紧凑记录重新生成"计算公式"，完整记录原样返回"""
+        result = record.get('result')
+        if not result or '计算公式' in result:
+            return record
+        try:
+            formulas = build_formulas(ProfitInput.from_dict(record['input_data']), result)
+        except (KeyError, TypeError):
+            # 早期记录缺少必要字段时无法还原公式
+            return record
+        return {**record, 'result': {**result, '计算公式': formulas}}
+    
     def delete_analysis(self, analysis_id: str) -> bool:
         """删除指定的分析记录"""
-        history = self.load_history()
-        original_count = len(history)
-        
-        history = [record for record in history if record.get('analysis_id') != analysis_id]
-        
-        if len(history) < original_count:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, ensure_ascii=False, indent=2, default=str)
-            return True
+        deleted = self._delete_record(analysis_id)
+        if deleted:
+            self._notify_removed()
+        return deleted
+    
+    def _delete_record(self, analysis_id: str) -> bool:
+        """在锁内从活动文件删除记录，或为归档中的记录登记墓碑"""
+        self.flush()
+        with self._locked():
+            history = self._read_history()
+            original_count = len(history)
+            
+            history = [record for record in history if record.get('analysis_id') != analysis_id]
+            
+            if len(history) < original_count:
+                self._write_history(history)
+                return True
+            
+            # 归档分段中的记录只登记墓碑，由 compact() 统一清除
+            tombstones = self._read_records(self.tombstone_file)
+            if analysis_id in tombstones:
+                return False
+            for _, path in self.list_segments():
+                if any(r.get('analysis_id') == analysis_id for r in self._read_records(path)):
+                    tombstones.append(analysis_id)
+                    self._write_records(self.tombstone_file, tombstones)
+                    return True
         return False
     
     def clear_history(self) -> bool:
         """清空所有历史记录"""
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump([], f)
-            return True
+            self.flush()
+            with self._locked():
+                self._write_history([])
+                for _, path in self.list_segments():
+                    os.remove(path)
+                if os.path.exists(self.tombstone_file):
+                    os.remove(self.tombstone_file)
         except Exception:
             return False
+        self._notify_removed()
+        return True
+    
+    def rollover(self, now: Optional[datetime] = None) -> int:
+        """把活动文件中往月的记录移入按月归档分段，返回移动的记录数"""
+        current_month = (now or datetime.now()).strftime("%Y-%m")
+        self.flush()
+        with self._locked():
+            history = self._read_history()
+            by_month = {}
+            keep = []
+            for record in history:
+                month = _record_month(record)
+                if month and month < current_month:
+                    by_month.setdefault(month, []).append(record)
+                else:
+                    keep.append(record)
+            
+            if not by_month:
+                return 0
+            
+            # 先写归档再截断活动文件，中途失败最多产生重复而不会丢失
+            for month, records in by_month.items():
+                path = self.segment_path(month)
+                existing = self._read_records(path)
+                existing_ids = {r.get('analysis_id') for r in existing}
+                existing.extend(r for r in records if r.get('analysis_id') not in existing_ids)
+                self._write_records(path, existing)
+            self._write_history(keep)
+            return len(history) - len(keep)
+    
+    def compact(self, policy: Optional[RetentionPolicy] = None,
+                now: Optional[datetime] = None) -> Dict:
+        """
+        压缩历史记录：清除墓碑记录，并按保留策略丢弃过期记录
+        
+        Returns:
+            统计信息：扫描记录数、删除记录数、删除的分段数
+        """
+        policy = policy or RetentionPolicy()
+        now = now or datetime.now()
+        stats = {"scanned": 0, "removed": 0, "segments_removed": 0}
+        
+        self.flush()
+        with self._locked():
+            segments = self.list_segments()
+            
+            # 整段超过最长保留期限的分段直接删除，无需读取
+            if policy.max_age_days is not None:
+                cutoff = now - timedelta(days=policy.max_age_days)
+                cutoff_month = cutoff.strftime("%Y-%m")
+                for month, path in [seg for seg in segments if seg[0] < cutoff_month]:
+                    stats["removed"] += len(self._read_records(path))
+                    os.remove(path)
+                    stats["segments_removed"] += 1
+                segments = [seg for seg in segments if seg[0] >= cutoff_month]
+            
+            files = [path for _, path in segments] + [self.history_file]
+            contents = {path: self._read_records(path) for path in files}
+            all_records = [r for records in contents.values() for r in records]
+            stats["scanned"] = len(all_records)
+            
+            keep_ids = self._retained_ids(all_records, policy, now)
+            keep_ids -= set(self._read_records(self.tombstone_file))
+            
+            for path, records in contents.items():
+                kept = [r for r in records if r.get('analysis_id') in keep_ids]
+                if len(kept) == len(records):
+                    continue
+                stats["removed"] += len(records) - len(kept)
+                if kept or path == self.history_file:
+                    self._write_records(path, kept)
+                else:
+                    os.remove(path)
+                    stats["segments_removed"] += 1
+            
+            if os.path.exists(self.tombstone_file):
+                os.remove(self.tombstone_file)
+        
+        if stats["removed"]:
+            self._notify_removed()
+        return stats
+    
+    @staticmethod
+    def _retained_ids(records: List[Dict], policy: RetentionPolicy, now: datetime) -> set:
+        """按保留策略计算应保留的记录ID"""
+        ordered = sorted(records, key=lambda r: r.get('timestamp', ''), reverse=True)
+        
+        if policy.max_age_days is not None:
+            cutoff = (now - timedelta(days=policy.max_age_days)).isoformat()
+            ordered = [r for r in ordered if r.get('timestamp', '') >= cutoff]
+        
+        if policy.keep_latest_per_sku is not None:
+            counts = {}
+            kept = []
+            for record in ordered:
+                sku = _record_sku(record)
+                counts[sku] = counts.get(sku, 0) + 1
+                if counts[sku] <= policy.keep_latest_per_sku:
+                    kept.append(record)
+            ordered = kept
+        
+        if policy.max_records is not None:
+            ordered = ordered[:policy.max_records]
+        
+        return {r.get('analysis_id') for r in ordered}
+    
+    def run_maintenance(self, policy: Optional[RetentionPolicy] = None,
+                        now: Optional[datetime] = None) -> Dict:
+        """执行一次完整维护：按月滚动归档，然后压缩"""
+        rolled = self.rollover(now)
+        stats = self.compact(policy, now)
+        stats["rolled_over"] = rolled
+        return stats
     
     def get_history_summary(self) -> Dict:
         """获取历史记录摘要"""
@@ -230,4 +966,4 @@ class HistoryManager:
         }
 
 # 创建全局历史记录管理器实例
-history_manager = HistoryManager()
\ No newline at end of file
+history_manager = HistoryManager(**Settings.HISTORY_CONFIG["storage"])
\ No newline at end of file
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Optional
 import streamlit as st
 
@@ -18,6 +18,12 @@ class ProfitInput:
     ad_deal_price: float = 0.0  # 成交出价：每笔净成交的广告费用
     ad_enabled: bool = False  # 是否启用广告
     
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ProfitInput':
+        """从历史记录的 input_data 等字典构造，忽略多余的键（如 analysis_orders）"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+    
     @property
     def refund_rate(self) -> float:
         """计算退款率 = 退货数量/销量"""
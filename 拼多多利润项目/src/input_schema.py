@@ -0,0 +1,187 @@
+"""
+批量输入解析 - CSV/DataFrame 到批量引擎输入列的统一映射
+
+整表向量化解析：按列做类型转换、单位换算和缺省值填充，并逐行记录无法解析的
+单元格。GUI 和 Web 的批量分析共用这一层，输出可直接交给 calculate_profit_frame。
+"""
+
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# 数值列及缺省值（缺列或空单元格时使用，与此前逐行解析的默认值一致）
+FLOAT_COLUMNS = {
+    'price': 0.0,
+    'cost': 0.0,
+    'other_cost': 0.0,
+    'shipping_fee': 0.0,
+    'ad_deal_price': 0.0,
+}
+
+INT_COLUMNS = {
+    'sales_volume': 100,
+    'return_quantity': 10,
+    'deal_orders': 95,
+    'net_deal_orders': 85,
+}
+
+# 比率列：可用百分数（3 表示 3%）或小数（0.03）填写，解析后统一为小数
+RATE_COLUMNS = ['commission_rate', 'refund_rate', 'instant_refund_rate']
+
+# 可选的文本类别列（类目、店铺、运费等级、快递公司）：去除首尾空白后按 category 类型保存，
+# 空单元格为缺失值
+TEXT_COLUMNS = ['category', 'store', 'shipping_class', 'carrier']
+
+# 有这些列时，空运费保留为缺失值，计算时按重量或运费等级估算（见 shipping.resolve_shipping_fees）
+SHIPPING_HINT_COLUMNS = ['weight', 'shipping_class']
+
+# 可选的非负数值列（重量 kg、日均订单数），原表中没有时不添加，空单元格为缺失值
+OPTIONAL_FLOAT_COLUMNS = ['weight', 'daily_orders']
+
+# ad_enabled 可识别的取值（不区分大小写）
+TRUE_VALUES = {'true', '1', 'yes', 'y', 't', '是', '启用', '开'}
+FALSE_VALUES = {'false', '0', 'no', 'n', 'f', '否', '关闭', '关', ''}
+
+RATE_UNITS = ('auto', 'percent', 'fraction')
+
+ERROR_COLUMNS = ['行', '列', '原始值', '错误']
+
+
+@dataclass
+class ParsedInputs:
+    """解析结果：frame 为通过校验的行（保留原索引），errors 每个错误单元格一行"""
+    frame: pd.DataFrame
+    errors: pd.DataFrame
+
+    @property
+    def error_rows(self) -> int:
+        """有错误的行数"""
+        return self.errors['行'].nunique()
+
+
+def _to_numeric(values: pd.Series, column: str, errors: list) -> pd.Series:
+    """转换为浮点数，记录无法解析的单元格"""
+    numeric = pd.to_numeric(values, errors='coerce').astype(float)
+    bad = numeric.isna() & values.notna() & (values.astype(str).str.strip() != '')
+    for index in values.index[bad]:
+        errors.append((index, column, values[index], '不是有效数字'))
+    return numeric
+
+
+def _check_range(numeric: pd.Series, column: str, values: pd.Series, errors: list,
+                 upper: float = None):
+    """记录负数以及超过上限的单元格"""
+    bad = numeric < 0
+    for index in numeric.index[bad]:
+        errors.append((index, column, values[index], '不能为负数'))
+    if upper is not None:
+        for index in numeric.index[numeric > upper]:
+            errors.append((index, column, values[index], f'不能大于{upper:g}'))
+
+
+def rate_scale(numeric: pd.Series, unit: str) -> float:
+    """确定整列的比率单位：auto 时只要有一个值大于1就按百分数处理整列"""
+    if unit == 'percent':
+        return 100.0
+    if unit == 'fraction':
+        return 1.0
+    return 100.0 if (numeric > 1).any() else 1.0
+
+
+def _parse_bool(values: pd.Series, column: str, errors: list) -> pd.Series:
+    """把 "True"/"False"/"是"/"否"/1/0 等解析为布尔值；空单元格为 False"""
+    if values.dtype == bool:
+        return values
+    text = values.astype(str).str.strip().str.lower().where(values.notna(), '')
+    text = text.str.replace(r'\.0$', '', regex=True)  # 数字列读成 1.0/0.0 的情况
+    is_true = text.isin(TRUE_VALUES)
+    bad = ~is_true & ~text.isin(FALSE_VALUES)
+    for index in values.index[bad]:
+        errors.append((index, column, values[index], '无法识别的是否取值'))
+    return is_true
+
+
+def parse_inputs(df: pd.DataFrame, rate_unit: str = 'auto') -> ParsedInputs:
+    """
+    把上传的表格解析为批量引擎的输入
+
+    Args:
+        df: 原始表格（列名与 ProfitInput 字段一致，均可缺省）
+        rate_unit: 比率列单位，auto（按列判断）、percent 或 fraction
+
+    Returns:
+        ParsedInputs；frame 的列为 INPUT_DEFAULTS 中的字段，另含可选的
+        refund_rate、instant_refund_rate（小数，NaN 表示按数量计算）、analysis_orders
+        以及原表中存在的 weight（kg）、daily_orders 和文本类别列（category、store、shipping_class、carrier）
+    """
+    if rate_unit not in RATE_UNITS:
+        raise ValueError(f"不支持的比率单位: {rate_unit}")
+
+    errors = []
+    columns: Dict[str, pd.Series] = {}
+
+    def raw(name):
+        return df[name] if name in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+
+    model_name = raw('model_name')
+    columns['model_name'] = model_name.astype(str).where(
+        model_name.notna() & (model_name.astype(str).str.strip() != ''), 'SKU-' + df.index.astype(str)
+    )
+
+    estimate_shipping = any(name in df.columns for name in SHIPPING_HINT_COLUMNS)
+    for name, default in FLOAT_COLUMNS.items():
+        values = raw(name)
+        numeric = _to_numeric(values, name, errors)
+        _check_range(numeric, name, values, errors)
+        columns[name] = numeric if name == 'shipping_fee' and estimate_shipping else numeric.fillna(default)
+
+    for name in OPTIONAL_FLOAT_COLUMNS:
+        if name in df.columns:
+            values = df[name]
+            numeric = _to_numeric(values, name, errors)
+            _check_range(numeric, name, values, errors)
+            columns[name] = numeric
+
+    for name, default in INT_COLUMNS.items():
+        values = raw(name)
+        numeric = _to_numeric(values, name, errors)
+        _check_range(numeric, name, values, errors)
+        fractional = numeric.notna() & (numeric != np.floor(numeric))
+        for index in numeric.index[fractional]:
+            errors.append((index, name, values[index], '应为整数'))
+        columns[name] = numeric.fillna(default).where(~fractional, default).astype(np.int64)
+
+    for name in RATE_COLUMNS:
+        values = raw(name)
+        numeric = _to_numeric(values, name, errors)
+        scale = rate_scale(numeric, rate_unit)
+        _check_range(numeric, name, values, errors, upper=scale)
+        columns[name] = numeric / scale
+    # 有类目列时空扣点保留为缺失值，计算时按类目扣点表补齐（见 commission.resolve_commission_rates）
+    if 'category' not in df.columns:
+        columns['commission_rate'] = columns['commission_rate'].fillna(0.0)
+
+    columns['ad_enabled'] = _parse_bool(raw('ad_enabled'), 'ad_enabled', errors)
+
+    if 'analysis_orders' in df.columns:
+        values = df['analysis_orders']
+        numeric = _to_numeric(values, 'analysis_orders', errors)
+        _check_range(numeric, 'analysis_orders', values, errors)
+        fractional = numeric.notna() & (numeric != np.floor(numeric))
+        for index in numeric.index[fractional]:
+            errors.append((index, 'analysis_orders', values[index], '应为整数'))
+        # 空单元格保留为缺失值，计算时使用统一的分析订单数
+        columns['analysis_orders'] = numeric.where(~fractional).astype('Int64')
+
+    for name in TEXT_COLUMNS:
+        if name in df.columns:
+            text = df[name].astype(str).str.strip()
+            columns[name] = text.where(df[name].notna() & (text != '')).astype('category')
+
+    frame = pd.DataFrame(columns, index=df.index)
+    error_frame = pd.DataFrame(errors, columns=ERROR_COLUMNS).sort_values('行', kind='stable')
+    if len(error_frame):
+        frame = frame.drop(index=error_frame['行'].unique())
+    return ParsedInputs(frame=frame, errors=error_frame.reset_index(drop=True))
@@ -0,0 +1,259 @@
+"""
+后台作业管理 - 供Web界面提交长时间运行的批量分析
+
+作业在线程池中执行，提交后立即返回作业ID；状态和进度保存在内存中，
+完成后结果表和状态同时写入磁盘（jobs 目录），Streamlit 脚本重跑、
+会话切换甚至服务重启后仍可按ID取回结果。已完成的作业按 JOB_CONFIG 的
+保留策略定期清理。
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from config.settings import Settings
+from .task_runner import TaskCancelled
+
+logger = logging.getLogger(__name__)
+
+# 作业状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# submit 生成的作业ID格式：YYYYmmdd_HHMMSS_<8位十六进制>
+JOB_ID_PATTERN = re.compile(r'^\d{8}_\d{6}_[0-9a-f]{8}$')
+
+
+def is_valid_job_id(job_id: str) -> bool:
+    """作业ID是否为 submit 生成的格式（拼接文件路径前必须检查，防止读取作业目录以外的文件）"""
+    return isinstance(job_id, str) and JOB_ID_PATTERN.match(job_id) is not None
+
+
+@dataclass
+class JobInfo:
+    """作业状态"""
+    job_id: str
+    name: str
+    status: str = QUEUED
+    progress: float = 0.0  # 0~1
+    message: str = ""
+    created_at: str = ""
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+
+class JobContext:
+    """传给作业函数的上下文：检查取消、汇报进度"""
+    
+    def __init__(self, manager: 'JobManager', job_id: str):
+        self._manager = manager
+        self._job_id = job_id
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._manager._cancel_events[self._job_id].is_set()
+    
+    def check_cancelled(self):
+        """已请求取消时抛出 TaskCancelled"""
+        if self.cancelled:
+            raise TaskCancelled()
+    
+    def report_progress(self, done: int, total: int, message: str = ""):
+        """汇报进度"""
+        self._manager._update(self._job_id, progress=done / total if total else 1.0, message=message)
+
+
+class JobManager:
+    """
+    后台作业管理器
+    
+    Args:
+        jobs_dir: 作业状态和结果的保存目录
+        max_workers: 同时运行的作业数
+        max_jobs_in_memory: 内存中保留的已完成作业结果数
+        max_age_hours / max_jobs: 已完成作业的保留策略，默认取 JOB_CONFIG
+    """
+    
+    def __init__(self, jobs_dir: str = os.path.join(Settings.DATA_DIR, "jobs"),
+                 max_workers: int = 2, max_jobs_in_memory: int = 8,
+                 max_age_hours: float = None, max_jobs: int = None):
+        config = Settings.JOB_CONFIG
+        self.jobs_dir = jobs_dir
+        self.max_jobs_in_memory = max_jobs_in_memory
+        self.max_age_hours = config["max_age_hours"] if max_age_hours is None else max_age_hours
+        self.max_jobs = config["max_jobs"] if max_jobs is None else max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-job")
+        self._jobs: Dict[str, JobInfo] = {}
+        self._results: Dict[str, pd.DataFrame] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.jobs_dir, exist_ok=True)
+    
+    def submit(self, func: Callable, *args, name: str = "") -> str:
+        """
+        提交作业
+        
+        func 的签名为 func(ctx: JobContext, *args)，须返回 DataFrame
+        
+        Returns:
+            job_id: 作业ID
+        """
+        job_id = datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:8]
+        with self._lock:
+            self._jobs[job_id] = JobInfo(job_id=job_id, name=name, created_at=datetime.now().isoformat())
+            self._cancel_events[job_id] = threading.Event()
+        self._executor.submit(self._execute, job_id, func, args)
+        self.cleanup()
+        return job_id
+    
+    def _execute(self, job_id: str, func: Callable, args: tuple):
+        if self._cancel_events[job_id].is_set():
+            self._finish(job_id, CANCELLED)
+            return
+        
+        self._update(job_id, status=RUNNING)
+        try:
+            result = func(JobContext(self, job_id), *args)
+            # 写入失败同样记为失败，否则状态一直停留在运行中
+            result.to_pickle(self._result_path(job_id))
+        except TaskCancelled:
+            self._finish(job_id, CANCELLED)
+        except Exception as e:
+            self._finish(job_id, FAILED, error=str(e))
+        else:
+            with self._lock:
+                self._results[job_id] = result
+                # 只在内存中保留最近的若干结果，其余从磁盘读取
+                while len(self._results) > self.max_jobs_in_memory:
+                    self._results.pop(next(iter(self._results)))
+            self._finish(job_id, DONE, progress=1.0)
+    
+    def _update(self, job_id: str, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            for key, value in changes.items():
+                setattr(job, key, value)
+    
+    def _finish(self, job_id: str, status: str, **changes):
+        # 先写状态文件再更新内存状态：查询到已完成时状态文件一定存在（cleanup 依赖状态文件）
+        changes.update(status=status, finished_at=datetime.now().isoformat())
+        with self._lock:
+            info = {**asdict(self._jobs[job_id]), **changes}
+        try:
+            with open(self._status_path(job_id), 'w', encoding='utf-8') as f:
+                json.dump(info, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.warning("写入作业状态文件失败 %s: %s", job_id, e)
+        self._update(job_id, **changes)
+    
+    def _status_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+    
+    def _result_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.pkl")
+    
+    def status(self, job_id: str) -> Optional[JobInfo]:
+        """查询作业状态（内存中没有时从磁盘读取），ID格式无效或作业不存在时为 None"""
+        if not is_valid_job_id(job_id):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return JobInfo(**asdict(job))
+        
+        path = self._status_path(job_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return JobInfo(**json.load(f))
+    
+    def result(self, job_id: str) -> Optional[pd.DataFrame]:
+        """获取已完成作业的结果"""
+        if not is_valid_job_id(job_id):
+            return None
+        with self._lock:
+            if job_id in self._results:
+                return self._results[job_id]
+        
+        path = self._result_path(job_id)
+        if not os.path.exists(path):
+            return None
+        return pd.read_pickle(path)
+    
+    def result_path(self, job_id: str) -> Optional[str]:
+        """已完成作业结果文件的路径"""
+        if not is_valid_job_id(job_id):
+            return None
+        path = self._result_path(job_id)
+        return path if os.path.exists(path) else None
+    
+    def cancel(self, job_id: str) -> bool:
+        """请求取消作业"""
+        event = self._cancel_events.get(job_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+    
+    def list_jobs(self) -> List[JobInfo]:
+        """列出本进程提交的作业（按提交时间倒序）"""
+        with self._lock:
+            jobs = [JobInfo(**asdict(job)) for job in self._jobs.values()]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+    
+    def cleanup(self, now: datetime = None) -> int:
+        """
+        按保留策略删除已完成作业的状态和结果文件
+        
+        作业ID以提交时间开头，按ID排序即按时间排序；超过 max_age_hours 的作业，
+        以及最新 max_jobs 个之外的作业被删除。未完成的作业没有状态文件，不受影响。
+        
+        Returns:
+            删除的作业数
+        """
+        now = now or datetime.now()
+        finished = sorted(
+            (name[:-len('.json')] for name in os.listdir(self.jobs_dir) if name.endswith('.json')),
+            reverse=True,
+        )
+        finished = [job_id for job_id in finished if is_valid_job_id(job_id)]
+        
+        expired = set(finished[self.max_jobs:]) if self.max_jobs is not None else set()
+        if self.max_age_hours is not None:
+            cutoff = (now - timedelta(hours=self.max_age_hours)).strftime("%Y%m%d_%H%M%S")
+            expired.update(job_id for job_id in finished if job_id[:15] < cutoff)
+        
+        for job_id in expired:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self._results.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+            for path in (self._result_path(job_id), self._status_path(job_id)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning("删除过期作业文件失败 %s: %s", path, e)
+        return len(expired)
+
+
+# 创建全局作业管理器实例（Streamlit 各会话共享）
+job_manager = JobManager()
@@ -0,0 +1,197 @@
+"""
+利润风险模拟 - 对退款率、广告出价、成本等参数做蒙特卡洛抽样
+
+每次抽样都用 profit_arrays 的数组形式一次算完（按批处理以限制内存），
+汇总利润分位数、亏损概率以及 VaR / CVaR。固定随机种子时结果可复现，
+多个商品可按进程并行，每个商品使用由主种子派生的独立随机流，
+并行与否结果一致。
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Settings
+from .batch_engine import complete_frame, profit_arrays, refund_rates
+from .input_module import ProfitInput
+
+# 可以设置分布的参数（profit_arrays 的标量参数）
+SAMPLED_FIELDS = ('price', 'cost', 'other_cost', 'shipping_fee', 'commission_rate', 'ad_deal_price', 'refund_rate')
+
+# 比率类参数抽样后截断到 [0, 1]，其余截断到 >= 0
+RATE_FIELDS = ('commission_rate', 'refund_rate')
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """
+    参数分布
+
+    kind: fixed(params=(值,)) / beta(a, b) / normal(均值, 标准差) / lognormal(均值, 标准差，对数空间)
+          / uniform(下限, 上限) / triangular(下限, 众数, 上限)
+    """
+    kind: str
+    params: tuple
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        if self.kind == 'fixed':
+            return np.full(size, float(self.params[0]))
+        if self.kind == 'beta':
+            return rng.beta(*self.params, size=size)
+        if self.kind == 'normal':
+            return rng.normal(*self.params, size=size)
+        if self.kind == 'lognormal':
+            return rng.lognormal(*self.params, size=size)
+        if self.kind == 'uniform':
+            return rng.uniform(*self.params, size=size)
+        if self.kind == 'triangular':
+            return rng.triangular(*self.params, size=size)
+        raise ValueError(f"不支持的分布类型: {self.kind}")
+
+
+def beta_around(mean: float, concentration: float = None) -> Distribution:
+    """
+    以给定比率为均值的 Beta 分布
+
+    concentration 越大越集中（相当于样本量），默认取 MONTE_CARLO_CONFIG 中的值。
+    均值为0或1时退化为固定值。
+    """
+    if concentration is None:
+        concentration = Settings.MONTE_CARLO_CONFIG["rate_concentration"]
+    if mean <= 0 or mean >= 1:
+        return Distribution('fixed', (min(max(mean, 0.0), 1.0),))
+    return Distribution('beta', (mean * concentration, (1 - mean) * concentration))
+
+
+def summarize(profits: np.ndarray, confidence: float = None, quantiles=None) -> Dict[str, float]:
+    """
+    汇总模拟利润
+
+    VaR 为给定置信度下的最大亏损（利润低分位数取负，正数表示亏损），
+    CVaR 为低于该分位数部分的平均亏损。
+    """
+    config = Settings.MONTE_CARLO_CONFIG
+    confidence = confidence or config["confidence"]
+    quantiles = quantiles or config["quantiles"]
+
+    tail_cut = np.quantile(profits, 1 - confidence)
+    summary = {
+        '模拟次数': int(len(profits)),
+        '平均利润': float(profits.mean()),
+        '利润标准差': float(profits.std()),
+        '亏损概率': float((profits < 0).mean()),
+        'VaR': float(-tail_cut),
+        'CVaR': float(-profits[profits <= tail_cut].mean()),
+    }
+    for q, value in zip(quantiles, np.quantile(profits, quantiles)):
+        summary[f'P{q * 100:g}'] = float(value)
+    return summary
+
+
+def _base_values(inputs: Union[ProfitInput, Dict]) -> Dict:
+    """取出单个商品的点估计参数（平台扣点为小数）"""
+    row = vars(inputs) if isinstance(inputs, ProfitInput) else dict(inputs)
+    frame = complete_frame(pd.DataFrame([row]))
+    refund_rate, _ = refund_rates(frame)
+    values = {field: float(frame[field].iloc[0]) for field in SAMPLED_FIELDS if field != 'refund_rate'}
+    values['refund_rate'] = float(refund_rate[0])
+    values['ad_enabled'] = bool(frame['ad_enabled'].iloc[0])
+    return values
+
+
+def simulate_profit_draws(inputs: Union[ProfitInput, Dict], order_count: int = 100,
+                          distributions: Optional[Dict[str, Distribution]] = None,
+                          draws: int = None, seed=None, batch_size: int = None,
+                          multipliers: Optional[Dict[str, Distribution]] = None) -> np.ndarray:
+    """
+    返回每次抽样的总利润
+
+    Args:
+        inputs: 单个商品输入（ProfitInput 或字典，平台扣点为小数）
+        order_count: 分析订单数
+        distributions: 参数 -> 分布；未指定的参数取点估计，
+            退款率默认使用以当前退款率为均值的 Beta 分布
+        draws: 抽样次数
+        seed: 随机种子（整数或 np.random.SeedSequence）
+        batch_size: 每批抽样次数，限制中间数组的内存
+        multipliers: 参数 -> 相对点估计的倍数分布，如 normal(1, 0.1) 表示以当前值为均值、
+            标准差为当前值的10%；与 distributions 不能指定同一参数
+    """
+    config = Settings.MONTE_CARLO_CONFIG
+    draws = draws or config["draws"]
+    batch_size = batch_size or config["batch_size"]
+    base = _base_values(inputs)
+    distributions = distributions or {}
+    multipliers = multipliers or {}
+
+    specs = {field: Distribution('fixed', (base[field],)) for field in SAMPLED_FIELDS}
+    specs['refund_rate'] = beta_around(base['refund_rate'])
+    unknown = (set(distributions) | set(multipliers)) - set(SAMPLED_FIELDS)
+    if unknown:
+        raise ValueError(f"不支持抽样的参数: {', '.join(sorted(unknown))}")
+    overlap = set(distributions) & set(multipliers)
+    if overlap:
+        raise ValueError(f"参数不能同时指定分布和倍数: {', '.join(sorted(overlap))}")
+    specs.update(distributions)
+
+    rng = np.random.default_rng(seed)
+    profits = np.empty(draws)
+    for start in range(0, draws, batch_size):
+        size = min(batch_size, draws - start)
+        sampled = {}
+        for field in SAMPLED_FIELDS:
+            if field in multipliers:
+                values = multipliers[field].sample(rng, size) * base[field]
+            else:
+                values = specs[field].sample(rng, size)
+            sampled[field] = np.clip(values, 0, 1) if field in RATE_FIELDS else np.maximum(values, 0)
+        profits[start:start + size] = profit_arrays(
+            ad_enabled=base['ad_enabled'], order_count=order_count, **sampled
+        )['总利润']
+    return profits
+
+
+def simulate_profit(inputs: Union[ProfitInput, Dict], order_count: int = 100,
+                    distributions: Optional[Dict[str, Distribution]] = None,
+                    draws: int = None, seed=None, confidence: float = None,
+                    multipliers: Optional[Dict[str, Distribution]] = None) -> Dict[str, float]:
+    """模拟单个商品的利润分布并汇总（参数同 simulate_profit_draws）"""
+    profits = simulate_profit_draws(inputs, order_count, distributions, draws, seed, multipliers=multipliers)
+    return summarize(profits, confidence)
+
+
+def _simulate_row(args) -> Dict[str, float]:
+    """进程池任务：模拟一行（需为模块级函数以便序列化）"""
+    row, order_count, multipliers, draws, seed, confidence = args
+    return simulate_profit(row, order_count, draws=draws, seed=seed, confidence=confidence, multipliers=multipliers)
+
+
+def simulate_batch(inputs: pd.DataFrame, order_count: int = 100,
+                   multipliers: Optional[Dict[str, Distribution]] = None,
+                   draws: int = None, seed=None, confidence: float = None,
+                   processes: Optional[int] = None) -> pd.DataFrame:
+    """
+    逐个商品模拟，返回每个商品一行的汇总表（索引与输入一致）
+
+    multipliers 为相对各商品自身取值的倍数分布（如成本 normal(1, 0.1)），
+    不接受绝对分布，否则所有商品会抽到相同的成本或售价；退款率默认按各商品的退款率
+    取 Beta 分布。每个商品的随机流由 seed 派生（SeedSequence.spawn），
+    结果与是否并行无关。processes 大于1时用进程池并行。
+    """
+    rows = inputs.to_dict('records')
+    seeds = np.random.SeedSequence(seed).spawn(len(rows))
+    tasks = [(row, order_count, multipliers, draws, child, confidence) for row, child in zip(rows, seeds)]
+
+    if processes and processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            summaries = list(executor.map(_simulate_row, tasks))
+    else:
+        summaries = [_simulate_row(task) for task in tasks]
+
+    result = pd.DataFrame(summaries, index=inputs.index)
+    if 'model_name' in inputs.columns:
+        result.insert(0, '商品型号', inputs['model_name'].to_numpy())
+    return result
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单明细导入 - 把订单级导出文件汇总为 ProfitInput 的销量/退货/成交字段
+
+按块流式读取CSV，每块按 商品型号（及时间窗口）做分组求和，部分结果定期合并，
+内存只与分组数有关而与订单行数无关。输出可直接作为批量引擎的输入：
+    python -m src.order_ingest orders.csv --freq W --costs costs.csv --output 汇总.csv
+"""
+
+import argparse
+import logging
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Settings
+from .batch_engine import calculate_profit_frame
+from .input_schema import parse_inputs
+
+logger = logging.getLogger(__name__)
+
+# 从成本表合并的字段（售价使用订单实收均价；未填扣点时按 category 查类目扣点，
+# 未填运费时按 weight / shipping_class / carrier 估算）
+COST_FIELDS = ['cost', 'other_cost', 'shipping_fee', 'commission_rate', 'category', 'ad_deal_price', 'ad_enabled',
+               'weight', 'shipping_class', 'carrier']
+
+
+def _is_blank(values: pd.Series) -> pd.Series:
+    """空单元格或只含空白字符"""
+    return values.isna() | (values.astype(str).str.strip() == '')
+
+
+def _chunk_aggregates(chunk: pd.DataFrame, columns: Dict[str, str], refund_pattern: str,
+                      freq: Optional[str]) -> pd.DataFrame:
+    """
+    单块订单的分组计数
+
+    每行一个订单：售后状态含退款关键词即为退款，退款且未发货为秒退；
+    销量、退货数量只统计已发货订单的商品件数。
+    """
+    keys = {'model_name': chunk[columns['sku']].str.strip()}
+    valid = ~_is_blank(chunk[columns['sku']])
+    if freq:
+        paid_at = pd.to_datetime(chunk[columns['paid_at']], errors='coerce')
+        keys['window_start'] = paid_at.dt.to_period(freq).dt.start_time
+        valid &= paid_at.notna()
+
+    quantity = pd.to_numeric(chunk[columns['quantity']], errors='coerce').fillna(0)
+    refunded = chunk[columns['after_sale']].fillna('').str.contains(refund_pattern, regex=True)
+    shipped = ~_is_blank(chunk[columns['shipped_at']])
+    amount_column = columns.get('amount')
+    amount = (pd.to_numeric(chunk[amount_column], errors='coerce').fillna(0.0)
+              if amount_column in chunk.columns else 0.0)
+
+    parts = pd.DataFrame({
+        **keys,
+        'deal_orders': 1,
+        'instant_refunds': (refunded & ~shipped).astype(np.int64),
+        'sales_volume': quantity.where(shipped, 0),
+        'return_quantity': quantity.where(shipped & refunded, 0),
+        'quantity': quantity,
+        'amount': amount,
+    })[valid]
+    return parts.groupby(list(keys), sort=False).sum()
+
+
+def _merge(partials: List[pd.DataFrame]) -> pd.DataFrame:
+    """合并多块的部分结果（同一分组求和）"""
+    combined = pd.concat(partials)
+    return combined.groupby(level=list(range(combined.index.nlevels)), sort=False).sum()
+
+
+def ingest_orders(path: str, freq: Optional[str] = None, columns: Dict[str, str] = None,
+                  refund_keywords: List[str] = None, chunk_size: int = None,
+                  encoding: str = 'utf-8-sig') -> pd.DataFrame:
+    """
+    流式读取订单明细CSV，按商品型号（及时间窗口）汇总
+
+    Args:
+        path: 订单导出文件
+        freq: 时间窗口，如 "D"（日）、"W"（周）、"M"（月）；None 表示整个文件汇总为一组
+        columns: 字段 -> 表头 的映射，默认 Settings.ORDER_IMPORT_CONFIG["columns"]
+        refund_keywords: 售后状态中表示已退款的关键词
+        chunk_size: 每次读取的行数
+        encoding: 文件编码（后台导出为GBK时传 "gbk"）
+
+    Returns:
+        每个分组一行：model_name、（window_start）、sales_volume、return_quantity、
+        deal_orders、net_deal_orders 以及 price（实收金额/件数，无金额列时不输出）
+    """
+    config = Settings.ORDER_IMPORT_CONFIG
+    columns = {**config["columns"], **(columns or {})}
+    refund_keywords = refund_keywords or config["refund_keywords"]
+    chunk_size = chunk_size or config["chunk_size"]
+    refund_pattern = '|'.join(re.escape(keyword) for keyword in refund_keywords)
+
+    header = pd.read_csv(path, nrows=0, encoding=encoding).columns
+    required = ['sku', 'quantity', 'shipped_at', 'after_sale'] + (['paid_at'] if freq else [])
+    missing = [columns[field] for field in required if columns[field] not in header]
+    if missing:
+        raise ValueError(f"订单文件缺少列: {', '.join(missing)}")
+    usecols = [name for name in columns.values() if name in header]
+    # 文本列按字符串读取（保留编码前导零）；数量、金额交给C解析器直接转为数值
+    text_dtypes = {columns[field]: str for field in ('sku', 'paid_at', 'shipped_at', 'after_sale')
+                   if columns[field] in header}
+
+    partials, pending_rows, total_rows = [], 0, 0
+    reader = pd.read_csv(path, usecols=usecols, dtype=text_dtypes, chunksize=chunk_size, encoding=encoding)
+    for chunk in reader:
+        total_rows += len(chunk)
+        partial = _chunk_aggregates(chunk, columns, refund_pattern, freq)
+        partials.append(partial)
+        pending_rows += len(partial)
+        # 部分结果累积到一定规模就先合并，避免分组数很多时占用过多内存
+        if pending_rows > chunk_size and len(partials) > 1:
+            partials = [_merge(partials)]
+            pending_rows = len(partials[0])
+
+    if not partials:
+        return pd.DataFrame(columns=['model_name', 'sales_volume', 'return_quantity',
+                                     'deal_orders', 'net_deal_orders'])
+
+    totals = _merge(partials).sort_index()
+    skipped = total_rows - int(totals['deal_orders'].sum())
+    if skipped:
+        logger.warning("跳过 %d 行缺少商品型号或支付时间的订单", skipped)
+
+    result = totals.reset_index()
+    for column in ('deal_orders', 'instant_refunds', 'sales_volume', 'return_quantity'):
+        result[column] = result[column].round().astype(np.int64)
+    result['net_deal_orders'] = result['deal_orders'] - result['instant_refunds']
+    if columns.get('amount') in header:
+        quantity = result['quantity'].to_numpy(dtype=float)
+        result['price'] = np.divide(result['amount'].to_numpy(dtype=float), quantity,
+                                    out=np.zeros(len(result)), where=quantity > 0)
+    return result.drop(columns=['instant_refunds', 'quantity', 'amount'])
+
+
+def attach_costs(aggregates: pd.DataFrame, costs: pd.DataFrame) -> pd.DataFrame:
+    """
+    按商品型号合并成本表（parse_inputs 解析后的输入表）
+
+    成本表中没有的商品保持为空，批量引擎按缺省值（0）计算。
+    """
+    cost_columns = ['model_name'] + [field for field in COST_FIELDS if field in costs.columns]
+    merged = aggregates.merge(costs[cost_columns].drop_duplicates('model_name', keep='last'),
+                              on='model_name', how='left')
+    unmatched = ~aggregates['model_name'].isin(costs['model_name'])
+    if unmatched.any():
+        logger.warning("%d 个商品型号在成本表中不存在", aggregates.loc[unmatched, 'model_name'].nunique())
+    return merged
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='订单明细导入：按商品型号和时间窗口汇总销量、退货与成交数据')
+    parser.add_argument('orders', help='订单导出CSV文件')
+    parser.add_argument('--freq', help='时间窗口，如 D、W、M（默认整个文件汇总）')
+    parser.add_argument('--costs', help='成本表CSV（列同批量分析，如 model_name、cost、commission_rate）')
+    parser.add_argument('--output', default='order_aggregates.csv', help='输出CSV文件')
+    parser.add_argument('--encoding', default='utf-8-sig', help='订单文件编码')
+    parser.add_argument('--chunk-size', type=int, help='每次读取的行数')
+    parser.add_argument('--calculate', action='store_true',
+                        help='同时计算利润（以各分组的成交订单数为分析订单数）')
+    args = parser.parse_args(argv)
+
+    aggregates = ingest_orders(args.orders, freq=args.freq, chunk_size=args.chunk_size, encoding=args.encoding)
+    if args.costs:
+        parsed = parse_inputs(pd.read_csv(args.costs))
+        if len(parsed.errors):
+            print(f"⚠️ 成本表有 {parsed.error_rows} 行数据有误，已跳过")
+        aggregates = attach_costs(aggregates, parsed.frame)
+
+    output = aggregates
+    if args.calculate:
+        inputs = aggregates.assign(analysis_orders=aggregates['deal_orders'])
+        results = calculate_profit_frame(inputs)
+        output = aggregates.join(results.drop(columns=['商品型号', '销量', '退货数量', '成交订单数', '净成交订单数']))
+
+    output.to_csv(args.output, index=False, encoding='utf-8-sig')
+    print(f"📦 已汇总 {int(aggregates['deal_orders'].sum())} 个订单为 {len(aggregates)} 组: {args.output}")
+    return output
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,23 @@
+import os
+import re
+from datetime import datetime
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 import streamlit as st
-from typing import Dict
+from typing import Dict, Iterable, List
+
+from openpyxl import Workbook
+
+from config.settings import Settings
+from .batch_engine import COST_ITEMS, frame_to_results
+from .risk_screening import ERROR_FLAG_COLUMN, WARNING_FLAG_COLUMN
+from .rollups import DIMENSION_COLUMNS
+from .downsampling import lttb, minmax_downsample, top_n_with_others, histogram_bins
 
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS']
 plt.rcParams['axes.unicode_minus'] = False
@@ -88,6 +101,59 @@ def plot_cost_breakdown(cost_breakdown: Dict):
     plt.axis('equal')
     plt.show()
 
+CHART_FORMATS = ("png", "svg")
+
+class CostChartRenderer:
+    """
+    无界面的成本构成图渲染器
+    
+    直接使用 Figure + Agg 画布，不依赖 pyplot 和图形界面后端，可在服务器或
+    批处理中运行。多次渲染复用同一个 Figure，每次渲染前清空坐标轴。
+    """
+    
+    def __init__(self, figsize=(10, 6), dpi: int = 100):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111)
+    
+    def render(self, cost_breakdown: Dict, filename: str, title: str = '成本构成分析') -> str:
+        """绘制成本构成饼图并保存，格式由文件后缀决定（png/svg）"""
+        self.ax.clear()
+        self.ax.pie(list(cost_breakdown.values()), labels=list(cost_breakdown.keys()),
+                    autopct='%1.1f%%', startangle=90)
+        self.ax.set_title(title)
+        self.ax.axis('equal')
+        self.figure.savefig(filename)
+        return filename
+    
+    def close(self):
+        """释放图表"""
+        self.figure.clear()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+def chart_filename(model_name: str, fmt: str = "png", output_dir: str = None) -> str:
+    """生成图表文件路径：<输出目录>/cost_breakdown_<商品型号>_<时间戳>.<格式>"""
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"不支持的图表格式: {fmt}")
+    safe_name = re.sub(r'[\\/:*?"<>|\s]+', '_', model_name or '') or 'product'
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    return os.path.join(output_dir or Settings.OUTPUT_DIR, f"cost_breakdown_{safe_name}_{timestamp}.{fmt}")
+
+def save_cost_breakdown_charts(results: Iterable[Dict], fmt: str = "png", output_dir: str = None) -> List[str]:
+    """批量保存成本构成图（共用一个 Figure），返回文件路径列表"""
+    paths = []
+    with CostChartRenderer() as renderer:
+        for result in results:
+            model_name = result.get('商品型号', '')
+            title = f"成本构成分析 - {model_name}" if model_name else '成本构成分析'
+            paths.append(renderer.render(result['成本构成'], chart_filename(model_name, fmt, output_dir), title))
+    return paths
+
 def create_streamlit_report(result: Dict):
     """创建Streamlit报告界面"""
     st.subheader("📊 利润分析报告")
@@ -271,19 +337,42 @@ def create_streamlit_report(result: Dict):
             for key, formula in formulas['保本分析'].items():
                 st.write(f"- {key}: `{formula}`")
 
+def downsample_line(x, y):
+    """按 CHART_CONFIG 对折线数据降采样，返回 (x, y, 原始点数)"""
+    config = Settings.CHART_CONFIG
+    total = len(x)
+    if total <= config["max_line_points"]:
+        return x, y, total
+    if total > config["minmax_threshold"]:
+        x, y = minmax_downsample(x, y, config["max_line_points"] // 2)
+    else:
+        x, y = lttb(x, y, config["max_line_points"])
+    return x, y, total
+
 def create_profit_trend_chart(prices: list, profits: list):
-    """创建利润趋势图"""
+    """创建利润趋势图（点数过多时降采样，并改用 WebGL 渲染）"""
+    config = Settings.CHART_CONFIG
+    x, y, total = downsample_line(prices, profits)
+    
+    # 点数较多时省略标记点，并切换为 WebGL 轨迹减轻浏览器负担
+    scatter = go.Scattergl if total > config["webgl_threshold"] else go.Scatter
+    mode = 'lines+markers' if len(x) <= config["max_line_points"] // 4 else 'lines'
+    
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=prices,
-        y=profits,
-        mode='lines+markers',
+    fig.add_trace(scatter(
+        x=x,
+        y=y,
+        mode=mode,
         name='利润',
         line=dict(color='green', width=2)
     ))
     
+    title = '不同售价下的利润变化'
+    if len(x) < total:
+        title += f'（{total}个点降采样至{len(x)}个）'
+    
     fig.update_layout(
-        title='不同售价下的利润变化',
+        title=title,
         xaxis_title='售价 (元)',
         yaxis_title='利润 (元)',
         hovermode='x unified'
@@ -291,6 +380,45 @@ def create_profit_trend_chart(prices: list, profits: list):
     
     return fig
 
+def create_batch_profit_chart(results_df: pd.DataFrame):
+    """创建批量利润对比图（商品较多时只显示利润最高的N个，其余显示为平均值）"""
+    top_n = Settings.CHART_CONFIG["bar_top_n"]
+    labels = results_df['商品型号'].where(results_df['商品型号'] != '', results_df.index.astype(str))
+    bars = top_n_with_others(labels, results_df['总利润'], top_n)
+    
+    title = '各商品利润对比'
+    if len(results_df) > top_n:
+        title += f'（前{top_n}名）'
+    
+    # 按位置画柱、刻度显示型号，同名商品不会被 plotly 合并成一根柱
+    positions = list(range(len(bars)))
+    fig = go.Figure(go.Bar(
+        x=positions,
+        y=bars['数值'],
+        customdata=bars[['标签', '数量', '合计']],
+        hovertemplate='%{customdata[0]}<br>总利润: %{y:.2f} 元<br>'
+                      '商品数: %{customdata[1]}，合计: %{customdata[2]:.2f} 元<extra></extra>',
+        name='总利润'
+    ))
+    fig.update_layout(title=title, xaxis_title='商品', yaxis_title='总利润 (元)',
+                      xaxis=dict(tickmode='array', tickvals=positions, ticktext=list(bars['标签'])))
+    return fig
+
+def create_profit_histogram(results_df: pd.DataFrame):
+    """创建利润分布直方图（预先分箱，只传箱计数给浏览器）"""
+    bins = histogram_bins(results_df['总利润'], Settings.CHART_CONFIG["histogram_bins"])
+    
+    fig = go.Figure(go.Bar(
+        x=bins['中点'],
+        y=bins['数量'],
+        width=(bins['右边界'] - bins['左边界']),
+        customdata=bins[['左边界', '右边界']],
+        hovertemplate='%{customdata[0]:.2f} ~ %{customdata[1]:.2f} 元<br>商品数: %{y}<extra></extra>',
+        name='商品数'
+    ))
+    fig.update_layout(title='利润分布', xaxis_title='总利润 (元)', yaxis_title='商品数', bargap=0)
+    return fig
+
 def export_to_excel(result: Dict, filename: str = "profit_analysis.xlsx"):
     """导出结果到Excel"""
     import pandas as pd
@@ -343,4 +471,82 @@ def export_to_excel(result: Dict, filename: str = "profit_analysis.xlsx"):
         if formulas_data:
             pd.DataFrame(formulas_data).to_excel(writer, sheet_name='计算公式', index=False)
     
-    return filename 
\ No newline at end of file
+    return filename
+
+# 批量报告"利润汇总"表的列（结果表中的列名）
+BATCH_SUMMARY_COLUMNS = [
+    '商品型号', '销量', '退货数量', '成交订单数', '净成交订单数', '退款率', '秒退率',
+    '总利润', '单均利润', '利润率', '总收入', '总成本', '保本售价',
+    '广告启用', '广告费用', '保本广告出价', '当前ROI', '保本ROI',
+]
+
+SIDECAR_FORMATS = ("csv", "parquet")
+
+def _sheet_rows(frame: pd.DataFrame, chunk_size: int):
+    """按块把 DataFrame 转为行元组（NaN 转为空单元格），避免一次性复制整表"""
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size].astype(object)
+        yield from chunk.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+def export_batch_to_excel(results: pd.DataFrame, filename: str = "batch_profit_analysis.xlsx",
+                          inputs: pd.DataFrame = None, sidecars=(), chunk_size: int = 1000) -> Dict[str, str]:
+    """
+    导出批量结果到一个Excel工作簿
+    
+    使用 openpyxl 的只写模式逐行写入，内存占用不随商品数增长。工作表：
+    利润汇总（每个商品一行）、成本明细（每个商品一行，各成本项一列）、
+    计算公式（提供 inputs 时生成，每个商品每条公式一行）。
+    
+    Args:
+        results: calculate_profit_frame 的结果表
+        filename: Excel文件路径
+        inputs: 对应的输入表（平台扣点为小数）；为None时不生成计算公式表
+        sidecars: 额外导出的格式，可选 "csv"、"parquet"，与Excel同名不同后缀
+        chunk_size: 每次转换的行数
+        
+    Returns:
+        格式 -> 文件路径
+    """
+    unknown = set(sidecars) - set(SIDECAR_FORMATS)
+    if unknown:
+        raise ValueError(f"不支持的附带导出格式: {', '.join(sorted(unknown))}")
+    
+    workbook = Workbook(write_only=True)
+    
+    # 结果中含分组维度、风险筛查标记时一并导出
+    summary_columns = BATCH_SUMMARY_COLUMNS + [
+        column for column in (*DIMENSION_COLUMNS.values(), ERROR_FLAG_COLUMN, WARNING_FLAG_COLUMN)
+        if column in results.columns
+    ]
+    summary = workbook.create_sheet('利润汇总')
+    summary.append(summary_columns)
+    for row in _sheet_rows(results[summary_columns], chunk_size):
+        summary.append(row)
+    
+    costs = workbook.create_sheet('成本明细')
+    costs.append(['商品型号'] + COST_ITEMS)
+    for row in _sheet_rows(results[['商品型号'] + COST_ITEMS], chunk_size):
+        costs.append(row)
+    
+    if inputs is not None:
+        formulas_sheet = workbook.create_sheet('计算公式')
+        formulas_sheet.append(['商品型号', '分类', '项目', '计算公式'])
+        for start in range(0, len(results), chunk_size):
+            chunk = frame_to_results(results.iloc[start:start + chunk_size],
+                                     inputs.iloc[start:start + chunk_size])
+            for result in chunk:
+                for category, category_formulas in result['计算公式'].items():
+                    for key, formula in category_formulas.items():
+                        formulas_sheet.append([result['商品型号'], category, key, formula])
+    
+    workbook.save(filename)
+    
+    written = {"xlsx": filename}
+    base = os.path.splitext(filename)[0]
+    if "csv" in sidecars:
+        written["csv"] = base + ".csv"
+        results.to_csv(written["csv"], index=False, encoding='utf-8-sig')
+    if "parquet" in sidecars:
+        written["parquet"] = base + ".parquet"
+        results.to_parquet(written["parquet"], index=False)
+    return written
@@ -0,0 +1,103 @@
+"""
+批量结果排名 - Top-K / Bottom-K 查询
+
+用 argpartition 先选出候选（O(n)），只对这 k 个（及并列项）排序，
+大目录下不需要对整表排序。支持多键排序和分组（如类目）内的 Top-K。
+"""
+
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .batch_engine import safe_divide
+
+# 可用于排名的指标（结果表中的列，或由 ranking_metrics 计算）
+RANKING_METRICS = ['总利润', '利润率', '单均利润', '保本差距']
+
+
+def ranking_metrics(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    排名用的指标列
+
+    保本差距 = 售价 - 保本售价（售价由 总收入 / 订单总数 得出），越大越安全。
+    """
+    price = safe_divide(results['总收入'], results['订单总数'])
+    return pd.DataFrame({
+        '总利润': results['总利润'].to_numpy(dtype=float),
+        '利润率': results['利润率'].to_numpy(dtype=float),
+        '单均利润': results['单均利润'].to_numpy(dtype=float),
+        '保本差距': price - results['保本售价'].to_numpy(dtype=float),
+    }, index=results.index)
+
+
+def top_k_indices(values, k: int, largest: bool = True) -> np.ndarray:
+    """
+    返回前 k 个值的位置（按值排序，NaN 排在最后，不会被选中除非不足 k 个）
+
+    Args:
+        values: 一维数组
+        k: 数量
+        largest: True 取最大的 k 个，False 取最小的 k 个
+    """
+    values = np.asarray(values, dtype=float)
+    keys = -values if largest else values.copy()
+    keys[np.isnan(keys)] = np.inf
+    k = min(k, len(keys))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(keys):
+        candidates = np.argpartition(keys, k - 1)[:k]
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.argsort(keys[candidates], kind='stable')]
+
+
+def top_k(frame: pd.DataFrame, column: str, k: int, largest: bool = True) -> pd.DataFrame:
+    """按单列取前 k 行（已排序）"""
+    return frame.iloc[top_k_indices(frame[column].to_numpy(), k, largest)]
+
+
+def top_k_multi(frame: pd.DataFrame, keys: Sequence[Tuple[str, bool]], k: int) -> pd.DataFrame:
+    """
+    按多个键取前 k 行
+
+    Args:
+        keys: [(列名, 是否取大值优先), ...]，第一个为主键，其后依次用于打破并列
+
+    先用 argpartition 按主键找出第 k 名的值，保留所有不差于它的行（含并列），
+    再只对这些候选做多键排序。
+    """
+    if not keys:
+        raise ValueError("至少需要一个排序键")
+    sort_keys = []
+    for column, largest in keys:
+        values = frame[column].to_numpy(dtype=float)
+        values = -values if largest else values.copy()
+        values[np.isnan(values)] = np.inf
+        sort_keys.append(values)
+
+    primary = sort_keys[0]
+    k = min(k, len(primary))
+    if k <= 0:
+        return frame.iloc[:0]
+    threshold = np.partition(primary, k - 1)[k - 1]
+    candidates = np.flatnonzero(primary <= threshold)
+    # np.lexsort 以最后一个键为主键
+    order = np.lexsort([key[candidates] for key in reversed(sort_keys)])
+    return frame.iloc[candidates[order[:k]]]
+
+
+def top_k_by_group(frame: pd.DataFrame, group: Union[str, List[str]], column: str, k: int,
+                   largest: bool = True) -> pd.DataFrame:
+    """
+    每组（如每个类目）取前 k 行，结果按组、组内名次排列
+
+    用组内名次（rank）筛选，不做整表排序；只对选出的行排序输出。
+    """
+    ranks = frame.groupby(group, sort=False, observed=True)[column].rank(
+        method='first', ascending=not largest, na_option='bottom'
+    )
+    selected = frame[ranks <= k].assign(组内排名=ranks[ranks <= k].astype(int))
+    group_columns = [group] if isinstance(group, str) else list(group)
+    return selected.sort_values(group_columns + ['组内排名'], kind='stable')
@@ -0,0 +1,109 @@
+"""
+批量风险筛查 - Settings.validate_input 的向量化版本
+
+对整个输入表（以及可选的计算结果表）一次性应用 RISK_CONFIG 中的限制和预警阈值，
+返回逐行的布尔掩码，以及可直接附加到结果表上的文字标记列。
+"""
+
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Settings
+from .batch_engine import complete_frame, refund_rates, safe_divide
+
+ERROR_FLAG_COLUMN = '风险错误'
+WARNING_FLAG_COLUMN = '风险警告'
+
+
+@dataclass
+class ScreeningResult:
+    """筛查结果：errors / warnings 每条规则一列布尔掩码，索引与输入一致"""
+    errors: pd.DataFrame
+    warnings: pd.DataFrame
+
+    @property
+    def error_mask(self) -> pd.Series:
+        """违反任一限制的行"""
+        return self.errors.any(axis=1)
+
+    @property
+    def warning_mask(self) -> pd.Series:
+        """触发任一预警的行"""
+        return self.warnings.any(axis=1)
+
+    def flags(self) -> pd.DataFrame:
+        """把掩码合并为两列文字标记（多条规则以"；"分隔，无问题为空字符串）"""
+        return pd.DataFrame({
+            ERROR_FLAG_COLUMN: _join_labels(self.errors),
+            WARNING_FLAG_COLUMN: _join_labels(self.warnings),
+        }, index=self.errors.index)
+
+    def summary(self) -> Dict[str, int]:
+        """每条规则命中的行数"""
+        counts = pd.concat([self.errors, self.warnings], axis=1).sum()
+        return {label: int(count) for label, count in counts.items()}
+
+
+def _join_labels(masks: pd.DataFrame) -> pd.Series:
+    """
+    拼接每行命中规则的名称
+
+    先把各列掩码编码为整数位图，只为出现过的组合生成一次文字，再按编码取值，
+    避免对每行做字符串拼接。
+    """
+    labels = list(masks.columns)
+    codes = masks.to_numpy(dtype=np.int64) @ (1 << np.arange(len(labels), dtype=np.int64))
+    unique, inverse = np.unique(codes, return_inverse=True)
+    texts = np.array(['；'.join(label for bit, label in enumerate(labels) if code >> bit & 1)
+                      for code in unique], dtype=object)
+    return pd.Series(texts[inverse.reshape(-1)], index=masks.index, dtype=object)
+
+
+def screen_inputs(inputs: pd.DataFrame, results: pd.DataFrame = None,
+                  risk_config: Dict = None) -> ScreeningResult:
+    """
+    批量检查输入（及结果）是否超出风险限制
+
+    Args:
+        inputs: 批量引擎输入表（平台扣点、退款率为小数）
+        results: 对应的 calculate_profit_frame 结果；提供时才检查依赖利润的预警
+        risk_config: 风险配置，默认 Settings.RISK_CONFIG
+
+    Returns:
+        ScreeningResult；errors 对应 validate_input 的各项限制，warnings 对应预警阈值
+    """
+    config = risk_config or Settings.RISK_CONFIG
+    thresholds = config['warning_thresholds']
+    frame = complete_frame(inputs)
+
+    price = frame['price'].to_numpy(dtype=float)
+    cost = frame['cost'].to_numpy(dtype=float)
+    commission_rate = frame['commission_rate'].to_numpy(dtype=float)
+    ad_deal_price = frame['ad_deal_price'].to_numpy(dtype=float)
+    ad_enabled = frame['ad_enabled'].to_numpy(dtype=bool)
+    refund_rate, _ = refund_rates(frame)
+    # 广告费用占售价的比例（仅对启用广告的商品检查）
+    ad_cost_ratio = np.where(ad_enabled, safe_divide(ad_deal_price, np.where(price > 0, price, 0)), 0.0)
+
+    errors = pd.DataFrame({
+        '售价无效': price <= 0,
+        '成本为负': cost < 0,
+        '扣点超限': (commission_rate < 0) | (commission_rate > config['max_commission_rate']),
+        '退款率超限': (refund_rate < 0) | (refund_rate > config['max_refund_rate']),
+        '广告出价为负': ad_deal_price < 0,
+        '广告占比超限': ad_cost_ratio > config['max_ad_cost_ratio'],
+    }, index=frame.index)
+
+    warnings = {'高退款': refund_rate > thresholds['high_refund']}
+    if results is not None:
+        revenue = results['总收入'].to_numpy(dtype=float)
+        profit_rate = results['利润率'].to_numpy(dtype=float) / 100
+        warnings['利润率低于下限'] = profit_rate < config['min_profit_margin']
+        warnings['低利润'] = profit_rate < thresholds['low_profit']
+        warnings['高成本'] = safe_divide(results['总成本'], revenue) > thresholds['high_cost']
+        warnings['高广告费'] = safe_divide(results['广告费用'], revenue) > thresholds['high_ad_cost']
+
+    return ScreeningResult(errors=errors, warnings=pd.DataFrame(warnings, index=frame.index))
@@ -0,0 +1,110 @@
+"""
+批量结果分组汇总 - 按类目、店铺、价格带汇总利润指标
+
+直接在列式结果表上做一次 groupby 求和（分组键为 category 类型），再由各组的
+合计推出加权指标，百万行也无需逐行构造字典或透视表。
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Settings
+from .batch_engine import safe_divide
+
+# 输入列 -> 结果表中的维度列
+DIMENSION_COLUMNS = {'category': '类目', 'store': '店铺'}
+
+PRICE_BAND = '价格带'
+
+# 可用的分组维度
+DIMENSIONS = list(DIMENSION_COLUMNS.values()) + [PRICE_BAND]
+
+# 维度值缺失时的分组名
+UNSET_LABEL = '未填写'
+
+ROLLUP_COLUMNS = [
+    '商品数', '总收入', '总利润', '利润率', '广告费用', '广告费占比',
+    '保本商品数', '保本覆盖率', '退款广告损失', '退款损失占比',
+]
+
+
+def attach_dimensions(results: pd.DataFrame, inputs: pd.DataFrame) -> pd.DataFrame:
+    """把输入表中的分组维度（类目、店铺）附加到结果表，没有的维度不添加"""
+    dimensions = {label: inputs[column] for column, label in DIMENSION_COLUMNS.items() if column in inputs.columns}
+    return results.assign(**dimensions) if dimensions else results
+
+
+def available_dimensions(results: pd.DataFrame) -> List[str]:
+    """结果表可用的分组维度（价格带总是可用）"""
+    return [dimension for dimension in DIMENSIONS if dimension == PRICE_BAND or dimension in results.columns]
+
+
+def _unit_price(results: pd.DataFrame) -> np.ndarray:
+    """售价（总收入 / 订单总数）"""
+    return safe_divide(results['总收入'], results['订单总数'])
+
+
+def price_bands(prices, edges: Sequence[float] = None) -> pd.Categorical:
+    """
+    把售价划分为价格带，如 "10-20"、"200以上"（左闭右开）
+
+    Args:
+        prices: 售价数组
+        edges: 分界点（升序），默认 ROLLUP_CONFIG["price_bands"]
+    """
+    edges = list(edges or Settings.ROLLUP_CONFIG["price_bands"])
+    labels = [f"{low:g}-{high:g}" for low, high in zip(edges, edges[1:])] + [f"{edges[-1]:g}以上"]
+    return pd.cut(np.asarray(prices, dtype=float), bins=edges + [np.inf], labels=labels, right=False)
+
+
+def _dimension_values(results: pd.DataFrame, dimension: str, edges) -> pd.Categorical:
+    """取出分组键（缺失值归入"未填写"）"""
+    if dimension == PRICE_BAND:
+        return price_bands(_unit_price(results), edges)
+    if dimension not in results.columns:
+        raise ValueError(f"结果表中没有分组维度: {dimension}")
+    values = pd.Categorical(results[dimension])
+    if values.isna().any():
+        values = values.add_categories([UNSET_LABEL]).fillna(UNSET_LABEL)
+    return values
+
+
+def rollup(results: pd.DataFrame, by: Sequence[str], edges: Sequence[float] = None) -> pd.DataFrame:
+    """
+    按维度汇总批量结果
+
+    Args:
+        results: calculate_profit_frame 的结果（类目、店铺维度需先 attach_dimensions）
+        by: 分组维度，取自 DIMENSIONS，如 ['类目'] 或 ['店铺', '价格带']
+        edges: 价格带分界点
+
+    Returns:
+        每组一行，索引为分组键：
+        利润率为收入加权（组总利润 / 组总收入），保本覆盖率为售价不低于保本售价的商品占比，
+        退款损失占比为该组退款广告损失占全部的比例（百分数）
+    """
+    by = list(by)
+    if not by:
+        raise ValueError("至少需要一个分组维度")
+
+    price = _unit_price(results)
+    metrics = pd.DataFrame({
+        '商品数': np.ones(len(results), dtype=np.int64),
+        '总收入': results['总收入'].to_numpy(dtype=float),
+        '总利润': results['总利润'].to_numpy(dtype=float),
+        '广告费用': results['广告费用'].to_numpy(dtype=float),
+        '保本商品数': (price >= results['保本售价'].to_numpy(dtype=float)).astype(np.int64),
+        '退款广告损失': results['退款广告损失'].to_numpy(dtype=float),
+    })
+    keys = [_dimension_values(results, dimension, edges) for dimension in by]
+    totals = metrics.groupby(keys, observed=True, sort=True).sum()
+    totals.index.names = by
+
+    totals['利润率'] = safe_divide(totals['总利润'], totals['总收入']) * 100
+    totals['广告费占比'] = safe_divide(totals['广告费用'], totals['总收入']) * 100
+    totals['保本覆盖率'] = safe_divide(totals['保本商品数'], totals['商品数']) * 100
+    totals['退款损失占比'] = safe_divide(totals['退款广告损失'], totals['退款广告损失'].sum()) * 100
+    return totals[ROLLUP_COLUMNS]
+
@@ -0,0 +1,199 @@
+"""
+运费估算 - 按重量或运费等级向量化估算单件运费
+
+没有逐个商品运费时，用 PINDUODUO_CONFIG["shipping_fee_ranges"] 的等级运费范围估算：
+重量先用 searchsorted 分到轻货/重货/特殊等级，再在该等级的运费范围内按重量插值。
+也可以加载快递公司的阶梯运价表（CSV），有重量的商品优先按运价表计算。
+行内填写的 shipping_fee 始终优先。
+"""
+
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Settings
+from .input_schema import SHIPPING_HINT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# 运价表中表示默认快递公司的名称（CSV 没有 carrier 列时使用）
+DEFAULT_CARRIER = '默认'
+
+
+class CarrierRates:
+    """
+    单个快递公司的阶梯运价
+
+    每档：重量上限 max_weight（最后一档可无上限）、该档运费 fee、
+    超出该档下限部分的每公斤续重费 per_kg。例如首重1kg 5元、续重2元/kg：
+    (1, 5, 0) 与 (无上限, 5, 2)。
+    """
+
+    def __init__(self, max_weight, fee, per_kg=None):
+        self.max_weight = np.asarray(max_weight, dtype=float)
+        self.fee = np.asarray(fee, dtype=float)
+        self.per_kg = np.zeros(len(self.fee)) if per_kg is None else np.asarray(per_kg, dtype=float)
+        if np.any(np.diff(self.max_weight) <= 0):
+            raise ValueError("运价表的重量上限必须递增且不重复")
+        self.min_weight = np.concatenate([[0.0], self.max_weight[:-1]])
+
+    def fees(self, weights) -> np.ndarray:
+        """按重量计算运费，超过最后一档上限或重量缺失时为 NaN"""
+        weights = np.asarray(weights, dtype=float)
+        tier = np.searchsorted(self.max_weight, weights, side='left')
+        covered = (tier < len(self.max_weight)) & ~np.isnan(weights)
+        tier = np.minimum(tier, len(self.max_weight) - 1)
+        extra = np.maximum(weights - self.min_weight[tier], 0) * self.per_kg[tier]
+        return np.where(covered, self.fee[tier] + extra, np.nan)
+
+
+class ShippingEstimator:
+    """运费估算器：等级运费范围 + 可选的快递公司运价表"""
+
+    def __init__(self, fee_ranges: Dict[str, tuple] = None, weight_bounds: Dict[str, tuple] = None,
+                 class_aliases: Dict[str, str] = None):
+        config = Settings.SHIPPING_CONFIG
+        fee_ranges = fee_ranges or Settings.PINDUODUO_CONFIG["shipping_fee_ranges"]
+        weight_bounds = weight_bounds or config["weight_bounds"]
+        aliases = class_aliases if class_aliases is not None else config["class_aliases"]
+
+        # 按重量下限排序，便于 searchsorted 分级
+        classes = sorted(weight_bounds, key=lambda name: weight_bounds[name][0])
+        self.classes = pd.Index(classes, dtype=object)
+        self.fee_low = np.array([fee_ranges[name][0] for name in classes], dtype=float)
+        self.fee_high = np.array([fee_ranges[name][1] for name in classes], dtype=float)
+        self.weight_low = np.array([weight_bounds[name][0] for name in classes], dtype=float)
+        self.weight_high = np.array([weight_bounds[name][1] for name in classes], dtype=float)
+        self.aliases = {**{name: name for name in classes}, **aliases}
+        self.carriers: Dict[str, CarrierRates] = {}
+        self.default_carrier: Optional[str] = None
+
+    def load_carrier_frame(self, table: pd.DataFrame, default_carrier: str = None):
+        """
+        加载快递运价表（列: [carrier,] max_weight, fee[, per_kg]）
+
+        同名快递公司会被替换；default_carrier 为没有指定快递公司的商品使用的运价，
+        默认取第一次加载的快递公司。
+        """
+        missing = [column for column in ('max_weight', 'fee') if column not in table.columns]
+        if missing:
+            raise ValueError(f"运价表缺少列: {', '.join(missing)}")
+        carriers = (table['carrier'].astype(str).str.strip() if 'carrier' in table.columns
+                    else pd.Series(DEFAULT_CARRIER, index=table.index))
+        max_weight = pd.to_numeric(table['max_weight'], errors='coerce').fillna(np.inf)
+        fee = pd.to_numeric(table['fee'], errors='coerce')
+        per_kg = (pd.to_numeric(table['per_kg'], errors='coerce').fillna(0.0) if 'per_kg' in table.columns
+                  else pd.Series(0.0, index=table.index))
+        invalid = fee.isna() | (fee < 0) | (per_kg < 0) | (max_weight <= 0)
+        if invalid.any():
+            rows = ', '.join(str(i + 2) for i in np.flatnonzero(invalid)[:10])
+            raise ValueError(f"运价表第 {rows} 行的重量或运费无效")
+
+        frame = pd.DataFrame({'carrier': carriers, 'max_weight': max_weight, 'fee': fee, 'per_kg': per_kg})
+        for carrier, rates in frame.sort_values('max_weight', kind='stable').groupby('carrier', sort=False):
+            self.carriers[carrier] = CarrierRates(rates['max_weight'], rates['fee'], rates['per_kg'])
+        if default_carrier is not None:
+            self.default_carrier = default_carrier
+        elif self.default_carrier is None:
+            self.default_carrier = carriers.iloc[0] if len(carriers) else None
+
+    def load_carrier_csv(self, path, default_carrier: str = None):
+        """读取快递运价CSV（参数同 load_carrier_frame）"""
+        self.load_carrier_frame(pd.read_csv(path, encoding='utf-8-sig'), default_carrier)
+
+    def class_codes(self, shipping_class) -> np.ndarray:
+        """把运费等级（含中文写法）转为等级位置，无法识别或缺失为 -1"""
+        values = pd.Categorical(shipping_class)
+        labels = pd.Index(values.categories.astype(str)).str.strip().map(lambda name: self.aliases.get(name))
+        positions = np.append(self.classes.get_indexer(labels), -1)
+        return positions[values.codes]
+
+    def range_fees(self, weights=None, shipping_class=None) -> np.ndarray:
+        """
+        按等级运费范围估算
+
+        有等级时使用该等级，否则按重量分级；有重量时在等级范围内按重量插值，
+        只有等级时取范围中点。两者都没有时为 NaN。
+        """
+        if weights is None and shipping_class is None:
+            raise ValueError("需要重量或运费等级")
+        count = len(weights) if weights is not None else len(shipping_class)
+        weights = np.full(count, np.nan) if weights is None else np.asarray(weights, dtype=float)
+        codes = np.full(count, -1) if shipping_class is None else self.class_codes(shipping_class)
+
+        by_weight = np.searchsorted(self.weight_low, weights, side='right') - 1
+        has_weight = ~np.isnan(weights)
+        codes = np.where((codes < 0) & has_weight, np.maximum(by_weight, 0), codes)
+        known = codes >= 0
+        codes = np.maximum(codes, 0)
+
+        span = self.weight_high[codes] - self.weight_low[codes]
+        position = np.where(has_weight, np.clip((weights - self.weight_low[codes]) / span, 0, 1), 0.5)
+        fees = self.fee_low[codes] + (self.fee_high[codes] - self.fee_low[codes]) * position
+        return np.where(known, fees, np.nan)
+
+    def carrier_fees(self, weights, carriers=None) -> np.ndarray:
+        """按快递运价表计算，没有可用运价表的行为 NaN"""
+        weights = np.asarray(weights, dtype=float)
+        fees = np.full(len(weights), np.nan)
+        if not self.carriers:
+            return fees
+        if carriers is None:
+            names = pd.Categorical(np.full(len(weights), self.default_carrier, dtype=object))
+        else:
+            names = pd.Categorical(carriers)
+        for code, carrier in enumerate(names.categories):
+            rates = self.carriers.get(str(carrier).strip())
+            if rates is not None:
+                rows = names.codes == code
+                fees[rows] = rates.fees(weights[rows])
+        if carriers is not None and self.default_carrier in self.carriers:
+            rows = names.codes == -1
+            fees[rows] = self.carriers[self.default_carrier].fees(weights[rows])
+        return fees
+
+    def estimate(self, frame: pd.DataFrame) -> np.ndarray:
+        """
+        为输入表的每一行估算运费（使用 weight、shipping_class、carrier 列）
+
+        有重量且有可用运价表时按运价表，否则按等级运费范围；无法估算时为 NaN。
+        """
+        weights = frame['weight'].to_numpy(dtype=float, na_value=np.nan) if 'weight' in frame.columns else None
+        shipping_class = frame['shipping_class'] if 'shipping_class' in frame.columns else None
+        fees = self.range_fees(weights, shipping_class)
+        if weights is not None:
+            carrier_fees = self.carrier_fees(weights, frame['carrier'] if 'carrier' in frame.columns else None)
+            fees = np.where(np.isnan(carrier_fees), fees, carrier_fees)
+        return fees
+
+
+# 全局运费估算器（可用 load_carrier_csv 加载快递运价表）
+shipping_estimator = ShippingEstimator()
+
+
+def resolve_shipping_fees(inputs: pd.DataFrame, estimator: ShippingEstimator = None) -> pd.DataFrame:
+    """
+    为没有填写运费的行估算 shipping_fee
+
+    仅在输入含 weight 或 shipping_class 列时生效；已填写运费的行保持不变，
+    无法估算的行保持缺失（计算时按0处理）。
+    """
+    if not any(column in inputs.columns for column in SHIPPING_HINT_COLUMNS):
+        return inputs
+    if estimator is None:
+        estimator = shipping_estimator
+    current = inputs['shipping_fee'] if 'shipping_fee' in inputs.columns else None
+    if current is not None and current.notna().all():
+        return inputs
+
+    missing = np.ones(len(inputs), dtype=bool) if current is None else current.isna().to_numpy()
+    estimated = estimator.estimate(inputs[missing])
+    unresolved = int(np.isnan(estimated).sum())
+    if unresolved:
+        logger.warning("%d 行没有运费且无法按重量或运费等级估算，按0计算", unresolved)
+
+    fees = np.full(len(inputs), np.nan) if current is None else current.to_numpy(dtype=float, na_value=np.nan, copy=True)
+    fees[missing] = estimated
+    return inputs.assign(shipping_fee=fees)
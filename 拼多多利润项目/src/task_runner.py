@@ -0,0 +1,159 @@
+"""
+后台任务执行器 - 让耗时计算离开GUI主线程
+
+任务函数在线程池中执行，进度、部分结果、完成/失败等事件先进入队列，
+再由主线程通过 schedule（如 Tk 的 root.after）定时取出并回调，
+因此所有回调都在主线程中运行，可以安全地更新界面控件。
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class TaskCancelled(Exception):
+    """任务被取消"""
+
+
+class TaskContext:
+    """传给任务函数的上下文：检查取消、汇报进度、推送部分结果"""
+    
+    def __init__(self, handle: 'TaskHandle'):
+        self._handle = handle
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._handle._cancel_event.is_set()
+    
+    def check_cancelled(self):
+        """已请求取消时抛出 TaskCancelled，任务函数应在循环中定期调用"""
+        if self.cancelled:
+            raise TaskCancelled()
+    
+    def report_progress(self, done: int, total: int, message: str = ""):
+        """汇报进度"""
+        self._handle._post('progress', (done, total, message))
+    
+    def emit(self, partial: Any):
+        """推送一批部分结果（如表格的若干行），用于增量刷新界面"""
+        self._handle._post('partial', partial)
+
+
+class TaskHandle:
+    """已提交任务的句柄"""
+    
+    def __init__(self, runner: 'BackgroundTaskRunner', name: str, callbacks: dict):
+        self.name = name
+        self._runner = runner
+        self._callbacks = callbacks
+        self._cancel_event = threading.Event()
+        self.done = False
+    
+    def cancel(self):
+        """请求取消（任务函数下一次检查时生效）"""
+        self._cancel_event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def _post(self, kind: str, payload: Any = None):
+        self._runner._events.put((self, kind, payload))
+
+
+class BackgroundTaskRunner:
+    """
+    后台任务执行器
+    
+    Args:
+        schedule: 在主线程延时执行回调的函数，签名为 schedule(delay_ms, callback)
+        max_workers: 线程池大小
+        poll_interval_ms: 主线程轮询事件队列的间隔
+    """
+    
+    def __init__(self, schedule: Callable, max_workers: int = 2, poll_interval_ms: int = 50):
+        self._schedule = schedule
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gui-task")
+        self._events = queue.Queue()
+        self._poll_interval_ms = poll_interval_ms
+        self._active = 0
+        self._polling = False
+    
+    def submit(self, func: Callable, *args, name: str = "",
+               on_done: Optional[Callable] = None,
+               on_error: Optional[Callable] = None,
+               on_progress: Optional[Callable] = None,
+               on_partial: Optional[Callable] = None,
+               on_cancelled: Optional[Callable] = None) -> TaskHandle:
+        """
+        提交任务（须在主线程调用）
+        
+        func 的签名为 func(ctx: TaskContext, *args)，返回值传给 on_done；
+        on_progress(done, total, message)、on_partial(partial)、on_error(exc)、
+        on_cancelled() 均在主线程回调。
+        """
+        handle = TaskHandle(self, name, {
+            'done': on_done,
+            'error': on_error,
+            'progress': on_progress,
+            'partial': on_partial,
+            'cancelled': on_cancelled,
+        })
+        self._active += 1
+        self._executor.submit(self._execute, handle, func, args)
+        if not self._polling:
+            self._polling = True
+            self._schedule(self._poll_interval_ms, self._poll)
+        return handle
+    
+    def _execute(self, handle: TaskHandle, func: Callable, args: tuple):
+        try:
+            result = func(TaskContext(handle), *args)
+        except TaskCancelled:
+            handle._post('cancelled')
+        except Exception as e:
+            handle._post('error', e)
+        else:
+            if handle.cancelled:
+                handle._post('cancelled')
+            else:
+                handle._post('done', result)
+    
+    def _poll(self):
+        """主线程：分发队列中的事件"""
+        try:
+            while True:
+                try:
+                    handle, kind, payload = self._events.get_nowait()
+                except queue.Empty:
+                    break
+                self._dispatch(handle, kind, payload)
+        finally:
+            # 回调抛出异常时也要继续轮询，避免后续事件丢失
+            if self._active > 0:
+                self._schedule(self._poll_interval_ms, self._poll)
+            else:
+                self._polling = False
+    
+    def _dispatch(self, handle: TaskHandle, kind: str, payload: Any):
+        if kind in ('done', 'error', 'cancelled'):
+            handle.done = True
+            self._active -= 1
+        # 已取消任务的进度和部分结果不再更新界面
+        if handle.cancelled and kind in ('progress', 'partial'):
+            return
+        
+        callback = handle._callbacks.get(kind)
+        if callback is None:
+            return
+        if kind == 'progress':
+            callback(*payload)
+        elif kind == 'cancelled':
+            callback()
+        else:
+            callback(payload)
+    
+    def shutdown(self, wait: bool = False):
+        """关闭线程池"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 广告预算分配测试
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_engine import calculate_profit_frame
+from src.ad_budget import allocate_ad_budget, plan_summary, ALLOCATED, PARTIAL, OUT_OF_BUDGET, ABOVE_BREAK_EVEN, NO_MARGIN
+from src.ad_budget import suggest_ad_bids, NOT_RECOMMENDED
+from config.settings import Settings
+
+
+class TestAdBudget(unittest.TestCase):
+    """广告预算分配测试类"""
+    
+    def setUp(self):
+        # 保本广告出价分别为 50、30、20、0，出价 10、10、25、5
+        inputs = pd.DataFrame({
+            'model_name': ['A', 'B', 'C', 'D'],
+            'price': [100.0, 80.0, 60.0, 40.0],
+            'cost': [50.0, 50.0, 40.0, 45.0],
+            'ad_deal_price': [10.0, 10.0, 25.0, 5.0],
+            'ad_enabled': True,
+        })
+        self.results = calculate_profit_frame(inputs)
+    
+    def test_greedy_order_and_budget(self):
+        """测试按每元净利润依次分配，预算恰好用完"""
+        plan = allocate_ad_budget(self.results, budget=700, capacity=50)
+        # A: 每元 4.0，上限 500；B: 每元 2.0，上限 500
+        self.assertEqual(list(plan['分配预算']), [500.0, 200.0, 0.0, 0.0])
+        self.assertEqual(list(plan['状态']), [ALLOCATED, PARTIAL, ABOVE_BREAK_EVEN, NO_MARGIN])
+        self.assertAlmostEqual(plan_summary(plan)['预计广告利润'], 50 * 40 + 20 * 20)
+    
+    def test_default_bid_and_capacity_array(self):
+        """测试未设出价时按保本出价比例建议出价，以及按商品的容量"""
+        results = self.results.copy()
+        results['每单广告出价'] = 0.0
+        plan = allocate_ad_budget(results, budget=1e9, capacity=np.array([1, 2, 3, 4]), bid_ratio=0.5)
+        self.assertEqual(list(plan['建议出价'][:3]), [25.0, 15.0, 10.0])
+        self.assertEqual(list(plan['预计广告成交'][:3]), [1.0, 2.0, 3.0])
+        self.assertEqual(plan.loc[3, '状态'], NO_MARGIN)
+    
+    def test_matches_brute_force(self):
+        """测试分配结果不劣于随机可行分配（分数背包最优性）"""
+        rng = np.random.default_rng(0)
+        n = 200
+        results = pd.DataFrame({
+            '商品型号': [f'S{i}' for i in range(n)],
+            '保本广告出价': rng.uniform(-5, 50, n),
+            '每单广告出价': rng.uniform(1, 30, n),
+        })
+        capacity = rng.integers(0, 20, n)
+        budget = 2000.0
+        plan = allocate_ad_budget(results, budget, capacity=capacity)
+        self.assertLessEqual(plan['分配预算'].sum(), budget + 1e-6)
+        self.assertTrue((plan['分配预算'] <= plan['投放上限'] + 1e-9).all())
+        best = plan['预计广告利润'].sum()
+        
+        eligible = plan['每元净利润'].to_numpy() > 0
+        for _ in range(200):
+            weights = rng.random(n) * eligible
+            spend = np.minimum(plan['投放上限'].to_numpy(), weights / weights.sum() * budget)
+            self.assertLessEqual((spend * plan['每元净利润'].to_numpy()).sum(), best + 1e-6)
+        self.assertIn(OUT_OF_BUDGET, set(plan['状态']))
+    
+    def test_negative_budget(self):
+        """测试负预算报错"""
+        with self.assertRaises(ValueError):
+            allocate_ad_budget(self.results, -1)
+
+
+
+class TestAdBidSuggestions(unittest.TestCase):
+    """批量广告出价建议测试类"""
+    
+    def test_matches_scalar_suggestion(self):
+        """测试各档出价与 get_ad_cost_suggestion 一致"""
+        rates = Settings.PINDUODUO_CONFIG["default_commission_rates"]
+        inputs = pd.DataFrame({
+            'model_name': ['A', 'B'],
+            'price': [100.0, 60.0],
+            'category': pd.Categorical(['digital', 'beauty']),
+            'cost': [40.0, 20.0],
+        })
+        table = suggest_ad_bids(calculate_profit_frame(inputs))
+        for i, (price, category) in enumerate([(100.0, 'digital'), (60.0, 'beauty')]):
+            expected = Settings.get_ad_cost_suggestion(price, category)
+            self.assertAlmostEqual(table['保守出价'].iloc[i], expected['conservative'])
+            self.assertAlmostEqual(table['适中出价'].iloc[i], expected['moderate'])
+            self.assertAlmostEqual(table['激进出价'].iloc[i], expected['aggressive'])
+        self.assertAlmostEqual(table['扣点率'].iloc[0], rates['digital'] * 100)
+    
+    def test_recommended_tier_below_break_even(self):
+        """测试建议出价取低于保本广告出价的最高一档"""
+        # 扣点0时各档出价为售价的 6%、12%、18%，保本广告出价 = 售价 - 成本
+        inputs = pd.DataFrame({
+            'model_name': ['A', 'B', 'C', 'D'],
+            'price': [100.0, 100.0, 100.0, 100.0],
+            'cost': [50.0, 85.0, 92.0, 100.0],
+        })
+        table = suggest_ad_bids(calculate_profit_frame(inputs))
+        self.assertEqual(list(table['建议档位']), ['激进', '适中', '保守', NOT_RECOMMENDED])
+        np.testing.assert_allclose(table['建议出价'], [18.0, 12.0, 6.0, 0.0])
+        np.testing.assert_allclose(table['出价空间'], [32.0, 3.0, 2.0, 0.0])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
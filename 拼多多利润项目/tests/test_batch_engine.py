@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 批量计算引擎测试
+"""
+
+import unittest
+import sys
+import os
+import random
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.input_module import ProfitInput
+from src.calculation_engine import calculate_profit
+from src.batch_engine import calculate_profit_frame, frame_to_results, inputs_to_frame
+from src.output_module import export_batch_to_excel
+
+
+def random_inputs(count: int, seed: int = 0):
+    """生成覆盖各种边界情况的随机输入"""
+    rng = random.Random(seed)
+    return [
+        ProfitInput(
+            model_name=f"SKU-{i}",
+            price=rng.uniform(1, 200),
+            cost=rng.uniform(0, 100),
+            other_cost=rng.uniform(0, 10),
+            shipping_fee=rng.uniform(0, 20),
+            commission_rate=rng.choice([0.0, 0.03, 0.06, 1.0]),
+            sales_volume=rng.randint(0, 300),
+            return_quantity=rng.randint(0, 50),
+            deal_orders=rng.randint(0, 200),
+            net_deal_orders=rng.randint(0, 200),
+            ad_deal_price=rng.choice([0.0, 1.5, 11.27]),
+            ad_enabled=rng.choice([True, False])
+        )
+        for i in range(count)
+    ]
+
+
+class TestBatchEngine(unittest.TestCase):
+    """批量计算引擎测试类"""
+    
+    def test_matches_scalar_engine(self):
+        """测试向量化结果与逐条计算完全一致"""
+        inputs = random_inputs(500)
+        frame = inputs_to_frame(inputs)
+        
+        for order_count in (100, 0):
+            results = frame_to_results(calculate_profit_frame(frame, order_count), frame)
+            for batch_result, item in zip(results, inputs):
+                self.assertEqual(batch_result, calculate_profit(item, order_count))
+    
+    def test_per_row_order_count_and_defaults(self):
+        """测试按行的分析订单数以及缺失列补默认值"""
+        frame = inputs_to_frame([
+            {'model_name': 'A', 'price': 100.0, 'cost': 50.0, 'analysis_orders': 10},
+            {'model_name': 'B', 'price': 100.0, 'cost': 50.0, 'analysis_orders': 20},
+        ])
+        results = calculate_profit_frame(frame)
+        self.assertEqual(list(results['订单总数']), [10, 20])
+        self.assertEqual(list(results['总利润']), [500.0, 1000.0])
+        self.assertFalse(results['广告启用'].any())
+
+
+
+class TestBatchExport(unittest.TestCase):
+    """批量Excel报告导出测试类"""
+    
+    def test_export_workbook_and_sidecar(self):
+        """测试汇总、成本明细、计算公式三张表及CSV附带文件"""
+        import pandas as pd
+        from openpyxl import load_workbook
+        
+        frame = inputs_to_frame(random_inputs(30))
+        results = calculate_profit_frame(frame, 100)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            written = export_batch_to_excel(results, os.path.join(tmp, "batch.xlsx"),
+                                            inputs=frame, sidecars=["csv"], chunk_size=7)
+            
+            workbook = load_workbook(written["xlsx"], read_only=True)
+            self.assertEqual(workbook.sheetnames, ['利润汇总', '成本明细', '计算公式'])
+            summary = pd.read_excel(written["xlsx"], sheet_name='利润汇总')
+            self.assertEqual(len(summary), 30)
+            self.assertAlmostEqual(summary['总利润'].sum(), results['总利润'].sum(), places=6)
+            
+            formulas = pd.read_excel(written["xlsx"], sheet_name='计算公式')
+            expected = frame_to_results(results.iloc[:1], frame.iloc[:1])[0]['计算公式']
+            self.assertEqual(len(formulas[formulas['商品型号'] == 'SKU-0']),
+                             sum(len(items) for items in expected.values()))
+            workbook.close()
+            
+            self.assertEqual(len(pd.read_csv(written["csv"])), 30)
+    
+    def test_rejects_unknown_sidecar(self):
+        """测试不支持的附带格式"""
+        results = calculate_profit_frame(inputs_to_frame(random_inputs(2)))
+        with self.assertRaises(ValueError):
+            export_batch_to_excel(results, "unused.xlsx", sidecars=["json"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 现金流预测测试
+"""
+
+import unittest
+import sys
+import os
+import io
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_engine import calculate_profit_frame, complete_frame
+from src.cashflow import project_cashflow, unit_cash_flows, DAILY_COLUMNS, SKU_COLUMNS
+from src.input_schema import parse_inputs
+
+
+class TestCashflow(unittest.TestCase):
+    """现金流预测测试类"""
+
+    def setUp(self):
+        self.inputs = pd.DataFrame({
+            'model_name': ['A', 'B', 'C'],
+            'price': [50.0, 30.0, 20.0],
+            'cost': [20.0, 12.0, 18.0],
+            'shipping_fee': [3.0, 3.0, 3.0],
+            'commission_rate': [0.05, 0.05, 0.05],
+            'sales_volume': [300, 150, 90],
+            'return_quantity': [30, 0, 9],
+            'deal_orders': [100, 100, 100],
+            'net_deal_orders': [90, 100, 95],
+            'ad_deal_price': [4.0, 0.0, 2.0],
+            'ad_enabled': [True, False, True],
+        })
+
+    def test_unit_flows_match_static_profit(self):
+        """测试没有退款时单均净现金等于 calculate_profit 的单均利润"""
+        inputs = self.inputs.assign(return_quantity=0, net_deal_orders=100)
+        flows = unit_cash_flows(complete_frame(inputs))
+        net = flows['回款'] - flows['退款'] - flows['履约成本'] - flows['广告支出']
+        expected = calculate_profit_frame(inputs, 1)['单均利润'].to_numpy()
+        np.testing.assert_allclose(net, expected)
+
+    def test_timing(self):
+        """测试回款按回款周期到账，结算前的退款与回款同一天扣除"""
+        projection = project_cashflow(self.inputs.iloc[:1], horizon_days=30, settlement_lag_days=7,
+                                      refund_delay_days=3)
+        daily = projection.daily
+        self.assertEqual(list(daily.columns), DAILY_COLUMNS)
+        self.assertEqual(len(daily), 30)
+        self.assertTrue((daily.loc[1:7, ['回款', '退款']] == 0).all().all())
+        self.assertTrue((daily.loc[8:, ['回款', '退款']] > 0).all().all())
+        # 日均 10 单，秒退 10% 不发货：回款 = 10 × 0.9 × 50 × 0.95
+        self.assertAlmostEqual(daily.loc[8, '回款'], 10 * 0.9 * 50 * 0.95)
+        self.assertAlmostEqual(daily.loc[8, '退款'], 10 * 0.9 * 50 * 0.95 * 0.1)
+        self.assertAlmostEqual(daily.loc[1, '履约成本'], 10 * 0.9 * 23)
+        self.assertAlmostEqual(daily.loc[1, '广告支出'], 10 * (4.0 + 4.0 * 0.1))
+
+    def test_cumulative_position_and_receivable(self):
+        """测试累计现金、各商品期末现金与期末待回款相互一致"""
+        projection = project_cashflow(self.inputs, horizon_days=60, settlement_lag_days=10,
+                                      refund_delay_days=20, opening_cash=1000.0)
+        daily, skus = projection.daily, projection.skus
+        self.assertEqual(list(skus.columns), SKU_COLUMNS)
+        np.testing.assert_allclose(daily['累计现金'], 1000.0 + daily['净现金流'].cumsum())
+        self.assertAlmostEqual(daily['累计现金'].iloc[-1], 1000.0 + skus['期末现金'].sum(), places=6)
+
+        # 全部订单的应得回款 = 已到账 + 期末待回款
+        flows = unit_cash_flows(complete_frame(self.inputs))
+        total_orders = skus['日均订单'].to_numpy() * 60
+        earned = (total_orders * (flows['回款'] - flows['退款'])).sum()
+        self.assertAlmostEqual(daily['回款'].sum() - daily['退款'].sum() + projection.receivable, earned, places=6)
+
+    def test_payback_day(self):
+        """测试亏损商品不回本，盈利商品在回款开始后回本"""
+        skus = project_cashflow(self.inputs, horizon_days=90, settlement_lag_days=15).skus.set_index('商品型号')
+        self.assertTrue(np.isnan(skus.loc['C', '回本日']))
+        self.assertEqual(skus.loc['C', '最低现金日'], 90)
+        self.assertGreater(skus.loc['A', '回本日'], 16)
+        self.assertEqual(skus.loc['A', '最低现金日'], 15)
+        self.assertGreater(skus.loc['A', '期末现金'], 0)
+
+    def test_chunking_and_demand_curve(self):
+        """测试分批结果一致，以及逐商品需求曲线"""
+        curve = np.linspace(0.5, 1.5, 45)
+        whole = project_cashflow(self.inputs, horizon_days=45, demand_curve=curve)
+        chunked = project_cashflow(self.inputs, horizon_days=45, demand_curve=curve, chunk_size=1)
+        pd.testing.assert_frame_equal(whole.daily, chunked.daily)
+        pd.testing.assert_frame_equal(whole.skus, chunked.skus)
+
+        per_sku = np.zeros((3, 45))
+        per_sku[0] = 1.0
+        projection = project_cashflow(self.inputs, horizon_days=45, demand_curve=per_sku)
+        self.assertAlmostEqual(projection.daily['订单数'].iloc[0], 10.0)
+        with self.assertRaises(ValueError):
+            project_cashflow(self.inputs, horizon_days=45, demand_curve=np.ones(10))
+
+    def test_daily_orders_column(self):
+        """测试上传表格中的 daily_orders 优先于按销量折算"""
+        parsed = parse_inputs(pd.read_csv(io.StringIO("model_name,price,sales_volume,daily_orders\nA,10,300,2\nB,10,300,\n")))
+        self.assertTrue(parsed.errors.empty)
+        skus = project_cashflow(parsed.frame, horizon_days=10).skus
+        self.assertEqual(list(skus['日均订单']), [2.0, 10.0])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 类目扣点查找测试
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from src.batch_engine import calculate_profit_frame
+from src.commission import CommissionTable, resolve_commission_rates
+from src.input_schema import parse_inputs
+
+
+class TestCommission(unittest.TestCase):
+    """类目扣点查找测试类"""
+    
+    def setUp(self):
+        self.table = CommissionTable.from_settings()
+    
+    def test_lookup_matches_dict(self):
+        """测试数组查找与逐行查字典一致，未知和缺失类目使用 general 扣点"""
+        rates = Settings.PINDUODUO_CONFIG["default_commission_rates"]
+        categories = pd.Series(['digital', 'beauty', 'unknown', None, ' home '], dtype='category')
+        expected = [rates['digital'], rates['beauty'], rates['general'], rates['general'], rates['home']]
+        np.testing.assert_allclose(self.table.lookup(categories), expected)
+        np.testing.assert_allclose(self.table.lookup(['clothing'] * 3), [rates['clothing']] * 3)
+    
+    def test_row_override(self):
+        """测试行内填写的扣点优先于类目扣点"""
+        raw = pd.DataFrame({
+            'price': [100.0, 100.0, 100.0],
+            'category': ['beauty', 'beauty', ''],
+            'commission_rate': [None, 2, None],
+        })
+        parsed = parse_inputs(raw)
+        self.assertTrue(np.isnan(parsed.frame['commission_rate'].iloc[0]))
+        
+        resolved = resolve_commission_rates(parsed.frame, self.table)
+        np.testing.assert_allclose(resolved['commission_rate'], [0.06, 0.02, 0.03])
+        results = calculate_profit_frame(parsed.frame)
+        np.testing.assert_allclose(results['平台扣点'], [600.0, 200.0, 300.0])
+    
+    def test_without_category_unchanged(self):
+        """测试没有类目列时扣点缺省为0（与此前一致）"""
+        parsed = parse_inputs(pd.DataFrame({'price': [100.0], 'commission_rate': [None]}))
+        self.assertEqual(parsed.frame['commission_rate'].iloc[0], 0.0)
+        self.assertIs(resolve_commission_rates(parsed.frame), parsed.frame)
+    
+    def test_external_table(self):
+        """测试加载外部扣点表（百分数）并原地替换"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as f:
+            f.write("category,commission_rate\n女装,5\n男装,4.5\ngeneral,2\n")
+        try:
+            table = CommissionTable.from_settings()
+            table.load_csv(f.name)
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.default_rate, 0.02)
+        np.testing.assert_allclose(table.lookup(['男装', '女装', 'beauty']), [0.045, 0.05, 0.02])
+    
+    def test_invalid_table(self):
+        """测试无效的扣点表"""
+        with self.assertRaises(ValueError):
+            CommissionTable.from_frame(pd.DataFrame({'category': ['a'], 'rate': [3]}))
+        with self.assertRaises(ValueError):
+            CommissionTable.from_frame(pd.DataFrame({'category': ['a', ''], 'commission_rate': [3, 4]}))
+        with self.assertRaises(ValueError):
+            CommissionTable.from_frame(pd.DataFrame({'category': ['a'], 'commission_rate': [150]}))
+
+
+if __name__ == '__main__':
+    unittest.main()
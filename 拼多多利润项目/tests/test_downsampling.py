@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 图表降采样测试
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.downsampling import lttb, minmax_downsample, top_n_with_others, histogram_bins
+from src.output_module import create_profit_trend_chart, create_batch_profit_chart
+
+
+class TestLineDownsampling(unittest.TestCase):
+    """折线降采样测试"""
+
+    def setUp(self):
+        self.x = np.arange(10000, dtype=float)
+        self.y = np.sin(self.x / 300) * 100
+        self.y[4321] = 500  # 单个尖峰
+
+    def test_lttb_keeps_endpoints_and_peak(self):
+        x, y = lttb(self.x, self.y, 500)
+        self.assertEqual(len(x), 500)
+        self.assertEqual(x[0], 0)
+        self.assertEqual(x[-1], 9999)
+        self.assertTrue(np.all(np.diff(x) > 0))
+        self.assertIn(500, y)
+
+    def test_small_input_unchanged(self):
+        x, y = lttb([1, 2, 3], [4, 5, 6], 100)
+        np.testing.assert_array_equal(y, [4, 5, 6])
+
+    def test_minmax_keeps_extremes(self):
+        x, y = minmax_downsample(self.x, self.y, 100)
+        self.assertLessEqual(len(x), 200)
+        self.assertEqual(y.max(), self.y.max())
+        self.assertEqual(y.min(), self.y.min())
+        self.assertTrue(np.all(np.diff(x) > 0))
+
+    def test_trend_chart_uses_webgl_for_large_input(self):
+        fig = create_profit_trend_chart(self.x, self.y)
+        self.assertEqual(fig.data[0].type, 'scattergl')
+        self.assertLessEqual(len(fig.data[0].x), 2000)
+
+        fig = create_profit_trend_chart([10, 20, 30], [1, 2, 3])
+        self.assertEqual(fig.data[0].type, 'scatter')
+        self.assertEqual(len(fig.data[0].x), 3)
+
+
+class TestBarAggregation(unittest.TestCase):
+    """柱状图聚合测试"""
+
+    def test_top_n_with_others(self):
+        values = np.arange(100, dtype=float)
+        bars = top_n_with_others([f"SKU-{i}" for i in range(100)], values, 5)
+        self.assertEqual(list(bars['标签'][:5]), ["SKU-99", "SKU-98", "SKU-97", "SKU-96", "SKU-95"])
+        self.assertEqual(bars['标签'].iloc[-1], "其他(95个，平均)")
+        # "其他" 显示平均值，项数和合计另列
+        self.assertAlmostEqual(bars['数值'].iloc[-1], values[:95].mean())
+        self.assertEqual(bars['数量'].sum(), 100)
+        self.assertAlmostEqual(bars['合计'].sum(), values.sum())
+
+    def test_duplicate_labels_stay_separate(self):
+        bars = top_n_with_others(["A", "A", "B", "A"], [10.0, 20.0, 5.0, 1.0], 3)
+        self.assertEqual(list(bars['标签']), ["A", "A", "B", "其他(1个，平均)"])
+        self.assertEqual(list(bars['数值']), [20.0, 10.0, 5.0, 1.0])
+
+        fig = create_batch_profit_chart(pd.DataFrame({'商品型号': ["A", "A", "B"], '总利润': [1.0, 2.0, 3.0]}))
+        self.assertEqual(len(fig.data[0].x), 3)
+        self.assertEqual(list(fig.layout.xaxis.ticktext), ["B", "A", "A"])
+
+    def test_histogram_counts(self):
+        values = np.r_[np.random.default_rng(0).normal(size=1000), np.nan]
+        bins = histogram_bins(values, 20)
+        self.assertEqual(len(bins), 20)
+        self.assertEqual(bins['数量'].sum(), 1000)
+
+    def test_batch_chart_limits_bars(self):
+        results = pd.DataFrame({'商品型号': [f"SKU-{i}" for i in range(1000)],
+                                '总利润': np.linspace(-50, 50, 1000)})
+        fig = create_batch_profit_chart(results)
+        self.assertEqual(len(fig.data[0].x), 31)
+
+
+if __name__ == '__main__':
+    unittest.main()
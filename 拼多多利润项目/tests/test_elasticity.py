@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 价格弹性测试
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.history_manager import HistoryManager
+from src.elasticity import ElasticityModel, OPTIMAL, INELASTIC, INSUFFICIENT, CLIPPED
+
+
+def demand_records(model_name, elasticity, intercept, prices, cost=10.0):
+    """按常弹性需求曲线生成历史记录"""
+    return [
+        {'input_data': {'model_name': model_name, 'price': price, 'cost': cost,
+                        'sales_volume': float(np.exp(intercept) * price ** elasticity)}}
+        for price in prices
+    ]
+
+
+class TestElasticity(unittest.TestCase):
+    """价格弹性测试类"""
+    
+    def setUp(self):
+        self.records = (demand_records('A', -2.5, 12.0, [15, 18, 20, 25, 30])
+                        + demand_records('B', -0.5, 6.0, [20, 30, 40])
+                        + demand_records('C', -3.0, 13.0, [40, 50, 60])
+                        + demand_records('D', -2.0, 8.0, [30, 35]))
+    
+    def test_fit_recovers_curves(self):
+        """测试最小二乘拟合还原弹性和截距，样本不足的商品不拟合"""
+        curves = ElasticityModel.from_history(self.records).curves()
+        self.assertAlmostEqual(curves.loc['A', '弹性'], -2.5)
+        self.assertAlmostEqual(curves.loc['A', '截距'], 12.0)
+        self.assertAlmostEqual(curves.loc['B', '弹性'], -0.5)
+        self.assertAlmostEqual(curves.loc['A', 'R²'], 1.0)
+        self.assertTrue(np.isnan(curves.loc['D', '弹性']))
+    
+    def test_incremental_matches_full_fit(self):
+        """测试分批更新与一次性拟合结果相同"""
+        rng = np.random.default_rng(0)
+        noisy = [
+            {'input_data': {'model_name': f'S{i % 7}', 'price': p,
+                            'sales_volume': float(np.exp(9 + rng.normal(0, 0.1)) * p ** -1.8)}}
+            for i, p in enumerate(rng.uniform(10, 80, 300))
+        ]
+        full = ElasticityModel.from_history(noisy).curves()
+        model = ElasticityModel()
+        for start in range(0, len(noisy), 37):
+            model.update(noisy[start:start + 37])
+        pd.testing.assert_frame_equal(model.curves().sort_index(), full.sort_index(), rtol=1e-9)
+    
+    def test_optimal_prices(self):
+        """测试利润最大化售价 = 保本售价 × b / (1 + b)，并截断到历史价格范围"""
+        table = ElasticityModel.from_history(self.records).optimal_prices()
+        row = table.loc['A']
+        self.assertAlmostEqual(row['保本售价'], 10.0)
+        self.assertAlmostEqual(row['最优售价'], 10.0 * 2.5 / 1.5)
+        self.assertEqual(row['状态'], OPTIMAL)
+        # 最优售价处单件利润 × 销量不低于附近价格
+        for price in (row['最优售价'] * 0.95, row['最优售价'] * 1.05):
+            self.assertGreater(row['预计利润'], np.exp(12.0) * price ** -2.5 * (price - 10.0))
+        
+        self.assertEqual(table.loc['B', '状态'], INELASTIC)
+        self.assertAlmostEqual(table.loc['B', '最优售价'], 40 * 1.2)
+        # C 的无约束最优价 15 低于历史价格下限 40 × 0.8
+        self.assertEqual(table.loc['C', '状态'], CLIPPED)
+        self.assertAlmostEqual(table.loc['C', '最优售价'], 32.0)
+        self.assertEqual(table.loc['D', '状态'], INSUFFICIENT)
+    
+    def test_updates_on_history_save(self):
+        """测试注册到历史记录管理器后，保存分析即更新拟合"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            manager = HistoryManager(os.path.join(tmp_dir, "history.json"))
+            model = ElasticityModel.from_history(manager.load_history())
+            model.attach(manager)
+            for record in demand_records('A', -2.0, 10.0, [10, 20, 40]):
+                manager.save_analysis(record['input_data'], {'商品型号': 'A'})
+            self.assertAlmostEqual(model.curves().loc['A', '弹性'], -2.0)
+            
+            model.detach(manager)
+            manager.save_analysis({'model_name': 'A', 'price': 50, 'sales_volume': 1}, {'商品型号': 'A'})
+            self.assertEqual(model.curves().loc['A', '样本数'], 3)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    def test_refits_after_history_removal(self):
+        """测试删除、清空历史记录后自动从剩余记录重新拟合"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            manager = HistoryManager(os.path.join(tmp_dir, "history.json"))
+            model = ElasticityModel.from_history(manager.load_history())
+            model.attach(manager)
+            ids = [manager.save_analysis(record['input_data'], {'商品型号': 'A'})
+                   for record in demand_records('A', -2.0, 10.0, [10, 20, 40, 80])]
+            version = manager.version
+            
+            self.assertTrue(manager.delete_analysis(ids[0]))
+            self.assertEqual(model.curves().loc['A', '样本数'], 3)
+            self.assertGreater(manager.version, version)
+            
+            manager.clear_history()
+            self.assertTrue(model.curves().empty)
+            self.assertEqual(model.latest_inputs, {})
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 历史记录管理测试
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from src.history_manager import HistoryManager, RetentionPolicy, msgpack, zstandard
+from src import history_maintenance
+from src.input_module import ProfitInput
+from src.calculation_engine import calculate_profit
+
+
+def make_record(model_name: str, price: float = 100.0):
+    """构造一组最小的输入参数和计算结果"""
+    input_data = {'model_name': model_name, 'price': price, 'cost': 50.0}
+    result = {'商品型号': model_name, '总利润': price - 50.0, '利润率': 10.0}
+    return input_data, result
+
+
+class TestHistoryConcurrency(unittest.TestCase):
+    """历史记录并发写入测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manager = HistoryManager(os.path.join(self.tmp_dir, "history.json"))
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_concurrent_saves_are_not_lost(self):
+        """测试多线程同时保存不丢记录且ID唯一"""
+        ids = []
+        
+        def worker(n):
+            for i in range(10):
+                ids.append(self.manager.save_analysis(*make_record(f"SKU-{n}-{i}")))
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        history = self.manager.load_history()
+        self.assertEqual(len(history), 80)
+        self.assertEqual(len(set(ids)), 80)
+        self.assertEqual({r['analysis_id'] for r in history}, set(ids))
+        self.assertEqual(self.manager.version, 80)
+    
+    def test_concurrent_save_and_delete(self):
+        """测试删除与保存交错执行时互不覆盖"""
+        to_delete = [self.manager.save_analysis(*make_record(f"OLD-{i}")) for i in range(10)]
+        
+        threads = [threading.Thread(target=self.manager.delete_analysis, args=(aid,)) for aid in to_delete]
+        threads += [threading.Thread(target=self.manager.save_analysis, args=make_record(f"NEW-{i}")) for i in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        models = sorted(r['result']['商品型号'] for r in self.manager.load_history())
+        self.assertEqual(models, sorted(f"NEW-{i}" for i in range(10)))
+    
+    def test_no_temp_files_left_behind(self):
+        """测试原子写入不会残留临时文件"""
+        self.manager.save_analysis(*make_record("SKU001"))
+        self.manager.clear_history()
+        leftovers = [f for f in os.listdir(self.tmp_dir) if f.endswith('.tmp')]
+        self.assertEqual(leftovers, [])
+        self.assertEqual(self.manager.load_history(), [])
+
+
+class TestHistoryWriteBehind(unittest.TestCase):
+    """历史记录后台写入测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.history_file = os.path.join(self.tmp_dir, "history.json")
+        self.manager = HistoryManager(self.history_file)
+        self.manager.enable_write_behind(flush_interval=60)
+    
+    def tearDown(self):
+        self.manager.disable_write_behind()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_pending_records_visible_before_flush(self):
+        """测试未落盘记录也能被读取"""
+        analysis_id = self.manager.save_analysis(*make_record("SKU001"))
+        ids = [r['analysis_id'] for r in self.manager.load_history()]
+        self.assertIn(analysis_id, ids)
+    
+    def test_flush_persists_all_records(self):
+        """测试flush后所有记录写入文件"""
+        ids = [self.manager.save_analysis(*make_record(f"SKU-{i}")) for i in range(50)]
+        self.manager.flush()
+        
+        on_disk = HistoryManager(self.history_file).load_history()
+        self.assertEqual([r['analysis_id'] for r in on_disk], ids)
+    
+    def test_disable_flushes_remaining_records(self):
+        """测试关闭写入器时剩余记录落盘"""
+        self.manager.save_analysis(*make_record("SKU001"))
+        self.manager.disable_write_behind()
+        self.assertEqual(len(HistoryManager(self.history_file).load_history()), 1)
+    
+    def test_delete_pending_record(self):
+        """测试删除尚在队列中的记录"""
+        analysis_id = self.manager.save_analysis(*make_record("SKU001"))
+        self.assertTrue(self.manager.delete_analysis(analysis_id))
+        self.assertEqual(self.manager.load_history(), [])
+    
+    def test_persistent_write_failure_does_not_block(self):
+        """测试持续写入失败时 flush/关闭不会无限阻塞，记录保留到下次写入"""
+        append = self.manager._append_records
+        def failing(records):
+            raise OSError("磁盘已满")
+        self.manager._append_records = failing
+        self.manager._writer.max_retries = 1
+        
+        analysis_id = self.manager.save_analysis(*make_record("SKU001"))
+        self.assertFalse(self.manager.flush(timeout=5))
+        self.assertIn(analysis_id, [r['analysis_id'] for r in self.manager.load_history()])
+        
+        self.manager._append_records = append
+        self.assertTrue(self.manager.flush(timeout=5))
+        on_disk = HistoryManager(self.history_file).load_history()
+        self.assertEqual([r['analysis_id'] for r in on_disk], [analysis_id])
+        
+        self.manager._append_records = failing
+        self.manager.save_analysis(*make_record("SKU002"))
+        self.assertFalse(self.manager.disable_write_behind(timeout=5))
+    
+    def test_ids_unique_without_reading_file(self):
+        """测试异步模式的ID带随机后缀，多个进程同一秒保存也不重复"""
+        other = HistoryManager(self.history_file)
+        other.enable_write_behind(flush_interval=60)
+        try:
+            ids = {manager.save_analysis(*make_record("SKU001")) for manager in (self.manager, other) for _ in range(5)}
+        finally:
+            other.disable_write_behind()
+        self.assertEqual(len(ids), 10)
+
+
+class TestHistoryMaintenance(unittest.TestCase):
+    """历史记录滚动归档与压缩测试类"""
+    
+    def setUp(self):
+        """测试前准备：写入跨三个月的记录"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manager = HistoryManager(os.path.join(self.tmp_dir, "history.json"))
+        self.now = datetime(2025, 7, 15, 12, 0, 0)
+        records = []
+        for i, (month_offset, sku) in enumerate([(60, "A"), (60, "A"), (30, "A"), (30, "B"), (1, "B"), (0, "A")]):
+            input_data, result = make_record(sku)
+            records.append({
+                "analysis_id": f"ID-{i}",
+                "timestamp": (self.now - timedelta(days=month_offset)).isoformat(),
+                "input_data": input_data,
+                "result": result,
+                "created_by": "user"
+            })
+        self.manager._write_history(records)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_rollover_by_month(self):
+        """测试往月记录移入月度分段且读取结果不变"""
+        moved = self.manager.rollover(self.now)
+        self.assertEqual(moved, 4)
+        self.assertEqual([m for m, _ in self.manager.list_segments()], ["2025-05", "2025-06"])
+        self.assertEqual(len(self.manager._read_history()), 2)
+        self.assertEqual(len(self.manager.load_history()), 6)
+    
+    def test_load_during_rollover(self):
+        """测试滚动归档进行时读取既不遗漏也不重复记录"""
+        records = self.manager._read_history()
+        expected = sorted(r['analysis_id'] for r in records)
+        seen = []
+        stop = threading.Event()
+        
+        def reader():
+            while not stop.is_set():
+                seen.append(sorted(r['analysis_id'] for r in self.manager.load_history()))
+        
+        thread = threading.Thread(target=reader)
+        thread.start()
+        try:
+            for _ in range(20):
+                with self.manager._locked():
+                    for _, path in self.manager.list_segments():
+                        os.remove(path)
+                    self.manager._write_history(records)
+                self.manager.rollover(self.now)
+        finally:
+            stop.set()
+            thread.join()
+        
+        self.assertTrue(seen)
+        self.assertTrue(all(ids == expected for ids in seen))
+    
+    def test_delete_archived_record_uses_tombstone(self):
+        """测试删除归档记录先登记墓碑，压缩时清除"""
+        self.manager.rollover(self.now)
+        self.assertTrue(self.manager.delete_analysis("ID-0"))
+        self.assertNotIn("ID-0", [r['analysis_id'] for r in self.manager.load_history()])
+        
+        stats = self.manager.compact(now=self.now)
+        self.assertEqual(stats['removed'], 1)
+        self.assertFalse(os.path.exists(self.manager.tombstone_file))
+        self.assertEqual(len(self.manager.load_history()), 5)
+    
+    def test_retention_policies(self):
+        """测试保留天数、每型号保留数和总记录数"""
+        self.manager.run_maintenance(RetentionPolicy(max_age_days=45), self.now)
+        self.assertEqual(sorted(r['analysis_id'] for r in self.manager.load_history()),
+                         ["ID-2", "ID-3", "ID-4", "ID-5"])
+        
+        self.manager.compact(RetentionPolicy(keep_latest_per_sku=1), self.now)
+        self.assertEqual(sorted(r['analysis_id'] for r in self.manager.load_history()), ["ID-4", "ID-5"])
+        
+        self.manager.compact(RetentionPolicy(max_records=1), self.now)
+        self.assertEqual([r['analysis_id'] for r in self.manager.load_history()], ["ID-5"])
+        self.assertEqual(self.manager.list_segments(), [])
+    
+    def test_cli_keeps_configured_encoding(self):
+        """测试命令行维护按配置的存储格式重写文件，不会变回缩进JSON"""
+        storage = {"record_mode": "compact", "encoding": "compact_json", "compression": None}
+        with mock.patch.dict(Settings.HISTORY_CONFIG, {"storage": storage}):
+            history_maintenance.main(['--history-file', self.manager.history_file])
+        
+        segments = self.manager.list_segments()
+        self.assertTrue(segments)
+        for _, path in segments:
+            with open(path, 'rb') as f:
+                self.assertNotIn(b'\n', f.read())
+        self.assertEqual(len(self.manager.load_history()), 6)
+
+
+class TestHistoryEncoding(unittest.TestCase):
+    """历史记录紧凑编码测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.history_file = os.path.join(self.tmp_dir, "history.json")
+        self.inputs = ProfitInput(
+            model_name="TEST-SKU001", price=100.0, cost=50.0, other_cost=5.0,
+            shipping_fee=10.0, commission_rate=0.03, sales_volume=100,
+            return_quantity=10, deal_orders=95, net_deal_orders=85,
+            ad_deal_price=2.0, ad_enabled=True
+        )
+        self.result = calculate_profit(self.inputs, 100)
+        self.input_data = dict(vars(self.inputs), analysis_orders=100)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def assert_roundtrip(self, manager):
+        analysis_id = manager.save_analysis(self.input_data, self.result)
+        stored = manager.load_history()[0]
+        self.assertNotIn('计算公式', stored['result'])
+        self.assertEqual(manager.get_analysis(analysis_id)['result'], self.result)
+    
+    def test_compact_json_regenerates_formulas(self):
+        """测试紧凑记录去掉公式且按需还原"""
+        manager = HistoryManager(self.history_file, record_mode="compact", encoding="compact_json")
+        self.assert_roundtrip(manager)
+        
+        full_size = len(HistoryManager(self.history_file)._encode([
+            {"input_data": self.input_data, "result": self.result}
+        ]))
+        self.assertLess(os.path.getsize(self.history_file), full_size / 2)
+    
+    def test_reads_legacy_records(self):
+        """测试紧凑模式可以读取旧格式文件"""
+        legacy = HistoryManager(self.history_file)
+        analysis_id = legacy.save_analysis(self.input_data, self.result)
+        
+        manager = HistoryManager(self.history_file, record_mode="compact", encoding="compact_json")
+        manager.save_analysis(self.input_data, self.result)
+        self.assertEqual(len(manager.load_history()), 2)
+        self.assertEqual(manager.get_analysis(analysis_id)['result'], self.result)
+    
+    @unittest.skipIf(msgpack is None or zstandard is None, "需要安装 msgpack 和 zstandard")
+    def test_msgpack_zstd(self):
+        """测试msgpack + zstd压缩存储"""
+        manager = HistoryManager(self.history_file, record_mode="compact",
+                                 encoding="msgpack", compression="zstd")
+        self.assert_roundtrip(manager)
+        # 其他配置的实例也能透明读取
+        self.assertEqual(len(HistoryManager(self.history_file).load_history()), 1)
+    
+    def test_inputs_only_mode_recomputes_results(self):
+        """测试只保存输入时读取结果按需重算"""
+        manager = HistoryManager(self.history_file, record_mode="inputs", encoding="compact_json")
+        analysis_id = manager.save_analysis(self.input_data, self.result)
+        
+        stored = manager._read_history()[0]
+        self.assertNotIn('result', stored)
+        self.assertIn('engine_version', stored)
+        
+        loaded = manager.load_history()[0]
+        self.assertAlmostEqual(loaded['result']['总利润'], self.result['总利润'])
+        self.assertEqual(manager.get_analysis(analysis_id)['result'], self.result)
+        
+        recomputed = manager.recompute_history()
+        self.assertEqual(list(recomputed.index), [analysis_id])
+        self.assertAlmostEqual(recomputed.loc[analysis_id, '总利润'], self.result['总利润'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 批量输入解析测试
+"""
+
+import unittest
+import sys
+import os
+import io
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.input_schema import parse_inputs
+from src.batch_engine import calculate_profit_frame
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_batch_data.csv')
+
+
+class TestInputSchema(unittest.TestCase):
+    """批量输入解析测试类"""
+    
+    def parse(self, text, **kwargs):
+        return parse_inputs(pd.read_csv(io.StringIO(text)), **kwargs)
+    
+    def test_dtypes_and_defaults(self):
+        """测试列类型以及缺列、空单元格的缺省值"""
+        parsed = self.parse("price,cost,sales_volume\n100,50,\n80,40,200\n")
+        frame = parsed.frame
+        self.assertTrue(parsed.errors.empty)
+        self.assertEqual(frame['price'].dtype, float)
+        self.assertEqual(frame['sales_volume'].dtype, 'int64')
+        self.assertEqual(frame['ad_enabled'].dtype, bool)
+        self.assertEqual(list(frame['sales_volume']), [100, 200])
+        self.assertEqual(list(frame['deal_orders']), [95, 95])
+        self.assertEqual(list(frame['model_name']), ['SKU-0', 'SKU-1'])
+    
+    def test_ad_enabled_strings(self):
+        """测试 "False" 等字符串不再被当作真值"""
+        parsed = self.parse("price,ad_enabled\n1,False\n1,true\n1,是\n1,0\n1,\n")
+        self.assertEqual(list(parsed.frame['ad_enabled']), [False, True, True, False, False])
+        
+        parsed = self.parse("price,ad_enabled\n1,maybe\n1,True\n")
+        self.assertEqual(list(parsed.frame.index), [1])
+        self.assertEqual(parsed.errors.loc[0, '列'], 'ad_enabled')
+    
+    def test_rate_units_per_column(self):
+        """测试比率按整列判断单位：有大于1的值时整列为百分数"""
+        parsed = self.parse("price,commission_rate\n1,3\n1,0.5\n")
+        self.assertEqual(list(parsed.frame['commission_rate']), [0.03, 0.005])
+        parsed = self.parse("price,commission_rate\n1,0.03\n1,0.05\n")
+        self.assertEqual(list(parsed.frame['commission_rate']), [0.03, 0.05])
+        parsed = self.parse("price,commission_rate\n1,0.5\n", rate_unit='percent')
+        self.assertEqual(list(parsed.frame['commission_rate']), [0.005])
+    
+    def test_per_row_errors(self):
+        """测试无法解析或越界的单元格按行报告，且该行被跳过"""
+        parsed = self.parse("model_name,price,cost,sales_volume,refund_rate\n"
+                            "A,abc,10,100,5\nB,-1,10,100,5\nC,10,10,1.5,5\nD,10,10,100,150\nE,10,10,100,5\n")
+        self.assertEqual(list(parsed.frame['model_name']), ['E'])
+        self.assertEqual(parsed.error_rows, 4)
+        self.assertEqual(list(parsed.errors['列']), ['price', 'price', 'sales_volume', 'refund_rate'])
+    
+    def test_sample_csv_refund_rates_used(self):
+        """测试示例CSV中的退款率/秒退率列参与计算"""
+        parsed = parse_inputs(pd.read_csv(SAMPLE_CSV))
+        self.assertTrue(parsed.errors.empty)
+        results = calculate_profit_frame(parsed.frame, 100)
+        self.assertAlmostEqual(results['退款率'].iloc[0], 10.0)
+        self.assertAlmostEqual(results['秒退率'].iloc[0], 8.0)
+        self.assertAlmostEqual(results['退款广告损失'].iloc[0], 2.0 * 0.10)
+    
+    def test_analysis_orders_per_row(self):
+        """测试按行分析订单数，空单元格使用统一订单数"""
+        parsed = self.parse("price,analysis_orders\n10,5\n10,\n")
+        results = calculate_profit_frame(parsed.frame, 100)
+        self.assertEqual(list(results['订单总数']), [5, 100])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 后台作业管理测试
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.job_manager import JobManager, DONE, FAILED, CANCELLED
+
+
+def wait_finished(manager, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.status(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("作业未在规定时间内完成")
+
+
+class TestJobManager(unittest.TestCase):
+    """后台作业管理测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manager = JobManager(self.tmp_dir)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_result_survives_new_manager(self):
+        """测试作业结果写入磁盘，新的管理器实例也能取回"""
+        def job(ctx, n):
+            ctx.report_progress(1, 2)
+            return pd.DataFrame({'总利润': range(n)})
+        
+        job_id = self.manager.submit(job, 5, name="test.csv")
+        job = wait_finished(self.manager, job_id)
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.progress, 1.0)
+        
+        restored = JobManager(self.tmp_dir)
+        self.assertEqual(restored.status(job_id).status, DONE)
+        self.assertEqual(list(restored.result(job_id)['总利润']), [0, 1, 2, 3, 4])
+    
+    def test_cancel_and_failure(self):
+        """测试取消和失败状态"""
+        started = threading.Event()
+        
+        def slow_job(ctx):
+            started.set()
+            while True:
+                ctx.check_cancelled()
+                time.sleep(0.001)
+        
+        def bad_job(ctx):
+            raise ValueError("缺少price列")
+        
+        slow_id = self.manager.submit(slow_job)
+        started.wait(1)
+        self.manager.cancel(slow_id)
+        self.assertEqual(wait_finished(self.manager, slow_id).status, CANCELLED)
+        
+        failed = wait_finished(self.manager, self.manager.submit(bad_job))
+        self.assertEqual(failed.status, FAILED)
+        self.assertIn("price", failed.error)
+    
+    def test_result_write_failure_marks_failed(self):
+        """测试结果写入失败时作业记为失败，而不是一直停留在运行中"""
+        job = wait_finished(self.manager, self.manager.submit(lambda ctx: object()))
+        self.assertEqual(job.status, FAILED)
+        self.assertIsNotNone(job.error)
+    
+    def test_rejects_invalid_job_ids(self):
+        """测试不符合格式的作业ID（如路径穿越）不会读取作业目录以外的文件"""
+        outside = os.path.join(os.path.dirname(self.tmp_dir), 'outside.pkl')
+        pd.DataFrame({'a': [1]}).to_pickle(outside)
+        try:
+            job_id = os.path.join('..', 'outside')
+            self.assertIsNone(self.manager.result(job_id))
+            self.assertIsNone(self.manager.status(job_id))
+            self.assertIsNone(self.manager.result_path(job_id))
+            self.assertIsNone(self.manager.status('20250101_000000_ABCDEFGH'))
+        finally:
+            os.remove(outside)
+    
+    def test_cleanup_by_age_and_count(self):
+        """测试按保留时间和数量清理已完成作业"""
+        manager = JobManager(self.tmp_dir, max_age_hours=24, max_jobs=2)
+        job_ids = [manager.submit(lambda ctx: pd.DataFrame({'a': [1]})) for _ in range(3)]
+        for job_id in job_ids:
+            wait_finished(manager, job_id)
+        
+        self.assertEqual(manager.cleanup(), 1)
+        self.assertEqual(sum(manager.status(job_id) is not None for job_id in job_ids), 2)
+        self.assertEqual(manager.cleanup(now=datetime.now() + timedelta(hours=25)), 2)
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
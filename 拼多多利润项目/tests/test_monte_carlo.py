@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 利润风险模拟测试
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.input_module import ProfitInput
+from src.calculation_engine import calculate_profit
+from src.monte_carlo import Distribution, beta_around, simulate_profit, simulate_profit_draws, simulate_batch
+
+BASE_INPUT = ProfitInput(
+    model_name="SKU-MC", price=50.0, cost=30.0, other_cost=1.0, shipping_fee=3.0,
+    commission_rate=0.03, sales_volume=100, return_quantity=20, deal_orders=95,
+    net_deal_orders=85, ad_deal_price=8.0, ad_enabled=True
+)
+
+
+class TestMonteCarlo(unittest.TestCase):
+    """利润风险模拟测试类"""
+    
+    def test_fixed_distributions_match_engine(self):
+        """测试所有参数固定时每次抽样都等于单次计算结果"""
+        fixed = {'refund_rate': Distribution('fixed', (BASE_INPUT.refund_rate,))}
+        profits = simulate_profit_draws(BASE_INPUT, 100, fixed, draws=1000, seed=0)
+        np.testing.assert_allclose(profits, calculate_profit(BASE_INPUT, 100)['总利润'])
+    
+    def test_seeded_and_batched_reproducible(self):
+        """测试固定种子可复现，且与分批大小无关"""
+        cost = {'cost': Distribution('normal', (30.0, 5.0))}
+        a = simulate_profit_draws(BASE_INPUT, 100, cost, draws=10000, seed=7, batch_size=10000)
+        b = simulate_profit_draws(BASE_INPUT, 100, cost, draws=10000, seed=7, batch_size=10000)
+        np.testing.assert_array_equal(a, b)
+        c = simulate_profit_draws(BASE_INPUT, 100, cost, draws=10000, seed=8, batch_size=10000)
+        self.assertFalse(np.array_equal(a, c))
+    
+    def test_summary_metrics(self):
+        """测试亏损概率、VaR、CVaR 与分位数的关系"""
+        summary = simulate_profit(BASE_INPUT, 100, {'cost': Distribution('normal', (40.0, 5.0))},
+                                  draws=200000, seed=1)
+        self.assertGreater(summary['亏损概率'], 0)
+        self.assertAlmostEqual(summary['VaR'], -summary['P5'], places=6)
+        self.assertGreaterEqual(summary['CVaR'], summary['VaR'])
+        self.assertLess(summary['P5'], summary['P50'])
+        self.assertLess(summary['P50'], summary['P95'])
+    
+    def test_beta_around(self):
+        """测试 Beta 分布均值与退化情况"""
+        rng = np.random.default_rng(0)
+        self.assertAlmostEqual(beta_around(0.2, 50).sample(rng, 200000).mean(), 0.2, places=2)
+        self.assertEqual(beta_around(0.0).kind, 'fixed')
+        with self.assertRaises(ValueError):
+            simulate_profit_draws(BASE_INPUT, distributions={'sales_volume': Distribution('fixed', (1,))})
+    
+    def test_batch_parallel_matches_serial(self):
+        """测试按进程并行与串行结果一致"""
+        frame = pd.DataFrame([vars(BASE_INPUT)] * 3)
+        frame['model_name'] = ['A', 'B', 'C']
+        serial = simulate_batch(frame, draws=5000, seed=3)
+        parallel = simulate_batch(frame, draws=5000, seed=3, processes=2)
+        pd.testing.assert_frame_equal(serial, parallel)
+        self.assertEqual(list(serial['商品型号']), ['A', 'B', 'C'])
+        # 各商品使用独立随机流
+        self.assertNotEqual(serial.loc[0, '平均利润'], serial.loc[1, '平均利润'])
+    
+    def test_batch_multipliers_relative_to_each_row(self):
+        """测试批量模拟的分布为相对各商品取值的倍数，而不是所有商品共用的绝对值"""
+        frame = pd.DataFrame([vars(BASE_INPUT)] * 2)
+        frame['cost'] = [10.0, 40.0]
+        multipliers = {'cost': Distribution('normal', (1.0, 0.05)), 'refund_rate': Distribution('fixed', (1.0,))}
+        result = simulate_batch(frame, multipliers=multipliers, draws=20000, seed=1)
+        for i in range(2):
+            point = simulate_profit(frame.iloc[i].to_dict(), draws=1000, seed=0,
+                                    distributions={'refund_rate': Distribution('fixed', (BASE_INPUT.refund_rate,))})
+            self.assertAlmostEqual(result.loc[i, '平均利润'], point['平均利润'], delta=abs(point['平均利润']) * 0.02 + 5)
+        self.assertGreater(result.loc[0, '平均利润'], result.loc[1, '平均利润'])
+        with self.assertRaises(ValueError):
+            simulate_profit_draws(BASE_INPUT, distributions={'cost': Distribution('fixed', (1,))},
+                                  multipliers={'cost': Distribution('fixed', (1,))})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
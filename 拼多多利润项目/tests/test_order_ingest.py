@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 订单明细导入测试
+"""
+
+import unittest
+import sys
+import os
+import io
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from src.order_ingest import ingest_orders, attach_costs
+from src.input_schema import parse_inputs
+from src.batch_engine import calculate_profit_frame
+
+COLUMNS = Settings.ORDER_IMPORT_CONFIG["columns"]
+
+
+def make_orders(count: int, seed: int = 0) -> pd.DataFrame:
+    """生成随机订单明细（列名同后台导出）"""
+    rng = np.random.default_rng(seed)
+    shipped = rng.random(count) < 0.8
+    return pd.DataFrame({
+        '订单号': [f"O{i:08d}" for i in range(count)],
+        COLUMNS['sku']: rng.choice(['A-001', 'B-002', 'C-003'], count),
+        COLUMNS['paid_at']: pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 21 * 24, count), unit='h'),
+        COLUMNS['quantity']: rng.integers(1, 4, count),
+        COLUMNS['amount']: rng.uniform(10, 100, count).round(2),
+        COLUMNS['shipped_at']: np.where(shipped, '2025-07-22 10:00:00', ''),
+        COLUMNS['after_sale']: rng.choice(['', '退款成功', '退货退款,退款成功', '售后关闭'], count),
+    })
+
+
+class TestOrderIngest(unittest.TestCase):
+    """订单明细导入测试类"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'orders.csv')
+        self.orders = make_orders(1000)
+        self.orders.to_csv(self.path, index=False, encoding='utf-8-sig')
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def expected(self, freq=None):
+        """不分块、直接分组计算的期望结果"""
+        orders = self.orders
+        shipped = orders[COLUMNS['shipped_at']] != ''
+        refunded = orders[COLUMNS['after_sale']].str.contains('退款成功|退货退款')
+        quantity = orders[COLUMNS['quantity']]
+        keys = [orders[COLUMNS['sku']].rename('model_name')]
+        if freq:
+            keys.append(orders[COLUMNS['paid_at']].dt.to_period(freq).dt.start_time.rename('window_start'))
+        frame = pd.DataFrame({
+            'deal_orders': 1,
+            'net_deal_orders': (~(refunded & ~shipped)).astype(int),
+            'sales_volume': quantity.where(shipped, 0),
+            'return_quantity': quantity.where(shipped & refunded, 0),
+        })
+        return frame.groupby(keys).sum()
+    
+    def test_chunked_matches_full_groupby(self):
+        """测试分块汇总与一次性分组结果一致"""
+        for freq in (None, 'W'):
+            result = ingest_orders(self.path, freq=freq, chunk_size=37)
+            keys = ['model_name'] + (['window_start'] if freq else [])
+            expected = self.expected(freq)
+            actual = result.set_index(keys)[expected.columns]
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_names=False)
+    
+    def test_price_and_skipped_rows(self):
+        """测试实收均价以及缺少商品型号的订单被跳过"""
+        self.orders.loc[0, COLUMNS['sku']] = ''
+        self.orders.to_csv(self.path, index=False, encoding='utf-8-sig')
+        result = ingest_orders(self.path, chunk_size=100)
+        self.assertEqual(result['deal_orders'].sum(), 999)
+        
+        valid = self.orders.iloc[1:]
+        group = valid[valid[COLUMNS['sku']] == 'A-001']
+        price = result.set_index('model_name').loc['A-001', 'price']
+        self.assertAlmostEqual(price, group[COLUMNS['amount']].sum() / group[COLUMNS['quantity']].sum())
+    
+    def test_missing_columns(self):
+        """测试缺少必需列时报错"""
+        self.orders.drop(columns=[COLUMNS['after_sale']]).to_csv(self.path, index=False)
+        with self.assertRaises(ValueError):
+            ingest_orders(self.path)
+    
+    def test_feeds_batch_engine(self):
+        """测试汇总结果合并成本表后可直接批量计算"""
+        aggregates = ingest_orders(self.path)
+        costs = pd.DataFrame({'model_name': ['A-001', 'B-002'], 'cost': [5.0, 6.0], 'commission_rate': [0.03, 0.03]})
+        inputs = attach_costs(aggregates, costs)
+        results = calculate_profit_frame(inputs)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(list(results['商品型号']), ['A-001', 'B-002', 'C-003'])
+        self.assertEqual(list(results['销量']), list(aggregates['sales_volume']))
+    
+    def test_shipping_estimated_from_cost_table(self):
+        """测试成本表只填运费等级或重量时，合并后按等级运费估算运费"""
+        aggregates = ingest_orders(self.path)
+        costs = parse_inputs(pd.read_csv(io.StringIO(
+            "model_name,cost,shipping_fee,shipping_class,weight\n"
+            "A-001,5,,轻货,\nB-002,6,,,10\nC-003,7,4,,\n"
+        ))).frame
+        inputs = attach_costs(aggregates, costs).assign(analysis_orders=1)
+        shipping = calculate_profit_frame(inputs).set_index('商品型号')['运费']
+        low, high = Settings.PINDUODUO_CONFIG["shipping_fee_ranges"]["light"]
+        self.assertAlmostEqual(shipping['A-001'], (low + high) / 2)
+        self.assertGreater(shipping['B-002'], 0)
+        self.assertEqual(shipping['C-003'], 4.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
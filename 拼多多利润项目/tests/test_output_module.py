@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 无界面图表输出测试
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.output_module import CostChartRenderer, chart_filename, save_cost_breakdown_charts
+
+
+class TestCostChartOutput(unittest.TestCase):
+    """成本构成图文件输出测试类"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.results = [
+            {'商品型号': f'A/B {i}', '成本构成': {'商品成本': 50.0 + i, '运费': 5.0, '平台扣点': 3.0}}
+            for i in range(3)
+        ]
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_save_png_and_svg(self):
+        """测试批量保存PNG和SVG"""
+        for fmt, magic in (("png", b"\x89PNG"), ("svg", b"<?xml")):
+            paths = save_cost_breakdown_charts(self.results, fmt=fmt, output_dir=self.tmp.name)
+            self.assertEqual(len(set(paths)), 3)
+            for path in paths:
+                self.assertTrue(path.endswith("." + fmt))
+                self.assertEqual(os.path.dirname(path), self.tmp.name)
+                with open(path, "rb") as f:
+                    self.assertTrue(f.read(5).startswith(magic))
+    
+    def test_renderer_reuses_figure(self):
+        """测试多次渲染复用同一个Figure且只保留当前图形"""
+        renderer = CostChartRenderer()
+        figure = renderer.figure
+        for result in self.results:
+            renderer.render(result['成本构成'], os.path.join(self.tmp.name, "chart.png"))
+        self.assertIs(renderer.figure, figure)
+        self.assertEqual(len(renderer.figure.axes), 1)
+        self.assertEqual(len(renderer.ax.patches), 3)
+        renderer.close()
+    
+    def test_filename_sanitized(self):
+        """测试文件名去除路径分隔符，并拒绝未知格式"""
+        path = chart_filename('A/B 1', 'png', self.tmp.name)
+        self.assertTrue(os.path.basename(path).startswith('cost_breakdown_A_B_1_'))
+        with self.assertRaises(ValueError):
+            chart_filename('A', 'gif')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
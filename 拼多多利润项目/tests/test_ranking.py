@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 批量结果排名测试
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_engine import calculate_profit_frame
+from src.ranking import ranking_metrics, top_k_indices, top_k, top_k_multi, top_k_by_group
+
+
+class TestRanking(unittest.TestCase):
+    """批量结果排名测试类"""
+
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            'model_name': ['A', 'B', 'C', 'D', 'E', 'F'],
+            'category': ['服装', '服装', '家居', '家居', '家居', '服装'],
+            'profit': [10.0, 50.0, np.nan, 30.0, 50.0, -5.0],
+            'rate': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        }, index=[10, 11, 12, 13, 14, 15])
+
+    def test_top_k_matches_full_sort(self):
+        """测试 Top-K 与完整排序结果一致"""
+        values = np.random.default_rng(0).normal(size=10000)
+        expected = np.argsort(-values)[:25]
+        np.testing.assert_array_equal(top_k_indices(values, 25), expected)
+        np.testing.assert_array_equal(top_k_indices(values, 25, largest=False), np.argsort(values)[:25])
+
+    def test_nan_ranked_last(self):
+        """测试 NaN 在两个方向上都排在最后"""
+        values = self.frame['profit'].to_numpy()
+        self.assertNotIn(2, top_k_indices(values, 5, largest=True))
+        self.assertNotIn(2, top_k_indices(values, 5, largest=False))
+        self.assertEqual(top_k_indices(values, 10)[-1], 2)
+
+    def test_k_out_of_range(self):
+        """测试 k 为0或超过行数"""
+        self.assertEqual(len(top_k_indices([1.0, 2.0], 0)), 0)
+        self.assertEqual(list(top_k_indices([1.0, 3.0, 2.0], 10)), [1, 2, 0])
+
+    def test_top_k_frame(self):
+        """测试按列取前 k 行，保留原索引"""
+        bottom = top_k(self.frame, 'profit', 2, largest=False)
+        self.assertEqual(list(bottom['model_name']), ['F', 'A'])
+        self.assertEqual(list(bottom.index), [15, 10])
+
+    def test_top_k_multi_breaks_ties(self):
+        """测试多键排序：主键并列时按次键排序"""
+        result = top_k_multi(self.frame, [('profit', True), ('rate', False)], 2)
+        self.assertEqual(list(result['model_name']), ['B', 'E'])
+        result = top_k_multi(self.frame, [('profit', True), ('rate', True)], 1)
+        self.assertEqual(list(result['model_name']), ['E'])
+
+    def test_top_k_by_group(self):
+        """测试每个类目取前 k 行"""
+        result = top_k_by_group(self.frame, 'category', 'profit', 2)
+        self.assertEqual(list(result['model_name']), ['E', 'D', 'B', 'A'])
+        self.assertEqual(list(result['组内排名']), [1, 2, 1, 2])
+
+    def test_ranking_metrics(self):
+        """测试排名指标：保本差距 = 售价 - 保本售价"""
+        inputs = pd.DataFrame({'model_name': ['A', 'B'], 'price': [100.0, 50.0], 'cost': [60.0, 45.0]})
+        results = calculate_profit_frame(inputs)
+        metrics = ranking_metrics(results)
+        np.testing.assert_allclose(metrics['保本差距'], inputs['price'] - results['保本售价'])
+        self.assertEqual(list(metrics.columns), ['总利润', '利润率', '单均利润', '保本差距'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 批量风险筛查测试
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from src.batch_engine import calculate_profit_frame
+from src.risk_screening import screen_inputs, ERROR_FLAG_COLUMN, WARNING_FLAG_COLUMN
+
+# validate_input 的错误字段 -> 对应的筛查规则
+FIELD_RULES = {
+    'price': ['售价无效'],
+    'cost': ['成本为负'],
+    'commission_rate': ['扣点超限'],
+    'refund_rate': ['退款率超限'],
+    'ad_deal_price': ['广告出价为负', '广告占比超限'],
+}
+
+
+class TestRiskScreening(unittest.TestCase):
+    """批量风险筛查测试类"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        n = 300
+        self.inputs = pd.DataFrame({
+            'price': rng.choice([0.0, 20.0, 100.0], n),
+            'cost': rng.choice([-1.0, 10.0, 60.0], n),
+            'commission_rate': rng.choice([0.0, 0.05, 0.3], n),
+            'refund_rate': rng.choice([0.05, 0.3, 0.6], n),
+            'ad_deal_price': rng.choice([-1.0, 0.0, 5.0, 40.0], n),
+            'ad_enabled': True,
+        })
+    
+    def test_matches_validate_input(self):
+        """测试与逐条 validate_input 的判断一致"""
+        errors = screen_inputs(self.inputs).errors
+        for index, row in self.inputs.iterrows():
+            expected = set(Settings.validate_input(row.to_dict()))
+            for field, rules in FIELD_RULES.items():
+                self.assertEqual(field in expected, bool(errors.loc[index, rules].any()),
+                                 f"第{index}行 {field}")
+    
+    def test_warnings_and_flags(self):
+        """测试依赖结果的预警以及文字标记列"""
+        inputs = pd.DataFrame({
+            'model_name': ['好商品', '薄利', '违规'],
+            'price': [100.0, 100.0, 100.0],
+            'cost': [30.0, 93.0, 30.0],
+            'commission_rate': [0.03, 0.03, 0.5],
+        })
+        results = calculate_profit_frame(inputs)
+        screening = screen_inputs(inputs, results)
+        flags = screening.flags()
+        
+        self.assertEqual(list(screening.error_mask), [False, False, True])
+        self.assertEqual(flags.loc[0, ERROR_FLAG_COLUMN], '')
+        self.assertEqual(flags.loc[0, WARNING_FLAG_COLUMN], '')
+        self.assertEqual(flags.loc[1, WARNING_FLAG_COLUMN], '利润率低于下限；低利润；高成本')
+        self.assertEqual(flags.loc[2, ERROR_FLAG_COLUMN], '扣点超限')
+        self.assertEqual(screening.summary()['扣点超限'], 1)
+    
+    def test_inputs_only_skips_result_warnings(self):
+        """测试不提供结果时只检查输入相关的预警"""
+        screening = screen_inputs(self.inputs)
+        self.assertEqual(list(screening.warnings.columns), ['高退款'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 批量结果分组汇总测试
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_engine import calculate_profit_frame
+from src.input_schema import parse_inputs
+from src.rollups import attach_dimensions, available_dimensions, price_bands, rollup, UNSET_LABEL
+
+
+class TestRollups(unittest.TestCase):
+    """批量结果分组汇总测试类"""
+    
+    def setUp(self):
+        raw = pd.DataFrame({
+            'model_name': ['A', 'B', 'C', 'D'],
+            'category': ['服装', ' 服装 ', '家居', ''],
+            'store': ['一店', '二店', '一店', '二店'],
+            'price': [100.0, 15.0, 60.0, 8.0],
+            'cost': [50.0, 20.0, 30.0, 2.0],
+            'ad_deal_price': [10.0, 0.0, 5.0, 0.0],
+            'ad_enabled': [True, False, True, False],
+        })
+        self.inputs = parse_inputs(raw).frame
+        self.results = attach_dimensions(calculate_profit_frame(self.inputs), self.inputs)
+    
+    def test_parse_group_columns(self):
+        """测试分组维度列去除空白、空单元格为缺失值"""
+        self.assertEqual(str(self.inputs['category'].dtype), 'category')
+        self.assertEqual(list(self.inputs['category'].iloc[:3]), ['服装', '服装', '家居'])
+        self.assertTrue(pd.isna(self.inputs['category'].iloc[3]))
+        self.assertNotIn('category', parse_inputs(pd.DataFrame({'price': [10]})).frame.columns)
+    
+    def test_rollup_matches_manual_sums(self):
+        """测试按类目汇总与手工计算一致"""
+        table = rollup(self.results, ['类目'])
+        self.assertEqual(list(table.index), ['家居', '服装', UNSET_LABEL])
+        
+        clothing = self.results.iloc[:2]
+        row = table.loc['服装']
+        self.assertEqual(row['商品数'], 2)
+        self.assertAlmostEqual(row['总利润'], clothing['总利润'].sum())
+        self.assertAlmostEqual(row['利润率'], clothing['总利润'].sum() / clothing['总收入'].sum() * 100)
+        # B 售价低于成本，未达到保本
+        self.assertAlmostEqual(row['保本覆盖率'], 50.0)
+        self.assertAlmostEqual(table['退款损失占比'].sum(), 100.0)
+    
+    def test_multi_dimension_and_price_band(self):
+        """测试多维度分组和价格带"""
+        table = rollup(self.results, ['店铺', '价格带'])
+        self.assertEqual(table.index.names, ['店铺', '价格带'])
+        self.assertEqual(int(table['商品数'].sum()), 4)
+        self.assertIn(('二店', '0-10'), table.index)
+        
+        bands = price_bands([0, 9.99, 10, 250], edges=[0, 10, 200])
+        self.assertEqual(list(bands), ['0-10', '0-10', '10-200', '200以上'])
+    
+    def test_available_dimensions(self):
+        """测试缺少维度列时只能按价格带汇总"""
+        plain = calculate_profit_frame(self.inputs)
+        self.assertEqual(available_dimensions(plain), ['价格带'])
+        self.assertEqual(available_dimensions(self.results), ['类目', '店铺', '价格带'])
+        with self.assertRaises(ValueError):
+            rollup(plain, ['类目'])
+
+
+if __name__ == '__main__':
+    unittest.main()
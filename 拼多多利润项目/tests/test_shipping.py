@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 运费估算测试
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_engine import calculate_profit_frame
+from src.input_schema import parse_inputs
+from src.shipping import CarrierRates, ShippingEstimator, resolve_shipping_fees
+
+
+class TestShipping(unittest.TestCase):
+    """运费估算测试类"""
+    
+    def setUp(self):
+        # 轻货 0-3kg 运费5-12元，重货 3-30kg 运费15-25元，特殊 30-100kg 运费20-50元
+        self.estimator = ShippingEstimator()
+    
+    def test_weight_binning_and_interpolation(self):
+        """测试按重量分级并在等级运费范围内插值"""
+        fees = self.estimator.range_fees(weights=[0, 1.5, 3, 16.5, 30, 500, np.nan])
+        np.testing.assert_allclose(fees[:6], [5.0, 8.5, 15.0, 20.0, 20.0, 50.0])
+        self.assertTrue(np.isnan(fees[6]))
+    
+    def test_class_without_weight_uses_midpoint(self):
+        """测试只有运费等级（含中文写法）时取范围中点，等级优先于重量"""
+        classes = pd.Series(['light', '重货', ' 特殊 ', 'unknown', None])
+        fees = self.estimator.range_fees(shipping_class=classes)
+        np.testing.assert_allclose(fees[:3], [8.5, 20.0, 35.0])
+        self.assertTrue(np.isnan(fees[3:]).all())
+        
+        fees = self.estimator.range_fees(weights=[1.5, 1.5], shipping_class=['heavy', None])
+        np.testing.assert_allclose(fees, [15.0, 8.5])
+    
+    def test_carrier_rates(self):
+        """测试快递阶梯运价：首重1kg 5元，续重2元/kg"""
+        rates = CarrierRates([1, np.inf], [5, 5], [0, 2])
+        np.testing.assert_allclose(rates.fees([0.5, 1, 3]), [5.0, 5.0, 9.0])
+        capped = CarrierRates([2, 10], [6, 12])
+        self.assertTrue(np.isnan(capped.fees([11])[0]))
+        with self.assertRaises(ValueError):
+            CarrierRates([5, 2], [1, 2])
+    
+    def test_carrier_csv_per_row(self):
+        """测试按行选择快递公司，未指定的使用默认快递公司，超重回落到等级估算"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as f:
+            f.write("carrier,max_weight,fee,per_kg\n中通,1,4,0\n中通,,4,1.5\n顺丰,20,18,0\n")
+        try:
+            self.estimator.load_carrier_csv(f.name)
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(self.estimator.default_carrier, '中通')
+        
+        frame = pd.DataFrame({
+            'weight': [3.0, 3.0, 25.0, np.nan],
+            'carrier': pd.Categorical(['中通', '顺丰', '顺丰', '顺丰']),
+            'shipping_class': [None, None, None, 'light'],
+        })
+        np.testing.assert_allclose(self.estimator.estimate(frame), [7.0, 18.0, 15.0 + 10 * 22 / 27, 8.5])
+        np.testing.assert_allclose(self.estimator.carrier_fees([3.0]), [7.0])
+    
+    def test_batch_engine_uses_estimate(self):
+        """测试批量计算时未填写运费的行使用估算值，已填写的保持不变"""
+        raw = pd.DataFrame({
+            'price': [100.0, 100.0, 100.0],
+            'shipping_fee': [None, 6.0, None],
+            'weight': [1.5, 20.0, None],
+        })
+        parsed = parse_inputs(raw)
+        self.assertTrue(np.isnan(parsed.frame['shipping_fee'].iloc[0]))
+        np.testing.assert_allclose(resolve_shipping_fees(parsed.frame)['shipping_fee'].iloc[:2], [8.5, 6.0])
+        
+        results = calculate_profit_frame(parsed.frame)
+        np.testing.assert_allclose(results['运费'], [850.0, 600.0, 0.0])
+    
+    def test_without_hint_columns_unchanged(self):
+        """测试没有重量和运费等级列时运费缺省为0（与此前一致）"""
+        parsed = parse_inputs(pd.DataFrame({'price': [100.0], 'shipping_fee': [None]}))
+        self.assertEqual(parsed.frame['shipping_fee'].iloc[0], 0.0)
+        self.assertIs(resolve_shipping_fees(parsed.frame), parsed.frame)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼多多利润项目 - 后台任务执行器测试
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.task_runner import BackgroundTaskRunner
+
+
+class FakeScheduler:
+    """模拟 root.after：记录回调，由测试在"主线程"中手动执行"""
+    
+    def __init__(self):
+        self.pending = []
+    
+    def __call__(self, delay_ms, callback):
+        self.pending.append(callback)
+    
+    def run_until(self, predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            callbacks, self.pending = self.pending, []
+            for callback in callbacks:
+                callback()
+            time.sleep(0.005)
+
+
+class TestBackgroundTaskRunner(unittest.TestCase):
+    """后台任务执行器测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.scheduler = FakeScheduler()
+        self.runner = BackgroundTaskRunner(self.scheduler)
+        self.main_thread = threading.current_thread()
+    
+    def tearDown(self):
+        self.runner.shutdown(wait=True)
+    
+    def test_progress_partial_and_done_on_main_thread(self):
+        """测试进度、部分结果和完成回调都在主线程执行"""
+        events = []
+        
+        def task(ctx, count):
+            for i in range(count):
+                ctx.emit([i])
+                ctx.report_progress(i + 1, count)
+            return "ok"
+        
+        def record(kind):
+            def callback(*args):
+                self.assertIs(threading.current_thread(), self.main_thread)
+                events.append((kind,) + args)
+            return callback
+        
+        handle = self.runner.submit(task, 3, on_done=record('done'),
+                                    on_progress=record('progress'), on_partial=record('partial'))
+        self.scheduler.run_until(lambda: handle.done)
+        
+        self.assertEqual([e for e in events if e[0] == 'partial'], [('partial', [0]), ('partial', [1]), ('partial', [2])])
+        self.assertEqual(events[-2], ('progress', 3, 3, ''))
+        self.assertEqual(events[-1], ('done', 'ok'))
+    
+    def test_cancellation(self):
+        """测试取消后任务停止并回调 on_cancelled"""
+        started = threading.Event()
+        outcome = []
+        
+        def task(ctx):
+            started.set()
+            while True:
+                ctx.check_cancelled()
+                time.sleep(0.001)
+        
+        handle = self.runner.submit(task, on_done=outcome.append,
+                                    on_cancelled=lambda: outcome.append('cancelled'))
+        started.wait(1)
+        handle.cancel()
+        self.scheduler.run_until(lambda: handle.done)
+        self.assertEqual(outcome, ['cancelled'])
+    
+    def test_error_callback(self):
+        """测试任务异常传给 on_error"""
+        errors = []
+        
+        def task(ctx):
+            raise ValueError("bad csv")
+        
+        handle = self.runner.submit(task, on_error=errors.append)
+        self.scheduler.run_until(lambda: handle.done)
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], ValueError)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
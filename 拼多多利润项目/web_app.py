@@ -1,9 +1,29 @@
+import hashlib
+import io
+import os
 import streamlit as st
 import pandas as pd
 from src.input_module import collect_streamlit_input
 from src.calculation_engine import calculate_profit
-from src.output_module import create_streamlit_report, create_profit_trend_chart, export_to_excel
+from src.batch_engine import calculate_profit_frame
+from src.input_schema import ParsedInputs, parse_inputs
+from src.ad_budget import allocate_ad_budget, plan_summary, suggest_ad_bids, NOT_RECOMMENDED
+from src.ranking import RANKING_METRICS, ranking_metrics, top_k_indices
+from src.rollups import attach_dimensions, available_dimensions, rollup
+from src.commission import CommissionTable, resolve_commission_rates
+from src.shipping import ShippingEstimator, resolve_shipping_fees
+from src.cashflow import project_cashflow
+from src.monte_carlo import Distribution, beta_around, simulate_profit_draws, summarize
+from src.risk_screening import screen_inputs, ERROR_FLAG_COLUMN, WARNING_FLAG_COLUMN
+from src.job_manager import job_manager, DONE, FAILED, CANCELLED
+from config.settings import Settings
+from src.output_module import (
+    create_streamlit_report, create_profit_trend_chart, create_batch_profit_chart,
+    create_profit_histogram, export_to_excel, export_batch_to_excel
+)
 from src.history_manager import history_manager
+from src.elasticity import ElasticityModel, INSUFFICIENT
+from src.history_maintenance import start_background_maintenance
 import plotly.express as px
 from datetime import datetime
 
@@ -13,6 +33,14 @@ st.set_page_config(
     layout="wide"
 )
 
+# 历史记录改为后台批量写入，保存不再阻塞页面渲染（重复调用无副作用）
+history_manager.enable_write_behind()
+# 长期运行的服务定期滚动归档并按保留策略压缩历史记录
+start_background_maintenance(history_manager)
+
+CACHE_MAX_ENTRIES = Settings.WEB_CACHE_CONFIG["max_entries"]
+CACHE_TTL = Settings.WEB_CACHE_CONFIG["ttl_seconds"]
+
 def main():
     st.title("💰 拼多多利润分析系统")
     st.markdown("---")
@@ -21,7 +49,7 @@ def main():
         st.header("🛠️ 功能选择")
         mode = st.selectbox(
             "选择功能",
-            ["单品利润分析", "批量分析", "利润趋势分析", "历史数据管理"]
+            ["单品利润分析", "批量分析", "利润趋势分析", "利润风险模拟", "历史数据管理"]
         )
         
         st.header("📊 分析设置")
@@ -71,45 +99,64 @@ def main():
         st.header("📊 批量商品分析")
         
         uploaded_file = st.file_uploader("上传CSV文件", type=['csv'])
+        batch_inputs = None
         
         if uploaded_file is not None:
-            df = pd.read_csv(uploaded_file)
+            data = uploaded_file.getvalue()
+            file_hash = hashlib.sha256(data).hexdigest()
+            df = parse_upload(file_hash, data)
             st.write("📋 数据预览:")
             st.dataframe(df.head())
             
+            parsed = parse_batch_inputs(file_hash, df)
+            if len(parsed.errors):
+                st.warning(f"⚠️ {parsed.error_rows} 行数据有误，计算时将跳过")
+                with st.expander("查看错误明细"):
+                    st.dataframe(parsed.errors, use_container_width=True)
+            
+            # 含 category 列时，未填写扣点的商品按类目扣点表补齐（默认使用配置中的类目扣点）
+            job_inputs, table_hash, carrier_hash = parsed.frame, None, None
+            if 'category' in parsed.frame.columns:
+                table_file = st.file_uploader("类目扣点表（可选，列: category, commission_rate）", type=['csv'])
+                table = None
+                if table_file is not None:
+                    table_data = table_file.getvalue()
+                    table_hash = hashlib.sha256(table_data).hexdigest()
+                    try:
+                        table = load_commission_table(table_hash, table_data)
+                        st.caption(f"已加载 {len(table)} 个类目的扣点")
+                    except ValueError as e:
+                        st.error(f"❌ 类目扣点表有误: {e}")
+                        table_hash = None
+                job_inputs = resolve_commission_rates(parsed.frame, table)
+            
+            # 含 weight 列时，未填写运费的商品可按快递运价表计算（默认按等级运费范围估算）
+            if 'weight' in parsed.frame.columns or 'shipping_class' in parsed.frame.columns:
+                estimator = None
+                if 'weight' in parsed.frame.columns:
+                    carrier_file = st.file_uploader("快递运价表（可选，列: [carrier,] max_weight, fee[, per_kg]）",
+                                                    type=['csv'])
+                    if carrier_file is not None:
+                        carrier_data = carrier_file.getvalue()
+                        carrier_hash = hashlib.sha256(carrier_data).hexdigest()
+                        try:
+                            estimator = load_shipping_estimator(carrier_hash, carrier_data)
+                            st.caption(f"已加载快递运价: {'、'.join(estimator.carriers)}")
+                        except ValueError as e:
+                            st.error(f"❌ 快递运价表有误: {e}")
+                            carrier_hash = None
+                job_inputs = resolve_shipping_fees(job_inputs, estimator)
+            
+            rates_hash = f"{table_hash}:{carrier_hash}"
             if st.button("🔍 批量计算"):
-                results = []
-                for _, row in df.iterrows():
-                    from src.input_module import ProfitInput
-                    input_data = ProfitInput(
-                        model_name=row.get('model_name', f'SKU-{_}'),
-                        price=row.get('price', 0),
-                        cost=row.get('cost', 0),
-                        other_cost=row.get('other_cost', 0),
-                        shipping_fee=row.get('shipping_fee', 0),
-                        commission_rate=row.get('commission_rate', 0) / 100 if row.get('commission_rate', 0) > 1 else row.get('commission_rate', 0),
-                        sales_volume=row.get('sales_volume', 100),  # 默认销量100
-                        return_quantity=row.get('return_quantity', 10),  # 默认退货10
-                        deal_orders=row.get('deal_orders', 95),  # 默认成交订单95
-                        net_deal_orders=row.get('net_deal_orders', 85),  # 默认净成交订单85
-                        post_shipping_refund_ratio=0.0,
-                        ad_deal_price=row.get('ad_deal_price', 0),
-                        ad_enabled=row.get('ad_enabled', False)
-                    )
-                    result = calculate_profit(input_data, order_count)
-                    results.append(result)
-                
-                results_df = pd.DataFrame(results)
-                st.write("📊 批量分析结果:")
-                st.dataframe(results_df)
-                
-                fig = px.bar(
-                    results_df.reset_index(),
-                    x='index',
-                    y='总利润',
-                    title='各商品利润对比'
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                # 同一文件、扣点/运价表和订单数复用已有作业；作业在后台运行，脚本重跑不会中断计算
+                job_id = submit_batch_job((file_hash, rates_hash), job_inputs, order_count, uploaded_file.name)
+                st.session_state['batch_job_id'] = job_id
+                st.session_state['batch_job_hash'] = (file_hash, rates_hash)
+            
+            # 当前上传的文件即为作业的输入时，导出报告可附带计算公式
+            if st.session_state.get('batch_job_hash') == (file_hash, rates_hash):
+                batch_inputs = job_inputs
         
         else:
             st.info("请上传包含商品信息的CSV文件")
@@ -118,14 +165,20 @@ def main():
             st.write("- price: 商品售价")
             st.write("- cost: 商品成本")
             st.write("- other_cost: 其他成本")
-            st.write("- shipping_fee: 运费")
-            st.write("- commission_rate: 平台扣点（如3表示3%）")
+            st.write("- shipping_fee: 运费（可选，未填写时按 weight 或 shipping_class 估算）")
+            st.write("- weight / shipping_class / carrier: 重量kg / 运费等级(轻货、重货、特殊) / 快递公司（可选）")
+            st.write("- commission_rate: 平台扣点（如3表示3%，也可填0.03；同一列单位需一致）")
+            st.write("- category: 类目（可选，未填扣点的商品按类目扣点表取值）")
+            st.write("- store: 店铺（可选，用于分组汇总）")
             st.write("- sales_volume: 销量（可选，默认100）")
             st.write("- return_quantity: 退货数量（可选，默认10）")
             st.write("- deal_orders: 成交订单数（可选，默认95）")
             st.write("- net_deal_orders: 净成交订单数（可选，默认85）")
             st.write("- ad_deal_price: 每笔成交的广告费用（可选）")
-            st.write("- ad_enabled: 是否启用广告 (True/False)（可选）")
+            st.write("- refund_rate / instant_refund_rate: 退款率/秒退率（可选，填写后优先于按数量计算）")
+            st.write("- ad_enabled: 是否启用广告 (True/False、是/否、1/0)（可选）")
+        
+        show_batch_job(batch_inputs)
     
     elif mode == "利润趋势分析":
         st.header("📈 利润趋势分析")
@@ -180,6 +233,9 @@ def main():
             st.write("📊 趋势数据:")
             st.dataframe(trend_df)
     
+    elif mode == "利润风险模拟":
+        show_risk_simulation(order_count)
+    
     elif mode == "历史数据管理":
         show_history_management()
     
@@ -197,6 +253,319 @@ def main():
     - 系统会自动计算保本广告费用，帮助您优化广告策略
     """)
 
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="正在解析CSV...")
+def parse_upload(file_hash: str, _data: bytes) -> pd.DataFrame:
+    """解析上传的CSV，按文件内容哈希缓存"""
+    return pd.read_csv(io.BytesIO(_data))
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def parse_batch_inputs(file_hash: str, _df: pd.DataFrame) -> ParsedInputs:
+    """把上传的表格解析为批量引擎输入，按文件内容哈希缓存"""
+    return parse_inputs(_df)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def load_commission_table(table_hash: str, _data: bytes) -> CommissionTable:
+    """解析上传的类目扣点表，按文件内容哈希缓存"""
+    return CommissionTable.from_frame(pd.read_csv(io.BytesIO(_data), encoding='utf-8-sig'))
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def load_shipping_estimator(carrier_hash: str, _data: bytes) -> ShippingEstimator:
+    """解析上传的快递运价表，按文件内容哈希缓存"""
+    estimator = ShippingEstimator()
+    estimator.load_carrier_frame(pd.read_csv(io.BytesIO(_data), encoding='utf-8-sig'))
+    return estimator
+
+def submit_batch_job(key: tuple, inputs: pd.DataFrame, order_count: int, name: str) -> str:
+    """
+    提交批量作业
+    
+    本会话中按 key（文件哈希, 扣点/运价表哈希）+ 订单数记录作业ID，相同输入复用
+    仍在运行或已完成的作业；作业失败、取消或已被清理时重新提交。
+    """
+    submitted = st.session_state.setdefault('batch_jobs', {})
+    job_id = submitted.get((key, order_count))
+    job = job_manager.status(job_id) if job_id else None
+    if job is None or job.status in (FAILED, CANCELLED):
+        job_id = job_manager.submit(run_batch_job, inputs, order_count, name=name)
+        submitted[(key, order_count)] = job_id
+    return job_id
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="正在加载结果...")
+def load_batch_result(job_id: str) -> pd.DataFrame:
+    """读取已完成作业的结果（仅对已完成的作业调用）"""
+    return job_manager.result(job_id)
+
+def run_batch_job(ctx, inputs: pd.DataFrame, order_count: int, chunk_size: int = 50000) -> pd.DataFrame:
+    """后台作业：分块向量化计算，每块汇报一次进度"""
+    total = len(inputs)
+    
+    chunks = []
+    for start in range(0, total, chunk_size):
+        ctx.check_cancelled()
+        chunk = inputs.iloc[start:start + chunk_size]
+        results = calculate_profit_frame(chunk, order_count)
+        chunks.append(attach_dimensions(results, chunk).join(screen_inputs(chunk, results).flags()))
+        done = min(start + chunk_size, total)
+        ctx.report_progress(done, total, f"已计算 {done}/{total} 条")
+    
+    if chunks:
+        return pd.concat(chunks)
+    results = calculate_profit_frame(inputs, order_count)
+    return attach_dimensions(results, inputs).join(screen_inputs(inputs, results).flags())
+
+def show_batch_job(inputs: pd.DataFrame = None):
+    """显示批量作业的状态和结果（inputs 为作业对应的解析后输入，用于导出计算公式）"""
+    with st.expander("🔎 按作业ID查询"):
+        queried_id = st.text_input("作业ID", help="作业结果保存在服务器上，可在其他会话中查询")
+    
+    if queried_id.strip():
+        inputs = None
+    job_id = queried_id.strip() or st.session_state.get('batch_job_id')
+    if not job_id:
+        return
+    
+    job = job_manager.status(job_id)
+    if job is None:
+        st.warning(f"未找到作业: {job_id}")
+        return
+    
+    st.caption(f"作业ID: {job_id}（{job.name}）")
+    
+    if not job.finished:
+        st.progress(job.progress)
+        st.info(f"⏳ 计算中... {job.message}")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("🔄 刷新状态")
+        with col2:
+            if st.button("⏹️ 取消作业"):
+                job_manager.cancel(job_id)
+                st.rerun()
+        return
+    
+    if job.status == FAILED:
+        st.error(f"❌ 批量计算失败: {job.error}")
+        return
+    if job.status == CANCELLED:
+        st.warning("⚠️ 作业已取消")
+        return
+    
+    results_df = load_batch_result(job_id) if job.status == DONE else None
+    if results_df is None:
+        st.warning("作业结果已被清理")
+        return
+    
+    st.write("📊 批量分析结果:")
+    if ERROR_FLAG_COLUMN in results_df.columns:
+        error_count = int((results_df[ERROR_FLAG_COLUMN] != '').sum())
+        warning_count = int((results_df[WARNING_FLAG_COLUMN] != '').sum())
+        if error_count:
+            st.error(f"🚫 {error_count} 个商品超出风险限制（见“{ERROR_FLAG_COLUMN}”列）")
+        if warning_count:
+            st.warning(f"⚠️ {warning_count} 个商品触发风险预警（见“{WARNING_FLAG_COLUMN}”列）")
+    show_ranked_results(results_df)
+    
+    st.plotly_chart(create_batch_profit_chart(results_df), use_container_width=True)
+    if len(results_df) > Settings.CHART_CONFIG["bar_top_n"]:
+        st.plotly_chart(create_profit_histogram(results_df), use_container_width=True)
+    
+    show_rollups(job_id, results_df)
+    show_ad_bid_suggestions(job_id, results_df)
+    show_ad_budget_plan(job_id, results_df)
+    if inputs is not None:
+        show_cashflow_projection(inputs)
+    
+    sidecars = st.multiselect("附带导出", ["csv", "parquet"], help="与Excel报告同名的CSV/Parquet文件")
+    if st.button("📥 导出Excel报告"):
+        filename = os.path.join(
+            Settings.OUTPUT_DIR, f"batch_{job_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        )
+        with st.spinner("正在导出..."):
+            written = export_batch_to_excel(results_df, filename, inputs=inputs, sidecars=sidecars)
+        st.success("✅ 报告已导出: " + "，".join(written.values()))
+        with open(written["xlsx"], "rb") as f:
+            st.download_button("⬇️ 下载Excel报告", f.read(), file_name=os.path.basename(filename))
+
+def show_ranked_results(results_df: pd.DataFrame):
+    """
+    显示批量结果表
+
+    结果较少时显示完整表格；大目录只按所选指标显示前/后 N 名（argpartition 选取，
+    不对整表排序），完整结果通过下方的导出按钮写入文件。
+    """
+    config = Settings.RANKING_CONFIG
+    if len(results_df) <= config["full_table_rows"]:
+        st.dataframe(results_df)
+        return
+    
+    st.caption(f"共 {len(results_df)} 个商品，仅显示排名前后的商品，完整结果请导出")
+    col1, col2 = st.columns(2)
+    with col1:
+        metric = st.selectbox("排名指标", RANKING_METRICS)
+    with col2:
+        display_n = st.number_input("显示数量", min_value=1, max_value=config["full_table_rows"],
+                                    value=config["display_n"], step=10)
+    
+    values = ranking_metrics(results_df)[metric].to_numpy()
+    ranked = results_df.assign(**{metric: values}) if metric not in results_df.columns else results_df
+    tab_top, tab_bottom = st.tabs([f"🔝 前 {display_n} 名", f"🔻 后 {display_n} 名"])
+    with tab_top:
+        st.dataframe(ranked.iloc[top_k_indices(values, display_n, largest=True)])
+    with tab_bottom:
+        st.dataframe(ranked.iloc[top_k_indices(values, display_n, largest=False)])
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="正在汇总...")
+def compute_rollup(job_id: str, by: tuple, _results: pd.DataFrame) -> pd.DataFrame:
+    """分组汇总，按作业ID + 维度缓存（切换维度组合后再切回无需重算）"""
+    return rollup(_results, by)
+
+def show_rollups(job_id: str, results_df: pd.DataFrame):
+    """按类目、店铺、价格带汇总批量结果"""
+    with st.expander("📦 分组汇总"):
+        dimensions = available_dimensions(results_df)
+        by = st.multiselect("分组维度", dimensions, default=dimensions[:1])
+        if not by:
+            st.info("请选择至少一个分组维度")
+            return
+        
+        table = compute_rollup(job_id, tuple(by), results_df)
+        st.dataframe(table, use_container_width=True)
+        if len(by) == 1:
+            chart_data = table.reset_index()
+            fig = px.bar(chart_data, x=by[0], y='总利润', color='利润率',
+                         color_continuous_scale='RdYlGn', title=f"各{by[0]}总利润")
+            st.plotly_chart(fig, use_container_width=True)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="正在计算出价建议...")
+def compute_ad_bid_suggestions(job_id: str, _results: pd.DataFrame) -> tuple:
+    """出价建议及其CSV下载内容，按作业ID缓存（折叠的展开区也会执行，避免每次重跑都重算）"""
+    suggestions = suggest_ad_bids(_results)
+    return suggestions, suggestions.to_csv(index=False).encode('utf-8-sig')
+
+def show_ad_bid_suggestions(job_id: str, results_df: pd.DataFrame):
+    """全部商品的保守/适中/激进出价建议，与保本广告出价比较"""
+    with st.expander("🎯 广告出价建议"):
+        suggestions, csv_data = compute_ad_bid_suggestions(job_id, results_df)
+        counts = suggestions['建议档位'].value_counts()
+        columns = st.columns(len(counts) or 1)
+        for column, (tier, count) in zip(columns, counts.items()):
+            column.metric(tier, int(count))
+        
+        recommended = suggestions[suggestions['建议档位'] != NOT_RECOMMENDED]
+        display_rows = Settings.RANKING_CONFIG["full_table_rows"]
+        if len(recommended) > display_rows:
+            st.caption(f"仅显示前 {display_rows} 个可投放商品，完整建议请下载")
+        st.dataframe(recommended.head(display_rows), use_container_width=True)
+        st.download_button("⬇️ 下载出价建议", csv_data, file_name="ad_bid_suggestions.csv", mime="text/csv")
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="正在分配预算...")
+def compute_ad_budget_plan(job_id: str, budget: float, capacity: int, bid_ratio: float,
+                           _results: pd.DataFrame) -> tuple:
+    """预算分配计划、汇总和CSV下载内容，按作业ID + 参数缓存"""
+    plan = allocate_ad_budget(_results, budget, capacity=capacity, bid_ratio=bid_ratio)
+    return plan, plan_summary(plan), plan.to_csv(index=False).encode('utf-8-sig')
+
+def show_ad_budget_plan(job_id: str, results_df: pd.DataFrame):
+    """在批量结果的商品之间分配广告预算"""
+    with st.expander("💰 广告预算分配"):
+        config = Settings.AD_BUDGET_CONFIG
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            budget = st.number_input("每日广告预算 (元)", min_value=0.0, value=1000.0, step=100.0)
+        with col2:
+            capacity = st.number_input("单品每日可承接广告成交数", min_value=0, value=config["default_order_capacity"],
+                                       step=1)
+        with col3:
+            bid_ratio = st.slider("未设出价商品的建议出价/保本出价", 0.1, 1.0, config["default_bid_ratio"], 0.05)
+        
+        plan, summary, csv_data = compute_ad_budget_plan(job_id, budget, capacity, bid_ratio, results_df)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("投放商品数", summary['投放商品数'])
+        col2.metric("预计广告成交", f"{summary['预计广告成交']:.0f}")
+        col3.metric("预计广告利润", f"{summary['预计广告利润']:.2f}元")
+        
+        funded = plan[plan['分配预算'] > 0].sort_values('每元净利润', ascending=False)
+        st.dataframe(funded, use_container_width=True)
+        st.download_button("⬇️ 下载出价计划", csv_data, file_name="ad_bid_plan.csv", mime="text/csv")
+
+def show_cashflow_projection(inputs: pd.DataFrame):
+    """逐日预测目录的回款、退款、履约成本、广告支出和累计现金"""
+    with st.expander("💵 现金流预测"):
+        config = Settings.CASHFLOW_CONFIG
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            horizon = st.number_input("预测天数", min_value=1, max_value=730, value=config["horizon_days"], step=30)
+        with col2:
+            settlement_lag = st.number_input("回款周期 (天)", min_value=0, value=config["settlement_lag_days"], step=1)
+        with col3:
+            refund_delay = st.number_input("退款发生时间 (天)", min_value=0, value=config["refund_delay_days"], step=1,
+                                           help="下单到发货后退款的平均天数，早于回款时从待结算货款中扣除")
+        with col4:
+            opening_cash = st.number_input("期初现金 (元)", value=float(config["opening_cash"]), step=1000.0)
+        st.caption(f"日均订单取 daily_orders 列，没有时按销量 ÷ {config['sales_period_days']} 天折算")
+        
+        if not st.button("📈 开始预测"):
+            return
+        with st.spinner("正在预测..."):
+            projection = project_cashflow(inputs, int(horizon), int(settlement_lag), int(refund_delay), opening_cash)
+        daily = projection.daily
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("期末现金", f"{daily['累计现金'].iloc[-1]:.2f}元")
+        col2.metric("最低现金", f"{daily['累计现金'].min():.2f}元", help=f"第 {daily['累计现金'].idxmin()} 天")
+        col3.metric("期末待回款", f"{projection.receivable:.2f}元")
+        col4.metric("期末未回本商品", int(projection.skus['回本日'].isna().sum()))
+        
+        fig = px.line(daily.reset_index(), x='天数', y=['累计现金', '净现金流'], title="每日现金流")
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(daily, use_container_width=True)
+        st.download_button("⬇️ 下载商品现金流", projection.skus.to_csv(index=False).encode('utf-8-sig'),
+                           file_name="sku_cashflow.csv", mime="text/csv")
+
+def show_risk_simulation(order_count: int):
+    """利润风险模拟界面：对退款率、成本、广告出价抽样，查看利润分布"""
+    st.header("🎲 利润风险模拟")
+    
+    user_input = collect_streamlit_input()
+    
+    st.subheader("⚙️ 不确定性设置")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        concentration = st.number_input(
+            "退款率集中度", min_value=1.0, value=float(Settings.MONTE_CARLO_CONFIG["rate_concentration"]),
+            help="退款率按以当前退款率为均值的Beta分布抽样，数值越大波动越小"
+        )
+    with col2:
+        cost_std = st.number_input("成本波动 (%)", min_value=0.0, value=10.0, step=1.0, help="商品成本的标准差占成本的比例")
+    with col3:
+        ad_std = st.number_input("广告出价波动 (%)", min_value=0.0, value=20.0, step=1.0, help="成交出价的标准差占出价的比例")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        draws = st.number_input("模拟次数", min_value=1000, max_value=Settings.MONTE_CARLO_CONFIG["draws"],
+                                value=200000, step=10000)
+    with col2:
+        seed = st.number_input("随机种子", min_value=0, value=42, step=1, help="相同种子结果可复现")
+    
+    if st.button("🎲 开始模拟", type="primary"):
+        distributions = {
+            'refund_rate': beta_around(user_input.refund_rate, concentration),
+            'cost': Distribution('normal', (user_input.cost, user_input.cost * cost_std / 100)),
+            'ad_deal_price': Distribution('normal', (user_input.ad_deal_price, user_input.ad_deal_price * ad_std / 100)),
+        }
+        with st.spinner("正在模拟..."):
+            profits = simulate_profit_draws(user_input, order_count, distributions, int(draws), int(seed))
+        summary = summarize(profits)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("平均利润", f"{summary['平均利润']:.2f}元")
+        col2.metric("亏损概率", f"{summary['亏损概率']:.2%}")
+        confidence = Settings.MONTE_CARLO_CONFIG["confidence"]
+        col3.metric(f"VaR ({confidence:.0%})", f"{summary['VaR']:.2f}元", help="该置信度下的最大亏损，负数表示仍盈利")
+        col4.metric(f"CVaR ({confidence:.0%})", f"{summary['CVaR']:.2f}元", help="最差情形下的平均亏损")
+        
+        st.plotly_chart(create_profit_histogram(pd.DataFrame({'总利润': profits})), use_container_width=True)
+        st.dataframe(pd.DataFrame([summary]).T.rename(columns={0: '数值'}), use_container_width=True)
+
 def show_history_management():
     """显示历史数据管理界面"""
     st.header("📚 历史数据管理")
@@ -226,7 +595,7 @@ def show_history_management():
             st.metric("最新分析利润", f"{latest['result']['总利润']:.2f}元")
     
     # 功能选项卡
-    tab1, tab2, tab3, tab4 = st.tabs(["📋 查看记录", "🔍 搜索记录", "📊 利润趋势", "🛠️ 管理操作"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📋 查看记录", "🔍 搜索记录", "📊 利润趋势", "💹 价格弹性", "🛠️ 管理操作"])
     
     with tab1:
         show_history_records()
@@ -238,8 +607,44 @@ def show_history_management():
         show_profit_trend_ui()
     
     with tab4:
+        show_elasticity_ui()
+    
+    with tab5:
         show_management_operations()
 
+@st.cache_resource
+def get_elasticity_model() -> ElasticityModel:
+    """价格弹性模型：首次使用时用全部历史拟合，之后随保存的分析增量更新，删除记录后自动重新拟合"""
+    model = ElasticityModel.from_history(history_manager.load_history())
+    model.attach(history_manager)
+    return model
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner="正在计算最优售价...")
+def compute_optimal_prices(history_version: int) -> pd.DataFrame:
+    """最优售价表，按历史记录版本缓存（各标签页每次重跑都会执行，历史没有变化时无需重算）"""
+    return get_elasticity_model().optimal_prices()
+
+def show_elasticity_ui():
+    """按历史记录拟合各型号的需求曲线，给出利润最大化售价"""
+    st.subheader("💹 价格弹性与最优定价")
+    
+    # 其他进程（如桌面版）写入的记录不会通知本进程，需要手动重新拟合
+    if st.button("🔄 重新拟合"):
+        get_elasticity_model().refit(history_manager.load_history())
+        compute_optimal_prices.clear()
+    
+    table = compute_optimal_prices(history_manager.version)
+    if table.empty:
+        st.info("暂无可用于拟合的记录（需要同一型号在不同售价下的多次分析，且填写了销量）")
+        return
+    
+    fitted = int((table['状态'] != INSUFFICIENT).sum())
+    col1, col2 = st.columns(2)
+    col1.metric("已拟合型号", fitted)
+    col2.metric("数据不足", len(table) - fitted)
+    st.caption("需求曲线: ln(销量) = 截距 + 弹性 × ln(售价)；弹性小于-1时最优售价 = 保本售价 × 弹性 / (1 + 弹性)")
+    st.dataframe(table, use_container_width=True)
+
 def show_history_records():
     """显示历史记录列表"""
     st.subheader("📋 历史分析记录")